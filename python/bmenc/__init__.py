@@ -0,0 +1,6 @@
+"""
+Shared helpers for the Bitmovin encoding sample scripts.
+
+The scripts under vod/, live/ and misc/ stay self-contained examples; this package only holds
+the pieces that would otherwise be copied into every one of them.
+"""
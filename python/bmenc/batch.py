@@ -0,0 +1,227 @@
+"""
+Encode many input files with one of the VOD scripts in a single process.
+
+Each title runs the script's own main() (create -> start -> manifests) with its input path and
+an output path of its own. Running them in one process means the SDK is imported once and the
+inputs, outputs and codec configurations the scripts resolve through bmenc.storage and
+bmenc.codec_configs are shared by all titles.
+
+The list of titles is a CSV file with an input_path column, or a JSON Lines file with one
+{"input_path": ...} object per line. An optional output_path column/key overrides the default
+output location, OUTPUT_BASE_PATH of the script plus the input file name.
+
+With --job-spec (see bmenc.jobspec) every title is encoded with that ladder instead of the
+script's own; the script has to take a plan argument, as the single-codec VOD scripts do.
+
+With --template (see bmenc.templates) a title does not run main(); its encoding is created and
+started from the captured template with one request, and the script's manifest helpers run once
+it has finished.
+
+Titles encoded with main() keep a checkpoint each (see bmenc.checkpoint). With --resume a title
+whose encoding was already started continues from it, so rerunning a batch after a failure
+encodes only the titles that never got that far.
+
+Usage (from the python directory):
+
+    python -m bmenc.batch vod/create_vod_h264_aac_fmp4_hls_dash.py titles.csv --max-concurrency 4
+    python -m bmenc.batch vod/create_vod_h264_aac_fmp4_hls_dash.py titles.csv --template template.json
+    python -m bmenc.batch vod/create_vod_h264_aac_fmp4_hls_dash.py titles.csv --resume
+"""
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+
+from bmenc import sdk
+from bmenc.checkpoint import run_checkpointed, takes_checkpoint
+from bmenc.jobspec import load_plan
+from bmenc.manifests import generate_manifests
+from bmenc.snapshot import load_encoding_snapshot
+from bmenc.templates import EncodingTemplate, start_from_template
+from bmenc.tracing import JsonlSink, PrometheusSink, instrument
+
+MAX_CONCURRENCY = 4
+
+
+@dataclass(frozen=True)
+class Title:
+    input_path: str
+    output_path: str
+
+
+@dataclass(frozen=True)
+class TitleResult:
+    """
+    Outcome of one title. seconds covers the whole pipeline, from the first create call until
+    the manifests are written.
+    """
+    input_path: str
+    output_path: str
+    status: str
+    seconds: float
+    error: str = None
+
+
+def read_titles(path, output_base_path):
+    """
+    Read the input paths from a .csv or .jsonl file and give every title its own output path.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    titles = []
+    used_output_paths = set()
+    for row in rows:
+        input_path = (row.get('input_path') or '').strip()
+        if not input_path:
+            raise Exception(f"Row without input_path in {path}: {row}")
+
+        output_path = (row.get('output_path') or '').strip()
+        if not output_path:
+            name = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = f'{output_base_path}{name}/'
+            suffix = 1
+            while output_path in used_output_paths:
+                suffix += 1
+                output_path = f'{output_base_path}{name}-{suffix}/'
+        output_path = output_path.rstrip('/') + '/'
+
+        used_output_paths.add(output_path)
+        titles.append(Title(input_path=input_path, output_path=output_path))
+    return titles
+
+
+def load_script(path):
+    """
+    Import a sample script as a module without running it.
+    """
+    name = 'bmenc_batch_' + os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, path)
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    return script
+
+
+def run_batch(script, titles, max_concurrency=MAX_CONCURRENCY, template=None, plan=None, resume=False):
+    """
+    Run script.main, or the template, for every title with at most max_concurrency titles in
+    flight and return a TitleResult per title, in input order. A failing title does not stop
+    the others. A plan (bmenc.jobspec.JobPlan) is passed on to script.main; with resume, titles
+    continue from their checkpoints.
+    """
+    if template is None and getattr(script, 'WEBHOOK_URL', None) and max_concurrency > 1:
+        raise Exception("Webhook mode listens on a single WEBHOOK_PORT per encoding; "
+                        "unset WEBHOOK_URL or use --max-concurrency 1")
+    if resume and (template is not None or not takes_checkpoint(script)):
+        raise Exception("Only titles encoded with a script's main() that takes a checkpoint can be resumed")
+
+    if template is not None:
+        output = script.bitmovin_api.encoding.outputs.get(output_id=template.output_id)
+        encode = lambda title: run_template_title(script, template, output, title)
+    else:
+        plan_argument = {'plan': plan} if plan is not None else {}
+        if takes_checkpoint(script):
+            encode = lambda title: run_checkpointed(
+                script, resume=resume, input_path=title.input_path, output_base_path=title.output_path,
+                **plan_argument)
+        else:
+            encode = lambda title: script.main(
+                input_path=title.input_path, output_base_path=title.output_path, **plan_argument)
+
+    def run_title(title):
+        started_at = time.monotonic()
+        try:
+            encode(title)
+        except Exception as e:
+            traceback.print_exc()
+            return TitleResult(title.input_path, title.output_path, 'ERROR', time.monotonic() - started_at, str(e))
+        return TitleResult(title.input_path, title.output_path, 'FINISHED', time.monotonic() - started_at)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(run_title, titles))
+
+
+def run_template_title(script, template, output, title):
+    """
+    Start one title from the template, wait for it and build its manifests with the script's helpers.
+    """
+    bitmovin_api = script.bitmovin_api
+    encoding_id = start_from_template(
+        bitmovin_api, template, input_path=title.input_path, output_base_path=title.output_path)
+
+    task = script._wait_for_encoding_to_finish(encoding_id=encoding_id)
+    if task.status == sdk.Status.ERROR:
+        script._log_task_errors(task)
+        raise Exception("Encoding failed")
+
+    snapshot = load_encoding_snapshot(bitmovin_api, encoding_id=encoding_id, muxing_types=template.muxing_types)
+    generate_manifests(bitmovin_api, [
+        (kind, getattr(script, f'_create_{kind}_manifest')(snapshot=snapshot, output=output, output_path=title.output_path))
+        for kind in ('hls', 'dash') if hasattr(script, f'_create_{kind}_manifest')
+    ], start_manifest_request=getattr(script, 'START_MANIFEST_REQUEST', None))
+
+
+def print_report(results, wall_seconds):
+    for result in results:
+        print(f"{result.status:<8} {result.seconds:9.1f}s  {result.input_path} -> {result.output_path}"
+              + (f"  ({result.error})" if result.error else ""))
+
+    finished = sum(1 for result in results if result.status == 'FINISHED')
+    busy_seconds = sum(result.seconds for result in results)
+    print(f"{finished}/{len(results)} titles finished in {wall_seconds:.1f}s "
+          f"(sum of title times {busy_seconds:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode a list of input files with one VOD sample script.')
+    parser.add_argument('script', help='path of the sample script, e.g. vod/create_vod_h264_aac_fmp4_hls_dash.py')
+    parser.add_argument('titles', help='.csv (input_path[,output_path] header) or .jsonl file')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f'titles encoded at the same time (default {MAX_CONCURRENCY})')
+    parser.add_argument('--report', help='also write the per-title timings to this JSON file')
+    parser.add_argument('--job-spec', help='encode every title with this ladder (see bmenc.jobspec)')
+    parser.add_argument('--template', help='start every title from this captured template (see bmenc.templates)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue titles from their checkpoints instead of encoding them again')
+    parser.add_argument('--trace', help='trace every API request into this .jsonl file, or .prom for Prometheus text')
+    args = parser.parse_args()
+
+    script = load_script(args.script)
+    titles = read_titles(args.titles, output_base_path=script.OUTPUT_BASE_PATH)
+    sink = None
+    if args.trace:
+        sink = PrometheusSink() if args.trace.endswith('.prom') else JsonlSink(args.trace)
+        instrument(script.bitmovin_api, sink)
+
+    started_at = time.monotonic()
+    template = EncodingTemplate.load(args.template) if args.template else None
+    plan = None
+    if args.job_spec:
+        plan = load_plan(args.job_spec, expected_codec=getattr(script, 'CODEC', None))
+    results = run_batch(script, titles, max_concurrency=args.max_concurrency, template=template, plan=plan,
+                        resume=args.resume)
+    wall_seconds = time.monotonic() - started_at
+
+    print_report(results, wall_seconds)
+    if isinstance(sink, PrometheusSink):
+        sink.write(args.trace)
+    elif sink is not None:
+        sink.close()
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'wall_seconds': wall_seconds, 'titles': [asdict(result) for result in results]}, f, indent=2)
+
+    if any(result.status != 'FINISHED' for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Run the sample scripts against bmenc.mockapi and report what each workflow phase costs.
+
+Every request a script sends is assigned to one phase:
+
+    io_setup              inputs, outputs, the encoding and its input streams (input-streams/ingest)
+    stream_creation       codec configurations, streams and sprites
+    muxing_creation       muxings
+    start                 starting/stopping encodings, webhook registration
+    wait                  encoding status and live details
+    manifest_build        reading the encoding back and creating the manifest resources
+    manifest_generation   starting manifest generation and waiting for it
+
+For each phase the report holds the number of requests, the bytes sent and received and the
+wall time from its first request to the end of its last one (phases of concurrent chains
+overlap). With --baseline the run is compared against an earlier --json report and the exit
+status is 1 if a script now needs more requests, or more bytes or time than the threshold allows.
+
+    python -m bmenc.benchmark --latency 0.05 --json bench.json
+    python -m bmenc.benchmark --latency 0.05 --baseline bench.json --threshold 0.2
+
+--quota makes the mock API answer 429 beyond that many requests per second, to see how the
+scripts' request scheduler (bmenc.ratelimit) holds up under the rate limit.
+
+Status polls are real: --poll-scale 0.01 shrinks the polling schedules and the live scripts'
+sleeps so a full run takes seconds instead of minutes.
+"""
+import argparse
+import builtins
+import contextlib
+import dataclasses
+import glob
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+from bmenc.batch import load_script
+from bmenc.mockapi import MockApiServer, use_mock_api
+
+PHASES = (
+    'io_setup', 'stream_creation', 'muxing_creation', 'start', 'wait', 'manifest_build', 'manifest_generation',
+)
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+SCRIPT_PATTERNS = ('vod/*.py', 'live/*.py', 'misc/*/*.py')
+
+THRESHOLD = 0.1
+
+_SCHEDULE_NAMES = ('ENCODING_SCHEDULE', 'MANIFEST_SCHEDULE')
+
+
+def phase_of(method, route):
+    """
+    Assign a request ('POST', '/encoding/encodings/{id}/start', ...) to a workflow phase.
+    """
+    if route.startswith('/encoding/manifests/'):
+        if route.endswith(('/start', '/status')):
+            return 'manifest_generation'
+        return 'manifest_build'
+    if method == 'GET' and route.endswith(('/status', '/live')):
+        return 'wait'
+    if method == 'POST' and (route.endswith(('/start', '/stop')) or route.startswith('/notifications/')):
+        return 'start'
+    if route.startswith(('/encoding/inputs', '/encoding/outputs')) or '/input-streams/' in route:
+        return 'io_setup'
+    if method == 'POST' and route == '/encoding/encodings':
+        return 'io_setup'
+    if method == 'POST' and '/muxings/' in route:
+        return 'muxing_creation'
+    if method == 'POST' and (route.startswith('/encoding/configurations/') or '/streams' in route):
+        return 'stream_creation'
+    # Reads of streams, muxings and codec configurations feed the manifests.
+    return 'manifest_build'
+
+
+def discover_scripts(script_dir=SCRIPT_DIR):
+    paths = []
+    for pattern in SCRIPT_PATTERNS:
+        paths.extend(sorted(glob.glob(os.path.join(script_dir, pattern))))
+    return [os.path.relpath(path, script_dir) for path in paths]
+
+
+def summarize(calls):
+    """
+    Requests, bytes and wall seconds per phase for a list of bmenc.mockapi.Call.
+    """
+    phases = {}
+    for phase in PHASES:
+        phase_calls = [call for call in calls if phase_of(call.method, call.route) == phase]
+        if not phase_calls:
+            phases[phase] = {'calls': 0, 'bytes': 0, 'seconds': 0.0}
+            continue
+        first = min(call.started_at for call in phase_calls)
+        last = max(call.started_at + call.seconds for call in phase_calls)
+        phases[phase] = {
+            'calls': len(phase_calls),
+            'bytes': sum(call.request_bytes + call.response_bytes for call in phase_calls),
+            'seconds': last - first,
+        }
+    return phases
+
+
+def run_script(path, latency=0.0, poll_scale=1.0, script_dir=SCRIPT_DIR, verbose=False, quota=None):
+    """
+    Run one script's main() against a fresh mock server and return its report entry.
+    """
+    with MockApiServer(latency=latency, quota=quota) as server, tempfile.TemporaryDirectory() as cache_dir:
+        script = load_script(os.path.join(script_dir, path))
+        use_mock_api(script, server, cache_dir=cache_dir)
+        _scale_waits(script, poll_scale)
+        server.reset_calls()
+
+        error = None
+        output = None if verbose else io.StringIO()
+        started_at = time.monotonic()
+        with contextlib.redirect_stdout(output or sys.stdout), _no_input():
+            try:
+                script.main()
+            except Exception as e:
+                if verbose:
+                    traceback.print_exc()
+                error = f'{type(e).__name__}: {e}'
+        seconds = time.monotonic() - started_at
+
+        calls = server.calls
+        return {
+            'script': path,
+            'seconds': seconds,
+            'calls': len(calls),
+            'bytes': sum(call.request_bytes + call.response_bytes for call in calls),
+            'phases': summarize(calls),
+            'error': error,
+        }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Return one line per regression of results against a baseline report.
+    """
+    previous = {entry['script']: entry for entry in baseline['scripts']}
+    regressions = []
+    for entry in results:
+        before = previous.get(entry['script'])
+        if before is None:
+            continue
+        if entry['error'] and not before['error']:
+            regressions.append(f"{entry['script']}: now fails ({entry['error']})")
+            continue
+        for phase in PHASES:
+            now, then = entry['phases'][phase], before['phases'][phase]
+            if now['calls'] > then['calls']:
+                regressions.append(f"{entry['script']} {phase}: {then['calls']} -> {now['calls']} requests")
+            for measure in ('bytes', 'seconds'):
+                if then[measure] and now[measure] > then[measure] * (1 + threshold):
+                    regressions.append(f"{entry['script']} {phase}: {measure} {then[measure]:.6g} -> "
+                                       f"{now[measure]:.6g} (+{now[measure] / then[measure] - 1:.0%})")
+    return regressions
+
+
+def print_report(results):
+    width = max([len('script')] + [len(entry['script']) for entry in results])
+    print(f"{'script':<{width}} {'calls':>6} {'kB':>8} {'seconds':>8}")
+    for entry in results:
+        print(f"{entry['script']:<{width}} {entry['calls']:>6} {entry['bytes'] / 1000:>8.1f} {entry['seconds']:>8.2f}"
+              + (f"  FAILED: {entry['error']}" if entry['error'] else ""))
+        for phase in PHASES:
+            numbers = entry['phases'][phase]
+            if numbers['calls']:
+                print(f"  {phase:<{width - 2}} {numbers['calls']:>6} {numbers['bytes'] / 1000:>8.1f} "
+                      f"{numbers['seconds']:>8.2f}")
+
+
+def _scale_waits(script, poll_scale):
+    if poll_scale == 1.0:
+        return
+    for name in _SCHEDULE_NAMES:
+        schedule = getattr(script, name, None)
+        if schedule is not None:
+            setattr(script, name, dataclasses.replace(
+                schedule,
+                initial_delay=schedule.initial_delay * poll_scale,
+                min_interval=schedule.min_interval * poll_scale,
+                max_interval=schedule.max_interval * poll_scale
+            ))
+    if hasattr(script, 'sleep'):
+        script.sleep = lambda seconds: time.sleep(seconds * poll_scale)
+
+
+@contextlib.contextmanager
+def _no_input():
+    """
+    The live scripts wait for Enter before stopping; answer right away.
+    """
+    original = builtins.input
+    builtins.input = lambda prompt='': ''
+    try:
+        yield
+    finally:
+        builtins.input = original
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sample scripts against a local mock API.')
+    parser.add_argument('scripts', nargs='*', help='scripts relative to the python directory (default: all)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the mock API adds to every request')
+    parser.add_argument('--poll-scale', type=float, default=1.0, help='factor for polling delays and sleeps')
+    parser.add_argument('--quota', type=float, help='requests per second the mock API serves before answering 429')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='earlier --json report to compare against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'allowed relative growth of bytes and time (default {THRESHOLD})')
+    parser.add_argument('--verbose', action='store_true', help='show the scripts\' own output')
+    args = parser.parse_args()
+
+    results = [
+        run_script(path, latency=args.latency, poll_scale=args.poll_scale, verbose=args.verbose, quota=args.quota)
+        for path in args.scripts or discover_scripts()
+    ]
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency': args.latency, 'poll_scale': args.poll_scale, 'scripts': results}, f, indent=2)
+
+    failed = any(entry['error'] for entry in results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), threshold=args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        failed = failed or bool(regressions)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
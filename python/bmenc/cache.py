@@ -0,0 +1,88 @@
+"""
+Small JSON files that remember API resources between runs of the sample scripts.
+
+Files live in $BMENC_CACHE_DIR (default ~/.cache/bmenc). Every change is written to a temporary
+file first and moved into place, so an interrupted run never leaves a half-written cache behind.
+A missing or unreadable file simply starts out empty.
+
+Ids of resources only mean something to the account they were created in, so the caches of
+resources live in a directory per API key, tenant org and API base URL (account_cache_path):
+a rotated key, --org-id or a mock server starts with caches of its own.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.environ.get('BMENC_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'bmenc')
+
+
+def account_cache_path(bitmovin_api, name):
+    """
+    Path of the cache file name for the account bitmovin_api acts as.
+    """
+    return os.path.join(CACHE_DIR, account_scope(bitmovin_api), name)
+
+
+def account_scope(bitmovin_api):
+    """
+    Short SHA-256 of the API key, tenant org and base URL of bitmovin_api; never the key itself.
+    """
+    rest_client = bitmovin_api.api_client.rest_client
+    canonical = json.dumps([rest_client.api_key, rest_client.tenant_org_id or None, rest_client.base_url])
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class JsonStore:
+    """
+    Thread-safe string -> JSON value mapping persisted in a single file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._entries = _load(path)
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._save()
+
+    def delete(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def key_lock(self, key):
+        """
+        Lock for resolving a single key, so concurrent callers do not create the same resource twice.
+        """
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
@@ -0,0 +1,44 @@
+"""
+Create the codec configuration -> stream -> muxing chains of an encoding concurrently.
+
+Within one rendition every create call needs the id returned by the previous one, but
+renditions do not depend on each other. Running each chain as one task on a bounded thread pool
+makes encoding setup take about as long as the slowest chain instead of the sum of all chains.
+
+Every chain records into its own fork of the EncodingRegistry. The forks are merged back in job
+and profile order, so the snapshot lists renditions exactly as the sequential loops did.
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+
+MAX_WORKERS = 8
+
+
+def create_renditions(registry, *jobs, max_workers=MAX_WORKERS):
+    """
+    Call create_rendition(profile, registry) for every profile of every (create_rendition, profiles)
+    job and return the results in job and profile order. Each call receives a fork of the registry,
+    or None if registry is None.
+
+    The first failing chain cancels the chains that have not started yet; its exception is raised
+    once the running ones have finished and nothing is merged into the registry.
+    """
+    chains = [(create_rendition, profile) for create_rendition, profiles in jobs for profile in profiles]
+    forks = [registry.fork() if registry is not None else None for _ in chains]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(create_rendition, profile, fork)
+            for (create_rendition, profile), fork in zip(chains, forks)
+        ]
+        _, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+
+    for future in futures:
+        if not future.cancelled() and future.exception() is not None:
+            raise future.exception()
+
+    if registry is not None:
+        for fork in forks:
+            registry.merge(fork)
+    return [future.result() for future in futures]
@@ -0,0 +1,154 @@
+"""
+Checkpoints of a script run, so a failure after the encode does not cost the encode again.
+
+The non-live scripts record what they have reached in a Checkpoint as they go:
+
+    prepared   the encoding exists with all its streams and muxings (encoding id, output id,
+               output path, muxing types and the manifests attached to the start request)
+    started    the encoding was started
+    encoded    the encoding finished; manifests the encoder wrote count as generated
+    hls/dash   the HLS/DASH manifest was generated (manifest id)
+
+Checkpoints of the CLI and batch runs live in $BMENC_CACHE_DIR/checkpoints, one file per
+(script, input path, output path), written atomically after every phase. run_checkpointed(...,
+resume=True) picks a run up where it stopped: an encoding that was started is waited for (or
+recognised as finished) instead of encoded again, and only manifests that were not generated yet
+are built and generated from a snapshot of the encoding. A run that did not get as far as
+starting its encoding is simply run again, since setting up an encoding takes seconds.
+
+    python -m bmenc vod h264 --input-path in.mp4 --output-base-path out/ --resume
+    python -m bmenc.batch vod/create_vod_h264_aac_fmp4_hls_dash.py titles.csv --resume
+"""
+import hashlib
+import inspect
+import os
+import time
+
+from bmenc import sdk
+from bmenc.cache import CACHE_DIR, JsonStore
+from bmenc.manifests import generate_manifests
+from bmenc.snapshot import load_encoding_snapshot
+
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, 'checkpoints')
+
+PREPARED, STARTED, ENCODED = 'prepared', 'started', 'encoded'
+
+# manifest phases, named like their bmenc.manifests kinds
+_MANIFESTS = ('hls', 'dash')
+
+
+class Checkpoint:
+    """
+    Phases reached by one run. Without a path the checkpoint lives in memory only, which is
+    what the scripts use when they are run directly.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._store = JsonStore(path) if path else None
+        self._phases = {}
+
+    @classmethod
+    def for_run(cls, name, input_path, output_base_path, directory=CHECKPOINT_DIR):
+        digest = hashlib.sha256(f'{input_path}\n{output_base_path}'.encode('utf-8')).hexdigest()[:16]
+        return cls(os.path.join(directory, f'{name}-{digest}.json'))
+
+    def get(self, phase):
+        """
+        What was recorded with phase, or None if it was not reached.
+        """
+        return self._store.get(phase) if self._store else self._phases.get(phase)
+
+    def record(self, phase, **values):
+        entry = dict(values, recorded_at=time.time())
+        if self._store:
+            self._store.set(phase, entry)
+        else:
+            self._phases[phase] = entry
+
+    def prepared(self, encoding_id, output_id, output_path, muxing_types, encoder_manifests=()):
+        """
+        encoder_manifests are the (kind, manifest) pairs attached to the start request.
+        """
+        self.record(PREPARED, encoding_id=encoding_id, output_id=output_id, output_path=output_path,
+                    muxing_types=list(muxing_types),
+                    encoder_manifests={kind: manifest.id for kind, manifest in encoder_manifests})
+
+    def started(self):
+        self.record(STARTED)
+
+    def encoded(self):
+        self.record(ENCODED)
+        prepared = self.get(PREPARED) or {}
+        for manifest, manifest_id in prepared.get('encoder_manifests', {}).items():
+            self.manifest_generated(manifest, manifest_id)
+
+    def manifest_generated(self, manifest, manifest_id):
+        self.record(manifest, manifest_id=manifest_id)
+
+    def clear(self):
+        self._phases = {}
+        if self._store:
+            for phase in (PREPARED, STARTED, ENCODED, *_MANIFESTS):
+                self._store.delete(phase)
+
+
+def takes_checkpoint(script):
+    return 'checkpoint' in inspect.signature(script.main).parameters
+
+
+def run_checkpointed(script, resume=False, checkpoint_dir=CHECKPOINT_DIR, **arguments):
+    """
+    Run script.main with a checkpoint file for these arguments. With resume, a run whose
+    encoding was already started continues from its checkpoint instead.
+    """
+    defaults = {name: parameter.default for name, parameter in inspect.signature(script.main).parameters.items()}
+    checkpoint = Checkpoint.for_run(
+        script.TEST_ITEM,
+        arguments.get('input_path', defaults.get('input_path')),
+        arguments.get('output_base_path', defaults.get('output_base_path')),
+        directory=checkpoint_dir
+    )
+    if resume and checkpoint.get(STARTED) is not None:
+        resume_run(script, checkpoint)
+        return checkpoint
+
+    checkpoint.clear()
+    script.main(checkpoint=checkpoint, **arguments)
+    return checkpoint
+
+
+def resume_run(script, checkpoint):
+    """
+    Finish a started run with the script's own helpers: wait for the encoding unless it is known
+    to be finished, then build and generate the manifests that were not generated yet.
+    """
+    bitmovin_api = script.bitmovin_api
+    prepared = checkpoint.get(PREPARED)
+    encoding_id = prepared['encoding_id']
+    print(f"Resuming encoding {encoding_id} from checkpoint {checkpoint.path}")
+
+    if checkpoint.get(ENCODED) is None:
+        task = script._wait_for_encoding_to_finish(encoding_id=encoding_id)
+        if task.status == sdk.Status.ERROR:
+            script._log_task_errors(task)
+            raise Exception(f"Encoding {encoding_id} failed; run again without resuming to encode from scratch")
+        checkpoint.encoded()
+        print("Encoding finished successfully")
+
+    pending = [
+        manifest for manifest in _MANIFESTS
+        if hasattr(script, f'_create_{manifest}_manifest') and checkpoint.get(manifest) is None
+    ]
+    if not pending:
+        print("Nothing left to do")
+        return
+
+    output = bitmovin_api.encoding.outputs.get(output_id=prepared['output_id'])
+    snapshot = load_encoding_snapshot(bitmovin_api, encoding_id=encoding_id, muxing_types=prepared['muxing_types'])
+    start_manifest_request = getattr(script, 'START_MANIFEST_REQUEST', None)
+    generate_manifests(bitmovin_api, [
+        (manifest, getattr(script, f'_create_{manifest}_manifest')(
+            snapshot=snapshot, output=output, output_path=prepared['output_path']))
+        for manifest in pending
+    ], on_generated=checkpoint.manifest_generated, start_manifest_request=start_manifest_request)
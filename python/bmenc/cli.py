@@ -0,0 +1,270 @@
+"""
+One command line for all sample workflows, with a worker mode that stays warm between jobs.
+
+    python -m bmenc vod h264 --input-path in.mp4 --output-base-path output/title/
+    python -m bmenc vod h265 --input-path in.mp4 --job-spec jobs/other-ladder.json
+    python -m bmenc live srt hevc-crf
+    python -m bmenc thumbnails --input-path in.mp4
+    python -m bmenc vod h264 --input-path in.mp4 --output-base-path output/title/ --resume
+    python -m bmenc list
+
+Every workflow is the main() of one of the sample scripts; the command only picks the script,
+loads it on first use and runs it with the bmenc client instead of the one the script builds
+from its own constants. Credentials come from --api-key/--org-id or BITMOVIN_API_KEY and
+BITMOVIN_ORG_ID. With --resume a VOD workflow continues from its checkpoint (see
+bmenc.checkpoint) instead of encoding again.
+
+`python -m bmenc worker` is the long-running variant: it reads one JSON job per line from stdin
+(or --jobs FILE) and runs it on the same client, connection pool, request scheduler, codec
+configuration cache and storage registry as every job before it, with each script loaded only
+once, so a job costs its API requests and nothing else:
+
+    {"id": "t1", "command": "vod h264", "input_path": "in/1.mp4", "output_base_path": "out/1/"}
+    {"id": "t2", "command": "thumbnails", "input_path": "in/2.mp4", "job_spec": "jobs/x.json"}
+    {"id": "t1", "command": "vod h264", "input_path": "in/1.mp4", "output_base_path": "out/1/", "resume": true}
+
+One JSON result per job ({"id", "command", "status", "seconds", "error"}) is written to
+--results (default stdout) as soon as the job is done; while jobs run, what the scripts print goes
+to stderr, so the results stay parseable. Live workflows wait for Enter before they
+stop and are therefore only available as direct commands.
+"""
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+
+from bmenc import sdk
+from bmenc.batch import load_script
+from bmenc.checkpoint import run_checkpointed, takes_checkpoint
+from bmenc.codec_configs import CodecConfigCache
+from bmenc.jobspec import load_plan
+from bmenc.ratelimit import use_scheduler
+from bmenc.storage import StorageRegistry
+from bmenc.transport import use_session
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# command -> sample script, relative to the python directory
+WORKFLOWS = {
+    ('vod', 'h264'): 'vod/create_vod_h264_aac_fmp4_hls_dash.py',
+    ('vod', 'h264-ts'): 'vod/create_vod_h264_aac_ts_fmp4_hls_dash.py',
+    ('vod', 'h265'): 'vod/create_vod_h265_aac_fmp4_hls_dash.py',
+    ('vod', 'av1'): 'vod/create_vod_av1_aac_fmp4_hls_dash.py',
+    ('vod', 'vp9'): 'vod/create_vod_vp9_webm_aac_fmp4_dash.py',
+    ('vod', 'pertitle'): 'vod/create_vod_pertitle_h264_aac_fmp4_default_hls_dash.py',
+    ('live', 'rtmp', 'h264'): 'live/create_live_rtmp_ingest_h264_vbr_aac_fmp4_hls_dash.py',
+    ('live', 'rtmp', 'h264-s3-role'):
+        'live/create_live_rtmp_ingest_h264_vbr_aac_fmp4_hls_dash_with_s3_role_based_output.py',
+    ('live', 'srt', 'h264'): 'live/create_live_srt_ingest_h264_vbr_aac_fmp4_hls_dash.py',
+    ('live', 'srt', 'h264-s3-role'):
+        'live/create_live_srt_ingest_h264_vbr_aac_fmp4_hls_dash_with_s3_role_based_output.py',
+    ('live', 'srt', 'hevc-vbr'): 'live/create_live_srt_ingest_hevc_vbr_aac_fmp4_hls_dash.py',
+    ('live', 'srt', 'hevc-crf'): 'live/create_live_srt_ingest_hevc_crf_aac_fmp4_hls_dash.py',
+    ('multi-audio', 'fmp4'): 'misc/multi-audio/create_multi_audio_h264_aac_fmp4_hls_dash.py',
+    ('multi-audio', 'ts'): 'misc/multi-audio/create_multi_audio_h264_aac_ts_hls_fmp4_dash.py',
+    ('subtitles',): 'misc/subtitle/create_srt_to_segmented_webvtt_h264_aac_fmp4_hls_dash.py',
+    ('thumbnails',): 'misc/thumbnail/create_thumbnails_sprite_h264_aac_fmp4_hls_dash.py',
+}
+
+MAX_CONCURRENCY = 4
+
+_JOB_FIELDS = {'id', 'command', 'input_path', 'output_base_path', 'job_spec', 'resume'}
+
+
+@dataclass(frozen=True)
+class JobResult:
+    id: str
+    command: str
+    status: str
+    seconds: float
+    error: str = None
+
+
+class Workbench:
+    """
+    One client with its pooled session, request scheduler and caches, shared by every workflow
+    run through it. Scripts are loaded once and then re-pointed at the shared objects.
+    Thread-safe.
+    """
+
+    def __init__(self, bitmovin_api, codec_configs=None, storage=None, script_dir=SCRIPT_DIR):
+        self.bitmovin_api = bitmovin_api
+        self.codec_configs = codec_configs or CodecConfigCache(bitmovin_api)
+        self.storage = storage or StorageRegistry(bitmovin_api)
+        self._script_dir = script_dir
+        self._scripts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, api_key, org_id=None, base_url=None):
+        arguments = {'base_url': base_url} if base_url else {}
+        return cls(use_scheduler(use_session(sdk.BitmovinApi(api_key=api_key, tenant_org_id=org_id, **arguments))))
+
+    def script(self, command):
+        """
+        The loaded script of a command, e.g. ('vod', 'h264').
+        """
+        if command not in WORKFLOWS:
+            raise Exception(f"Unknown command '{' '.join(command)}'. Valid commands: "
+                            f"{', '.join(' '.join(known) for known in WORKFLOWS)}")
+        with self._lock:
+            script = self._scripts.get(command)
+            if script is None:
+                script = load_script(os.path.join(self._script_dir, WORKFLOWS[command]))
+                script.bitmovin_api = self.bitmovin_api
+                if hasattr(script, 'codec_configs'):
+                    script.codec_configs = self.codec_configs
+                if hasattr(script, 'storage'):
+                    script.storage = self.storage
+                self._scripts[command] = script
+            return script
+
+    def run(self, command, input_path=None, output_base_path=None, job_spec=None, resume=False):
+        """
+        Run the workflow of command; arguments left at None keep the script's defaults. Workflows
+        that take a checkpoint always keep one, so a failed run can be resumed.
+        """
+        script = self.script(command)
+        parameters = inspect.signature(script.main).parameters
+        arguments = {'input_path': input_path, 'output_base_path': output_base_path}
+        if job_spec is not None:
+            if 'plan' not in parameters:
+                raise Exception(f"'{' '.join(command)}' takes no job spec")
+            arguments['plan'] = load_plan(job_spec, expected_codec=getattr(script, 'CODEC', None))
+        for name, value in arguments.items():
+            if value is not None and name not in parameters:
+                raise Exception(f"'{' '.join(command)}' takes no {name.replace('_', '-')}")
+        arguments = {name: value for name, value in arguments.items() if value is not None}
+        if not takes_checkpoint(script):
+            if resume:
+                raise Exception(f"'{' '.join(command)}' cannot be resumed")
+            script.main(**arguments)
+            return
+        run_checkpointed(script, resume=resume, **arguments)
+
+
+def parse_job(line):
+    job = json.loads(line)
+    if not isinstance(job, dict) or 'command' not in job:
+        raise Exception(f"A job is a JSON object with a command, got {line.strip()}")
+    unknown = set(job) - _JOB_FIELDS
+    if unknown:
+        raise Exception(f"Unknown job field(s) {', '.join(sorted(unknown))}")
+    return job
+
+
+def run_worker(workbench, lines, results, max_concurrency=MAX_CONCURRENCY):
+    """
+    Run every job read from lines on the workbench, at most max_concurrency at a time, and
+    write a JobResult line to results as each one ends. Returns the number of failed jobs.
+    """
+    lock = threading.Lock()
+    failures = [0]
+
+    def report(result):
+        with lock:
+            results.write(json.dumps(asdict(result)) + '\n')
+            results.flush()
+            if result.status != 'FINISHED':
+                failures[0] += 1
+
+    def run_job(number, line):
+        started_at = time.monotonic()
+        job_id, command_line = str(number), None
+        try:
+            job = parse_job(line)
+            job_id, command_line = str(job.get('id', number)), job['command']
+            command = tuple(command_line.split())
+            if command[0] == 'live':
+                raise Exception("Live workflows wait for Enter before stopping; run them directly")
+            workbench.run(command, job.get('input_path'), job.get('output_base_path'), job.get('job_spec'),
+                          resume=bool(job.get('resume')))
+        except Exception as e:
+            traceback.print_exc()
+            report(JobResult(job_id, command_line, 'ERROR', time.monotonic() - started_at, str(e)))
+        else:
+            report(JobResult(job_id, command_line, 'FINISHED', time.monotonic() - started_at))
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for number, line in enumerate(lines, start=1):
+            if line.strip():
+                executor.submit(run_job, number, line)
+    return failures[0]
+
+
+def _add_workflow_parsers(subparsers):
+    parsers = {}
+    for command in WORKFLOWS:
+        for depth in range(1, len(command) + 1):
+            prefix = command[:depth]
+            if prefix in parsers:
+                continue
+            parent = parsers[prefix[:-1]][1] if depth > 1 else subparsers
+            if depth == len(command):
+                parser = parent.add_parser(prefix[-1], help=WORKFLOWS[command])
+                parser.set_defaults(command=command)
+                parser.add_argument('--input-path', help='input file (default: the script\'s INPUT_PATH)')
+                parser.add_argument('--output-base-path', help='output path (default: the script\'s OUTPUT_BASE_PATH)')
+                parser.add_argument('--job-spec', help='ladder to encode with (see bmenc.jobspec)')
+                parser.add_argument('--resume', action='store_true',
+                                    help='continue the last run of these paths from its checkpoint')
+                parsers[prefix] = (parser, None)
+            else:
+                parser = parent.add_parser(prefix[-1], help=f'{prefix[-1]} workflows')
+                parsers[prefix] = (parser, parser.add_subparsers(title='workflows', required=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bmenc', description='Run the Bitmovin encoding sample workflows.')
+    parser.add_argument('--api-key', default=os.environ.get('BITMOVIN_API_KEY'),
+                        help='API key (default: $BITMOVIN_API_KEY)')
+    parser.add_argument('--org-id', default=os.environ.get('BITMOVIN_ORG_ID'),
+                        help='tenant organization id (default: $BITMOVIN_ORG_ID)')
+    parser.add_argument('--base-url', help='API base URL, e.g. of a bmenc.mockapi server')
+    subparsers = parser.add_subparsers(title='commands', dest='action', required=True)
+    _add_workflow_parsers(subparsers)
+
+    worker = subparsers.add_parser('worker', help='run JSON Lines jobs on one warm client')
+    worker.add_argument('--jobs', default='-', help='JSON Lines file of jobs (default: stdin)')
+    worker.add_argument('--results', default='-', help='JSON Lines file for the results (default: stdout)')
+    worker.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f'jobs run at the same time (default {MAX_CONCURRENCY})')
+    subparsers.add_parser('list', help='list the workflows and their scripts')
+    args = parser.parse_args(argv)
+
+    if args.action == 'list':
+        for command, path in WORKFLOWS.items():
+            print(f"{' '.join(command):<22} {path}")
+        return
+    if not args.api_key:
+        parser.error('an API key is required (--api-key or BITMOVIN_API_KEY)')
+
+    workbench = Workbench.connect(args.api_key, org_id=args.org_id, base_url=args.base_url)
+    if args.action != 'worker':
+        workbench.run(args.command, args.input_path, args.output_base_path, args.job_spec, resume=args.resume)
+        return
+
+    jobs = sys.stdin if args.jobs == '-' else open(args.jobs)
+    results = sys.stdout if args.results == '-' else open(args.results, 'a')
+    try:
+        # results holds on to the real stdout; the scripts' progress output must not mix with it
+        with contextlib.redirect_stdout(sys.stderr):
+            failures = run_worker(workbench, jobs, results, max_concurrency=args.max_concurrency)
+    finally:
+        if jobs is not sys.stdin:
+            jobs.close()
+        if results is not sys.stdout:
+            results.close()
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Reuse codec configurations across runs instead of creating identical ones every time.
+
+The encoding ladders of the sample scripts rarely change, yet every run used to create a fresh
+configuration per rendition. CodecConfigCache keys each configuration by a hash of its canonical
+payload and remembers the id the API assigned to it, so a repeated run finds its configurations
+without a single request. Cached ids are trusted for VERIFY_AFTER seconds; the first use after
+that checks that the configuration still exists and recreates it if it was deleted. The cache
+file is kept per account (see bmenc.cache), so ids never leak into another account or org.
+"""
+import functools
+import hashlib
+import json
+import time
+from enum import Enum
+
+from bmenc import sdk
+from bmenc.cache import JsonStore, account_cache_path
+
+CACHE_NAME = 'codec_configs.json'
+
+VERIFY_AFTER = 24 * 60 * 60
+
+# Set by the API, not part of what the caller asked for (to_dict() uses the API's camelCase names).
+_SERVER_FIELDS = {'id', 'createdAt', 'modifiedAt'}
+
+
+class CodecConfigCache:
+    """
+    Creates codec configurations on cache miss and returns the cached ones otherwise.
+    Safe to share between the threads that create rendition chains.
+    """
+
+    def __init__(self, bitmovin_api, path=None, verify_after=VERIFY_AFTER, clock=time.time):
+        self._bitmovin_api = bitmovin_api
+        self._store = JsonStore(path or account_cache_path(bitmovin_api, CACHE_NAME))
+        self._verify_after = verify_after
+        self._clock = clock
+
+    def get_or_create(self, codec_type, codec_config):
+        """
+        Return a configuration with the settings of codec_config. On a cache hit that is
+        codec_config itself with the cached id filled in, otherwise the newly created resource.
+        """
+        creators = _creators()
+        if codec_type not in creators:
+            raise Exception(f"Unsupported codec type '{codec_type}'. Valid types: {', '.join(map(str, creators))}")
+
+        key = config_fingerprint(codec_type, codec_config)
+        with self._store.key_lock(key):
+            entry = self._store.get(key)
+            if entry is not None and self._verify(key, entry, codec_type):
+                codec_config.id = entry['id']
+                return codec_config
+
+            create, keyword = creators[codec_type]
+            created = create(self._bitmovin_api)(**{keyword: codec_config})
+            self._store.set(key, {'id': created.id, 'verified_at': self._clock()})
+            return created
+
+    def _verify(self, key, entry, codec_type):
+        """
+        Check a cached entry against the API once it is older than verify_after.
+        """
+        now = self._clock()
+        if now - entry.get('verified_at', 0) < self._verify_after:
+            return True
+
+        try:
+            actual_type = self._bitmovin_api.encoding.configurations.type.get(configuration_id=entry['id']).type
+        except sdk.BitmovinError:
+            actual_type = None
+        if actual_type != codec_type:
+            self._store.delete(key)
+            return False
+
+        self._store.set(key, dict(entry, verified_at=now))
+        return True
+
+
+def config_fingerprint(codec_type, codec_config):
+    """
+    SHA-256 of the codec type and every field of the configuration the caller set.
+    """
+    payload = {
+        name: value for name, value in codec_config.to_dict().items()
+        if name not in _SERVER_FIELDS and value is not None
+    }
+    canonical = json.dumps([codec_type, payload], sort_keys=True, separators=(',', ':'), default=_json_value)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+@functools.cache
+def _creators():
+    """
+    codec type -> (create endpoint, payload keyword)
+    """
+    return {
+        sdk.CodecConfigType.H264: (lambda api: api.encoding.configurations.video.h264.create, 'h264_video_configuration'),
+        sdk.CodecConfigType.H265: (lambda api: api.encoding.configurations.video.h265.create, 'h265_video_configuration'),
+        sdk.CodecConfigType.AV1: (lambda api: api.encoding.configurations.video.av1.create, 'av1_video_configuration'),
+        sdk.CodecConfigType.VP9: (lambda api: api.encoding.configurations.video.vp9.create, 'vp9_video_configuration'),
+        sdk.CodecConfigType.AAC: (lambda api: api.encoding.configurations.audio.aac.create, 'aac_audio_configuration'),
+        sdk.CodecConfigType.WEBVTT: (
+            lambda api: api.encoding.configurations.subtitles.webvtt.create, 'web_vtt_configuration'
+        ),
+    }
+
+
+def _json_value(value):
+    return value.value if isinstance(value, Enum) else str(value)
@@ -0,0 +1,193 @@
+"""
+Write DASH MPDs locally from an encoding snapshot instead of running a DASH manifest job.
+
+A DASH manifest on the API is built one call at a time: the manifest, a period, one call per
+adaptation set and one per representation, then a generation job that has to be started and
+polled. For muxings with a fixed segment length and %number% segment naming (see bmenc.offline)
+the MPD follows from the snapshot and the input duration alone, so write_dash builds the same
+structure (Period -> Video/Audio/Subtitle AdaptationSets -> representations) in memory:
+
+    adaptation_sets = default_dash_adaptation_sets(snapshot, output_path=output_base_path)
+    files = write_dash(adaptation_sets, output_path=output_base_path,
+                       duration=input_duration(bitmovin_api, snapshot))
+    upload_files(files, S3Bucket(S3_OUTPUT_BUCKET_NAME, S3_OUTPUT_ACCESS_KEY, S3_OUTPUT_SECRET_KEY))
+
+fMP4 representations get a SegmentTemplate of their own, like DashFmp4Representation in
+TEMPLATE_REPRESENTATION mode; chunked WebVTT gets a SegmentTemplate with a SegmentTimeline, like
+DashChunkedTextRepresentation of type TIMELINE. Adaptation sets carry lang and Label values.
+default_dash_adaptation_sets gives every audio track (see bmenc.offline.audio_tracks) an
+adaptation set of its own, labelled with its directory when there are several, so the main and
+commentary audio of the multi-audio scripts stay two tracks. The labels of the scripts are set
+the same way by hand:
+
+    tracks = audio_tracks(audio_renditions, output_base_path)
+    AdaptationSet('audio', tuple(tracks['audio/main']), lang='en', labels=('主音声',))
+    AdaptationSet('audio', tuple(tracks['audio/commentary']), lang='en', labels=('副音声',))
+
+Segment paths are relative to the MPD in output_path.
+
+    python -m bmenc.dash <encoding id> --output-base-path output/vod-h264-aac-fmp4-hls-dash/ --directory out/
+"""
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+
+from bmenc import sdk
+from bmenc.offline import audio_tracks, bitrate, codec_string, join_path, run_main, segment_layout
+
+MANIFEST_NAME = 'stream.mpd'
+TIMESCALE = 1000
+
+# content type -> mimeType of the adaptation set
+_MIME_TYPES = {'video': 'video/mp4', 'audio': 'audio/mp4', 'text': 'text/vtt'}
+
+
+@dataclass(frozen=True)
+class AdaptationSet:
+    """
+    content_type is 'video', 'audio' or 'text' (a SubtitleAdaptationSet of chunked WebVTT).
+    """
+    content_type: str
+    renditions: tuple
+    lang: str = None
+    labels: tuple = ()
+
+
+def default_dash_adaptation_sets(snapshot, output_path, muxing_type='fmp4', subtitle_lang=None):
+    """
+    One video adaptation set and one audio ('en') adaptation set per audio track with the
+    renditions of muxing_type, plus the first chunked WebVTT muxing as a subtitle adaptation set.
+    """
+    video, audio = [], []
+    for rendition in snapshot.renditions(muxing_type):
+        if rendition.stream.mode is not None and 'PER_TITLE_TEMPLATE' in rendition.stream.mode.value:
+            continue
+        if rendition.codec_type == sdk.CodecConfigType.AAC:
+            audio.append(rendition)
+        elif rendition.codec_config is not None:
+            video.append(rendition)
+
+    adaptation_sets = [AdaptationSet('video', tuple(video))]
+    tracks = audio_tracks(audio, output_path)
+    for track, renditions in tracks.items():
+        labels = (track.rpartition('/')[2],) if len(tracks) > 1 else ()
+        adaptation_sets.append(AdaptationSet('audio', tuple(renditions), lang='en', labels=labels))
+    subtitles = next(iter(snapshot.renditions('chunked_text')), None) if 'chunked_text' in snapshot.muxings else None
+    if subtitles is not None:
+        adaptation_sets.append(AdaptationSet('text', (subtitles,), lang=subtitle_lang))
+    return [adaptation_set for adaptation_set in adaptation_sets if adaptation_set.renditions]
+
+
+def write_dash(adaptation_sets, output_path, duration=None, manifest_name=MANIFEST_NAME):
+    """
+    Return {path: text} with the MPD.
+    """
+    return {join_path(output_path, manifest_name): mpd(adaptation_sets, output_path, duration)}
+
+
+def mpd(adaptation_sets, output_path, duration=None):
+    layouts = [
+        [(rendition, segment_layout(rendition, output_path, duration)) for rendition in adaptation_set.renditions]
+        for adaptation_set in adaptation_sets
+    ]
+    total = duration or max((layout.duration for group in layouts for _, layout in group), default=0)
+    max_segment = max((max(layout.durations) for group in layouts for _, layout in group), default=0)
+
+    root = ET.Element('MPD', {
+        'xmlns': 'urn:mpeg:dash:schema:mpd:2011',
+        'profiles': 'urn:mpeg:dash:profile:isoff-live:2011',
+        'type': 'static',
+        'mediaPresentationDuration': _duration(total),
+        'minBufferTime': _duration(max_segment),
+    })
+    period = ET.SubElement(root, 'Period', {'id': '0', 'start': 'PT0.0S'})
+    for index, (adaptation_set, group) in enumerate(zip(adaptation_sets, layouts)):
+        attributes = {'id': str(index), 'mimeType': _MIME_TYPES[adaptation_set.content_type]}
+        if adaptation_set.lang:
+            attributes['lang'] = adaptation_set.lang
+        if adaptation_set.content_type != 'text':
+            attributes.update(segmentAlignment='true', startWithSAP='1')
+        element = ET.SubElement(period, 'AdaptationSet', attributes)
+        for label in adaptation_set.labels:
+            ET.SubElement(element, 'Label').text = label
+        if adaptation_set.content_type == 'text':
+            ET.SubElement(element, 'Role', {'schemeIdUri': 'urn:mpeg:dash:role:2011', 'value': 'subtitle'})
+
+        for rendition, layout in group:
+            representation = ET.SubElement(element, 'Representation', _representation_attributes(rendition))
+            if adaptation_set.content_type == 'text':
+                _timeline_template(representation, layout)
+            else:
+                _number_template(representation, layout)
+
+    ET.indent(root)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='unicode') + '\n'
+
+
+def _representation_attributes(rendition):
+    codec = rendition.codec_config
+    attributes = {'id': rendition.muxing.id, 'bandwidth': str(bitrate(rendition))}
+    codecs = codec_string(rendition)
+    if codecs:
+        attributes['codecs'] = codecs
+    if getattr(codec, 'width', None) and getattr(codec, 'height', None):
+        attributes.update(width=str(codec.width), height=str(codec.height))
+    if getattr(codec, 'rate', None):
+        # the rate of an audio configuration is its sampling rate
+        name = 'audioSamplingRate' if rendition.codec_type == sdk.CodecConfigType.AAC else 'frameRate'
+        attributes[name] = f'{codec.rate:g}'
+    return attributes
+
+
+def _number_template(representation, layout):
+    attributes = {
+        'media': _template(layout.segment_naming, layout.path),
+        'timescale': str(TIMESCALE),
+        'duration': str(round(layout.segment_length * TIMESCALE)),
+        'startNumber': '0',
+    }
+    if layout.init_segment:
+        attributes['initialization'] = layout.init_segment
+    ET.SubElement(representation, 'SegmentTemplate', attributes)
+
+
+def _timeline_template(representation, layout):
+    template = ET.SubElement(representation, 'SegmentTemplate', {
+        'media': _template(layout.segment_naming, layout.path),
+        'timescale': str(TIMESCALE),
+        'startNumber': '0',
+    })
+    timeline = ET.SubElement(template, 'SegmentTimeline')
+    start = 0
+    runs = []
+    for duration in (round(duration * TIMESCALE) for duration in layout.durations):
+        if runs and runs[-1][1] == duration:
+            runs[-1][2] += 1
+        else:
+            runs.append([start, duration, 0])
+        start += duration
+    for time, duration, repeat in runs:
+        attributes = {'t': str(time), 'd': str(duration)}
+        if repeat:
+            attributes['r'] = str(repeat)
+        ET.SubElement(timeline, 'S', attributes)
+
+
+def _template(segment_naming, path):
+    return join_path(path, segment_naming.replace('%number%', '$Number$'))
+
+
+def _duration(seconds):
+    return f'PT{seconds:.3f}S'
+
+
+def main():
+    run_main('Write the DASH MPD of a finished encoding without a manifest job.', _write_default)
+
+
+def _write_default(snapshot, output_path, duration, muxing_types):
+    return write_dash(default_dash_adaptation_sets(snapshot, output_path, muxing_type=muxing_types[0]),
+                      output_path=output_path, duration=duration)
+
+
+if __name__ == '__main__':
+    main()
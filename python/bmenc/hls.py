@@ -0,0 +1,195 @@
+"""
+Write HLS playlists locally from an encoding snapshot instead of running an HLS manifest job.
+
+An HLS manifest on the API costs one request per rendition to define, plus a generation job
+that has to be started and polled. For muxings with a fixed segment length and %number% segment
+naming (see bmenc.offline) the master playlist and the media playlists follow from the snapshot
+and the input duration alone, so write_hls builds them in memory:
+
+    entries = default_hls_entries(snapshot, output_path=output_base_path)
+    files = write_hls(entries, output_path=output_base_path, duration=input_duration(bitmovin_api, snapshot))
+    upload_files(files, S3Bucket(S3_OUTPUT_BUCKET_NAME, S3_OUTPUT_ACCESS_KEY, S3_OUTPUT_SECRET_KEY))
+
+The entries mirror the resources of an HLS manifest on the API (AudioMediaInfo,
+SubtitlesMediaInfo, StreamInfo); default_hls_entries lays them out the way the sample scripts
+do, naming every playlist after the output path of its muxing (audio/main/128000 ->
+audio_main_128000.m3u8). Playlist and segment URIs are relative to the master playlist in
+output_path.
+
+    python -m bmenc.hls <encoding id> --output-base-path output/vod-h264-aac-fmp4-hls-dash/ --directory out/
+"""
+import math
+from dataclasses import dataclass
+
+from bmenc import sdk
+from bmenc.offline import audio_tracks, bitrate, codec_string, join_path, relative_path, run_main, segment_layout
+
+MANIFEST_NAME = 'stream.m3u8'
+
+# muxing type -> lowest HLS version its media playlists need (EXT-X-MAP for fMP4)
+_VERSIONS = {'fmp4': 6, 'ts': 3, 'chunked_text': 3}
+
+
+@dataclass(frozen=True)
+class AudioMedia:
+    rendition: object
+    uri: str
+    name: str = 'HLS Audio Media'
+    group_id: str = 'audio'
+    language: str = 'en'
+    is_default: bool = None
+    autoselect: bool = True
+
+
+@dataclass(frozen=True)
+class SubtitlesMedia:
+    rendition: object
+    uri: str
+    name: str = 'Subtitles'
+    group_id: str = 'SUBTITLE'
+    language: str = None
+    is_default: bool = False
+    autoselect: bool = True
+
+
+@dataclass(frozen=True)
+class VariantStream:
+    rendition: object
+    uri: str
+    audio: str = 'audio'
+    subtitles: str = None
+
+
+def default_hls_entries(snapshot, output_path, muxing_type='fmp4'):
+    """
+    One AudioMedia per AAC rendition and one VariantStream per video rendition of muxing_type,
+    plus the first chunked WebVTT muxing as subtitles. Audio renditions in separate directories
+    (see bmenc.offline.audio_tracks) are separate tracks named after their directory, e.g. main
+    and commentary; bitrates of one track are told apart by their bitrate.
+    """
+    audio, entries = [], []
+    for rendition in snapshot.renditions(muxing_type):
+        if rendition.stream.mode is not None and 'PER_TITLE_TEMPLATE' in rendition.stream.mode.value:
+            continue
+        if rendition.codec_type == sdk.CodecConfigType.AAC:
+            audio.append(rendition)
+        elif rendition.codec_config is not None:
+            entries.append(VariantStream(rendition, uri=_playlist_uri(rendition, output_path)))
+
+    tracks = audio_tracks(audio, output_path)
+    for track, renditions in tracks.items():
+        name = track.rpartition('/')[2] if len(tracks) > 1 else AudioMedia.name
+        for rendition in renditions:
+            entries.append(AudioMedia(
+                rendition, uri=_playlist_uri(rendition, output_path),
+                name=f'{name} {bitrate(rendition) / 1000:.0f}kbps' if len(renditions) > 1 else name
+            ))
+
+    subtitles = next(iter(snapshot.renditions('chunked_text')), None) if 'chunked_text' in snapshot.muxings else None
+    if subtitles is not None:
+        entries.append(SubtitlesMedia(subtitles, uri='subtitles.m3u8'))
+        entries = [
+            VariantStream(entry.rendition, entry.uri, entry.audio, subtitles='SUBTITLE')
+            if isinstance(entry, VariantStream) else entry for entry in entries
+        ]
+    return entries
+
+
+def write_hls(entries, output_path, duration=None, manifest_name=MANIFEST_NAME):
+    """
+    Return {path: text} with the master playlist and one media playlist per entry.
+    """
+    files = {}
+    versions = []
+    for entry in entries:
+        path = join_path(output_path, entry.uri)
+        if path in files or entry.uri == manifest_name:
+            raise Exception(f"Two playlists would be written to {entry.uri}")
+        layout = segment_layout(entry.rendition, output_path, duration)
+        version = _VERSIONS.get(entry.rendition.muxing_type, 3)
+        versions.append(version)
+        files[path] = media_playlist(layout, version)
+
+    files[join_path(output_path, manifest_name)] = master_playlist(entries, version=max(versions, default=3))
+    return files
+
+
+def master_playlist(entries, version=6):
+    lines = ['#EXTM3U', f'#EXT-X-VERSION:{version}', '#EXT-X-INDEPENDENT-SEGMENTS']
+
+    defaults = set()
+    for entry in entries:
+        if isinstance(entry, VariantStream):
+            continue
+        media_type = 'AUDIO' if isinstance(entry, AudioMedia) else 'SUBTITLES'
+        is_default = entry.is_default
+        if is_default is None:
+            is_default = (media_type, entry.group_id) not in defaults
+        if is_default:
+            defaults.add((media_type, entry.group_id))
+        attributes = [
+            f'TYPE={media_type}',
+            f'GROUP-ID="{entry.group_id}"',
+            f'LANGUAGE="{entry.language}"' if entry.language else None,
+            f'NAME="{entry.name}"',
+            f'DEFAULT={"YES" if is_default else "NO"}',
+            f'AUTOSELECT={"YES" if entry.autoselect else "NO"}',
+            f'URI="{entry.uri}"',
+        ]
+        lines.append('#EXT-X-MEDIA:' + ','.join(attribute for attribute in attributes if attribute))
+
+    audio = [entry for entry in entries if isinstance(entry, AudioMedia)]
+    for entry in entries:
+        if not isinstance(entry, VariantStream):
+            continue
+        group = [media for media in audio if media.group_id == entry.audio]
+        codec = entry.rendition.codec_config
+        bandwidth = bitrate(entry.rendition) + max((bitrate(media.rendition) for media in group), default=0)
+        codecs = [codec_string(entry.rendition)] + sorted({codec_string(media.rendition) for media in group})
+        attributes = [
+            f'BANDWIDTH={bandwidth}',
+            f'CODECS="{",".join(codecs)}"' if None not in codecs else None,
+            f'RESOLUTION={codec.width}x{codec.height}' if getattr(codec, 'width', None) and getattr(codec, 'height', None)
+            else None,
+            f'FRAME-RATE={codec.rate:.3f}' if getattr(codec, 'rate', None) else None,
+            f'AUDIO="{entry.audio}"' if group else None,
+            f'SUBTITLES="{entry.subtitles}"' if entry.subtitles else None,
+        ]
+        lines.append('#EXT-X-STREAM-INF:' + ','.join(attribute for attribute in attributes if attribute))
+        lines.append(entry.uri)
+    return '\n'.join(lines) + '\n'
+
+
+def media_playlist(layout, version=6):
+    lines = [
+        '#EXTM3U',
+        f'#EXT-X-VERSION:{version}',
+        f'#EXT-X-TARGETDURATION:{math.ceil(max(layout.durations))}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+        '#EXT-X-INDEPENDENT-SEGMENTS',
+    ]
+    if layout.init_segment:
+        lines.append(f'#EXT-X-MAP:URI="{layout.init_segment}"')
+    for path, duration in layout.segments():
+        lines.append(f'#EXTINF:{duration:.6f},')
+        lines.append(path)
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    run_main('Write the HLS playlists of a finished encoding without a manifest job.', _write_default)
+
+
+def _write_default(snapshot, output_path, duration, muxing_types):
+    return write_hls(default_hls_entries(snapshot, output_path, muxing_type=muxing_types[0]), output_path=output_path,
+                     duration=duration)
+
+
+def _playlist_uri(rendition, output_path):
+    return relative_path(rendition.output_path, output_path).replace('/', '_') + '.m3u8'
+
+
+if __name__ == '__main__':
+    main()
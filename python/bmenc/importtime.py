@@ -0,0 +1,159 @@
+"""
+Measure how long importing each bmenc module takes, from `python -X importtime` output.
+
+Every module is imported in a fresh interpreter with -X importtime; the report holds its
+cumulative import time, its heaviest direct dependencies and whether it pulled in
+bitmovin_api_sdk. The SDK itself is measured as reference. No bmenc module may import the SDK
+at import time (see bmenc.sdk): the exit status is 1 if one does, and, with --baseline, if a
+module became slower than the threshold allows compared to an earlier --json report.
+
+    python -m bmenc.importtime --json importtime.json
+    python -m bmenc.importtime --baseline importtime.json --threshold 0.5
+
+Import times are noisy; every module is measured --repeat times and the fastest run counts.
+"""
+import argparse
+import json
+import os
+import pkgutil
+import re
+import subprocess
+import sys
+
+import bmenc
+from bmenc.sdk import SDK_MODULE
+
+REPEAT = 5
+THRESHOLD = 0.5
+TOP = 3
+
+# e.g. "import time:       402 |      38204 |   bmenc.polling"
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def discover_modules():
+    return sorted(f'bmenc.{module.name}' for module in pkgutil.iter_modules(bmenc.__path__))
+
+
+def parse_importtime(stderr):
+    """
+    Turn -X importtime output into (module, self us, cumulative us, depth) tuples, in order.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            imports.append((module, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return imports
+
+
+def measure(module, repeat=REPEAT):
+    """
+    Import module in fresh interpreters and return the report entry of the fastest run.
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True, text=True, env=dict(os.environ, PYTHONWARNINGS='ignore')
+        )
+        if result.returncode != 0:
+            return {'module': module, 'us': None, 'sdk': None, 'heaviest': [],
+                    'error': result.stderr.strip().splitlines()[-1]}
+        entry = _entry(module, parse_importtime(result.stderr))
+        if best is None or entry['us'] < best['us']:
+            best = entry
+    return best
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Return one line per regression of results against a baseline report.
+    """
+    previous = {entry['module']: entry for entry in baseline['modules']}
+    regressions = []
+    for entry in results:
+        before = previous.get(entry['module'])
+        if before is None or entry['us'] is None or not before['us']:
+            continue
+        if entry['us'] > before['us'] * (1 + threshold):
+            regressions.append(f"{entry['module']}: {before['us'] / 1000:.1f}ms -> {entry['us'] / 1000:.1f}ms "
+                               f"(+{entry['us'] / before['us'] - 1:.0%})")
+    return regressions
+
+
+def print_report(results):
+    width = max(len(entry['module']) for entry in results)
+    print(f"{'module':<{width}} {'ms':>8}  sdk  heaviest imports")
+    for entry in results:
+        if entry['error']:
+            print(f"{entry['module']:<{width}} {'-':>8}  FAILED: {entry['error']}")
+            continue
+        heaviest = ', '.join(f"{name} {us / 1000:.1f}" for name, us in entry['heaviest'])
+        print(f"{entry['module']:<{width}} {entry['us'] / 1000:>8.1f}  {'yes' if entry['sdk'] else 'no ':<3}  {heaviest}")
+
+
+def _entry(module, imports):
+    """
+    Cumulative time of module and of its heaviest direct dependencies; imports the interpreter
+    did during startup (site, encodings) are not counted.
+    """
+    for index, (name, _, cumulative, depth) in enumerate(imports):
+        if name == module and depth == 0:
+            break
+    else:
+        raise Exception(f"{module} not found in the -X importtime output")
+
+    # Dependencies are listed before the module that imported them, one level deeper.
+    dependencies = []
+    for name, _, dependency_cumulative, dependency_depth in reversed(imports[:index]):
+        if dependency_depth == 0:
+            break
+        if dependency_depth == 1:
+            dependencies.append((name, dependency_cumulative))
+    return {
+        'module': module,
+        'us': cumulative,
+        'sdk': any(name == SDK_MODULE or name.startswith(SDK_MODULE + '.') for name, *_ in imports),
+        'heaviest': sorted(dependencies, key=lambda dependency: -dependency[1])[:TOP],
+        'error': None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import time of the bmenc modules.')
+    parser.add_argument('modules', nargs='*', help='modules to measure (default: all bmenc modules)')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='runs per module; the fastest counts')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='earlier --json report to compare against')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'allowed relative growth of import time (default {THRESHOLD})')
+    args = parser.parse_args()
+
+    modules = args.modules or discover_modules()
+    results = [measure(module, repeat=args.repeat) for module in modules]
+    reference = measure(SDK_MODULE, repeat=1)
+    print_report(results + [reference])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'modules': results, 'reference': reference}, f, indent=2)
+
+    eager = [entry['module'] for entry in results if entry['sdk'] and entry['module'] != 'bmenc.sdk']
+    for module in eager:
+        print(f"EAGER {module} imports {SDK_MODULE} at import time")
+    failed = bool(eager) or any(entry['error'] for entry in results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), threshold=args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        failed = failed or bool(regressions)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
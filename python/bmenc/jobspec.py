@@ -0,0 +1,254 @@
+"""
+Describe an encoding ladder as data instead of module constants.
+
+A job spec is a JSON (or, with PyYAML installed, YAML) document:
+
+    {
+      "name": "vod-h264-aac-fmp4-hls-dash",
+      "codec": "h264",
+      "cloud_region": "AWS_AP_NORTHEAST_1",
+      "preset": "VOD_HIGH_QUALITY",
+      "segment_length": 6,
+      "output_layout": {"video": "video/{height}p", "audio": "audio/{bitrate}"},
+      "video": [{"height": 1080, "bitrate": 6000000, "profile": "HIGH", "level": "L4"}],
+      "audio": [{"bitrate": 128000, "rate": 48000}]
+    }
+
+Enum fields use the member names of the SDK enums (CloudRegion, PresetConfiguration or
+Av1PresetConfiguration, ProfileH264/H265, LevelH264/H265, StreamMode). compile_plan() validates
+a spec once and turns it into an immutable JobPlan the VOD scripts consume; a script encodes one
+codec and rejects plans for another (check_codec). Plans are cached by
+the hash of the spec, so a scheduler that generates many variants of the same few ladders pays
+for validation only once per distinct spec.
+"""
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from bmenc import sdk
+
+PLAN_CACHE_SIZE = 4096
+
+_SPEC_FIELDS = {'name', 'codec', 'cloud_region', 'preset', 'segment_length', 'output_layout', 'video', 'audio'}
+_VIDEO_FIELDS = {'height', 'bitrate', 'profile', 'level', 'mode'}
+_AUDIO_FIELDS = {'bitrate', 'rate'}
+_LAYOUT_FIELDS = {'video', 'audio'}
+# output_layout field -> sample values of the placeholders its paths may use
+_LAYOUT_PLACEHOLDERS = {'video': {'height': 1080, 'bitrate': 4800000}, 'audio': {'bitrate': 128000, 'rate': 48000}}
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class VideoRendition:
+    height: int
+    bitrate: int
+    profile: object = None
+    level: object = None
+    mode: object = None
+
+
+@dataclass(frozen=True, slots=True)
+class AudioRendition:
+    bitrate: int
+    rate: int
+
+
+@dataclass(frozen=True, slots=True)
+class OutputLayout:
+    """
+    Muxing output paths relative to the output base path. Video paths may use {height} and
+    {bitrate}, audio paths {bitrate} and {rate}.
+    """
+    video: str = 'video/{height}p'
+    audio: str = 'audio/{bitrate}'
+
+    def video_path(self, output_base_path, rendition):
+        return output_base_path + self.video.format(height=rendition.height, bitrate=rendition.bitrate)
+
+    def audio_path(self, output_base_path, rendition):
+        return output_base_path + self.audio.format(bitrate=rendition.bitrate, rate=rendition.rate)
+
+
+@dataclass(frozen=True, slots=True)
+class JobPlan:
+    name: str
+    codec: str
+    codec_config_type: object
+    cloud_region: object
+    preset: object
+    segment_length: float
+    output_layout: OutputLayout
+    video: tuple
+    audio: tuple
+
+
+def load_spec(path):
+    """
+    Read a job spec from a .json, .yaml or .yml file.
+    """
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise Exception(f"PyYAML is required to read {path}; install it or use a JSON job spec")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def load_plan(path, expected_codec=None):
+    plan = compile_plan(load_spec(path))
+    if expected_codec is not None:
+        check_codec(plan, expected_codec)
+    return plan
+
+
+def check_codec(plan, codec):
+    """
+    Raise unless plan describes a ladder of codec.
+    """
+    if plan.codec != codec:
+        raise Exception(f"Job spec '{plan.name}' encodes {plan.codec}, this script encodes {codec}")
+
+
+def spec_hash(spec):
+    """
+    SHA-256 of the canonical JSON form of a spec; key order and whitespace do not matter.
+    """
+    canonical = json.dumps(spec, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def compile_plan(spec):
+    """
+    Validate a spec and return its JobPlan, reusing the plan of an identical earlier spec.
+    """
+    key = spec_hash(spec)
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+
+    plan = _compile(spec)
+    with _plans_lock:
+        _plans[key] = plan
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _compile(spec):
+    _check_fields(spec, _SPEC_FIELDS, 'job spec', required=('name', 'codec', 'video', 'audio'))
+
+    codecs = _codecs()
+    codec = spec['codec']
+    if codec not in codecs:
+        raise Exception(f"Unsupported codec '{codec}'. Valid codecs: {', '.join(codecs)}")
+    codec_config_type, profile_type, level_type, preset_type, default_preset = codecs[codec]
+
+    segment_length = spec.get('segment_length', 6)
+    if not isinstance(segment_length, (int, float)) or segment_length <= 0:
+        raise Exception(f"segment_length must be a positive number, got {segment_length!r}")
+
+    layout = spec.get('output_layout', {})
+    _check_fields(layout, _LAYOUT_FIELDS, 'output_layout')
+    for kind, fields in _LAYOUT_PLACEHOLDERS.items():
+        if kind in layout:
+            _check_layout(layout[kind], fields, f'output_layout.{kind}')
+    output_layout = OutputLayout(**layout)
+
+    video = []
+    for index, rendition in enumerate(spec['video']):
+        where = f'video[{index}]'
+        _check_fields(rendition, _VIDEO_FIELDS, where, required=('height', 'bitrate'))
+        if profile_type is None and (rendition.get('profile') or rendition.get('level')):
+            raise Exception(f"{where}: {codec} renditions take no profile or level")
+        video.append(VideoRendition(
+            height=_positive_int(rendition['height'], f'{where}.height'),
+            bitrate=_positive_int(rendition['bitrate'], f'{where}.bitrate'),
+            profile=_member(profile_type, rendition.get('profile'), f'{where}.profile'),
+            level=_member(level_type, rendition.get('level'), f'{where}.level'),
+            mode=_member(sdk.StreamMode, rendition.get('mode', 'STANDARD'), f'{where}.mode')
+        ))
+    if codec == 'h264' and any(rendition.profile is None for rendition in video):
+        raise Exception("Every h264 rendition needs a profile (HIGH, MAIN or BASELINE)")
+
+    audio = []
+    for index, rendition in enumerate(spec['audio']):
+        where = f'audio[{index}]'
+        _check_fields(rendition, _AUDIO_FIELDS, where, required=('bitrate', 'rate'))
+        audio.append(AudioRendition(
+            bitrate=_positive_int(rendition['bitrate'], f'{where}.bitrate'),
+            rate=_positive_int(rendition['rate'], f'{where}.rate')
+        ))
+
+    if not video and not audio:
+        raise Exception(f"Job spec '{spec['name']}' has no renditions")
+
+    return JobPlan(
+        name=spec['name'],
+        codec=codec,
+        codec_config_type=codec_config_type,
+        cloud_region=_member(sdk.CloudRegion, spec.get('cloud_region', 'AWS_AP_NORTHEAST_1'), 'cloud_region'),
+        preset=_member(preset_type, spec.get('preset', default_preset), 'preset'),
+        segment_length=segment_length,
+        output_layout=output_layout,
+        video=tuple(video),
+        audio=tuple(audio)
+    )
+
+
+@functools.cache
+def _codecs():
+    """
+    codec -> (codec config type, profile enum, level enum, preset enum, default preset)
+    """
+    return {
+        'h264': (sdk.CodecConfigType.H264, sdk.ProfileH264, sdk.LevelH264, sdk.PresetConfiguration, 'VOD_HIGH_QUALITY'),
+        'h265': (sdk.CodecConfigType.H265, sdk.ProfileH265, sdk.LevelH265, sdk.PresetConfiguration, 'VOD_HIGH_QUALITY'),
+        'av1': (sdk.CodecConfigType.AV1, None, None, sdk.Av1PresetConfiguration, 'VOD_QUALITY'),
+        'vp9': (sdk.CodecConfigType.VP9, None, None, sdk.PresetConfiguration, 'VOD_HIGH_QUALITY'),
+    }
+
+
+def _check_fields(value, allowed, where, required=()):
+    if not isinstance(value, dict):
+        raise Exception(f"{where} must be an object, got {type(value).__name__}")
+    unknown = set(value) - allowed
+    if unknown:
+        raise Exception(f"{where}: unknown field(s) {', '.join(sorted(unknown))}")
+    missing = [name for name in required if name not in value]
+    if missing:
+        raise Exception(f"{where}: missing field(s) {', '.join(missing)}")
+
+
+def _positive_int(value, where):
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise Exception(f"{where} must be a positive integer, got {value!r}")
+    return value
+
+
+def _check_layout(value, fields, where):
+    if not isinstance(value, str):
+        raise Exception(f"{where} must be a string, got {type(value).__name__}")
+    try:
+        value.format(**fields)
+    except KeyError as e:
+        raise Exception(f"{where}: unknown placeholder {{{e.args[0]}}}. Valid placeholders: {', '.join(fields)}")
+    except (IndexError, ValueError, AttributeError) as e:
+        raise Exception(f"{where}: invalid layout {value!r}: {e}")
+
+
+def _member(enum_type, name, where):
+    if name is None:
+        return None
+    try:
+        return enum_type[name]
+    except (KeyError, TypeError):
+        raise Exception(f"{where}: unknown value '{name}'. Valid values: {', '.join(enum_type.__members__)}")
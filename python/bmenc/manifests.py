@@ -0,0 +1,131 @@
+"""
+Generate all manifests of an encoding in one stage instead of one after the other.
+
+The scripts used to start the HLS manifest, poll it to the end, and only then start the DASH
+manifest and poll that one, so the time after the encode was the sum of both jobs.
+generate_manifests starts every manifest at once and watches them together on one
+StatusMultiplexer, so it takes as long as the slowest one:
+
+    generate_manifests(bitmovin_api, [('hls', hls_manifest), ('dash', dash_manifest)],
+                       on_generated=checkpoint.manifest_generated, schedule=MANIFEST_SCHEDULE)
+
+Any manifest kind the multiplexer can watch (hls, dash, smooth) can be mixed, several of the
+same kind included. A failing manifest does not cancel the others; its errors are printed and
+an exception naming every failed manifest is raised once all of them have ended. Status polls
+follow schedule (bmenc.polling.MANIFEST_SCHEDULE unless given). A start_manifest_request (e.g.
+StartManifestRequest(manifest_generator=ManifestGenerator.V2)) is sent with every start.
+
+When the streams and muxings are all known before the encoding starts, the manifests do not
+need a stage of their own: attach_manifests adds them to the StartEncodingRequest and the
+encoder writes them at the end of the job (manifest generator V2):
+
+    start_encoding_request = attach_manifests(StartEncodingRequest(), [('hls', hls_manifest), ...])
+"""
+import asyncio
+import functools
+
+from bmenc import sdk
+from bmenc.multiplexer import StatusMultiplexer
+from bmenc.polling import MANIFEST_SCHEDULE
+
+MAX_CONCURRENCY = 8
+
+# kind -> StartEncodingRequest attribute of the VOD manifests the encoder writes
+_ENCODER_MANIFESTS = {
+    'hls': 'vod_hls_manifests',
+    'dash': 'vod_dash_manifests',
+    'smooth': 'vod_smooth_manifests',
+}
+
+# kind -> (start endpoint, name in the console output)
+_START_CALLS = {
+    'hls': (lambda api: api.encoding.manifests.hls.start, 'HLS'),
+    'dash': (lambda api: api.encoding.manifests.dash.start, 'DASH'),
+    'smooth': (lambda api: api.encoding.manifests.smooth.start, 'Smooth'),
+}
+
+
+def generate_manifests(bitmovin_api, manifests, on_generated=None, schedule=MANIFEST_SCHEDULE,
+                       max_concurrency=MAX_CONCURRENCY, start_manifest_request=None):
+    """
+    Start every (kind, manifest) pair and wait until all of them have finished or failed.
+    on_generated(kind, manifest_id) is called for every manifest that finished.
+    """
+    manifests = list(manifests)
+    unknown = {kind for kind, _ in manifests} - set(_START_CALLS)
+    if unknown:
+        raise Exception(f"Unsupported manifest kinds: {sorted(unknown)}")
+    if not manifests:
+        return
+
+    results = asyncio.run(_generate(bitmovin_api, manifests, schedule, max_concurrency, start_manifest_request))
+
+    failed = []
+    for (kind, manifest), task in zip(manifests, results):
+        name = _START_CALLS[kind][1]
+        if isinstance(task, Exception):
+            print(f"{name} manifest {manifest.id} could not be generated: {task}")
+            failed.append(f"{name} manifest {manifest.id}")
+            continue
+        if task.status == sdk.Status.ERROR:
+            _log_task_errors(task)
+            failed.append(f"{name} manifest {manifest.id}")
+            continue
+        print(f"{name} Manifest creation finished successfully")
+        if on_generated is not None:
+            on_generated(kind, manifest.id)
+
+    if failed:
+        raise Exception(f"Manifest creation failed: {', '.join(failed)}")
+
+
+def attach_manifests(start_encoding_request, manifests):
+    """
+    Have the encoder write every (kind, manifest) pair as part of the encoding.
+    Returns start_encoding_request.
+    """
+    manifests = list(manifests)
+    unknown = {kind for kind, _ in manifests} - set(_ENCODER_MANIFESTS)
+    if unknown:
+        raise Exception(f"Unsupported manifest kinds: {sorted(unknown)}")
+
+    for kind, attribute in _ENCODER_MANIFESTS.items():
+        resources = [sdk.ManifestResource(manifest_id=manifest.id) for manifest_kind, manifest in manifests
+                     if manifest_kind == kind]
+        if resources:
+            setattr(start_encoding_request, attribute, (getattr(start_encoding_request, attribute) or []) + resources)
+    start_encoding_request.manifest_generator = sdk.ManifestGenerator.V2
+    return start_encoding_request
+
+
+async def _generate(bitmovin_api, manifests, schedule, max_concurrency, start_manifest_request):
+    """
+    The final task of every manifest, or the exception that ended it (a failed start, or too
+    many failed status requests in a row), in the order of manifests.
+    """
+    loop = asyncio.get_running_loop()
+    started = await asyncio.gather(*(
+        loop.run_in_executor(None, functools.partial(
+            _START_CALLS[kind][0](bitmovin_api), manifest_id=manifest.id,
+            start_manifest_request=start_manifest_request
+        ))
+        for kind, manifest in manifests
+    ), return_exceptions=True)
+
+    multiplexer = StatusMultiplexer(bitmovin_api, max_concurrency=max_concurrency, on_status=_print_status)
+    futures = [
+        start if isinstance(start, Exception) else multiplexer.watch(kind, manifest.id, schedule=schedule)
+        for (kind, manifest), start in zip(manifests, started)
+    ]
+    await multiplexer.run()
+    return [future if isinstance(future, Exception) else future.exception() or future.result() for future in futures]
+
+
+def _print_status(kind, manifest_id, task):
+    print(f"{_START_CALLS[kind][1]} manifest status is {task.status} (progress: {task.progress} %)")
+
+
+def _log_task_errors(task):
+    for message in task.messages or ():
+        if message.type == sdk.MessageType.ERROR:
+            print(message.text)
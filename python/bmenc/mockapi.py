@@ -0,0 +1,411 @@
+"""
+Local stand-in for the parts of the Bitmovin API the sample scripts use.
+
+MockApiServer answers the SDK's requests from memory: every POST to a collection creates a
+resource with a fresh id, GET returns it or lists a collection (offset/limit/name), and the
+action endpoints behave like the real ones as far as the scripts can tell:
+
+    POST   .../encodings/{id}/start, .../manifests/{hls,dash}/{id}/start, /encoding/templates/start
+    GET    .../{id}/status         steps through a configurable status progression per call
+    POST   .../encodings/{id}/live/start, .../live/stop
+    GET    .../encodings/{id}/live, .../encodings/{id}/start, /encoding/configurations/{id}/type
+
+Every call can be delayed by a fixed latency or by a function of (method, route), a quota
+answers calls beyond a rate with 429 and a Retry-After header, and every call is recorded with its route, sizes and duration, so a script's runtime and call count can
+be measured offline and deterministically. Nothing is encoded; status progressions advance
+per status request, not with time.
+
+    with MockApiServer(latency=0.05) as server:
+        script = load_script('vod/create_vod_h264_aac_fmp4_hls_dash.py')
+        use_mock_api(script, server, cache_dir=tempfile.mkdtemp())
+        script.main()
+        print(server.call_counts())
+
+Run it standalone with `python -m bmenc.mockapi --port 8090 --latency 0.05` and point a
+BitmovinApi(api_key='mock', base_url='http://127.0.0.1:8090/v1') at it.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from bmenc import sdk
+from bmenc.codec_configs import CodecConfigCache
+from bmenc.storage import StorageRegistry
+from bmenc.ratelimit import TokenBucket, use_scheduler
+from bmenc.transport import use_session
+
+BASE_PATH = '/v1'
+
+# (status, progress) returned by consecutive status calls once a job was started; the last
+# entry repeats.
+ENCODING_PROGRESSION = (('QUEUED', 0), ('RUNNING', 25), ('RUNNING', 75), ('FINISHED', 100))
+MANIFEST_PROGRESSION = (('RUNNING', 50), ('FINISHED', 100))
+
+_ID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+
+@dataclass(frozen=True)
+class Call:
+    """
+    One request the server answered. route is the path with ids replaced by {id}; started_at
+    is a time.monotonic() value.
+    """
+    method: str
+    route: str
+    status: int
+    request_bytes: int
+    response_bytes: int
+    started_at: float
+    seconds: float
+
+
+class MockApiServer:
+    """
+    Background HTTP server holding the resources created through it.
+
+    latency        seconds added to every call, or a function (method, route) -> seconds
+    progressions   {'encoding': ..., 'manifest': ...} overriding the default status progressions
+    ssl_context    serve HTTPS with this server-side context
+    quota          requests per second (and burst) served before answering 429; Retry-After
+                   is fractional seconds, which bmenc.ratelimit accepts
+
+    Connections are kept alive (HTTP/1.1); connections counts the ones accepted so far, i.e. the
+    TCP connects and, with TLS, handshakes clients paid for.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, progressions=None, ssl_context=None, quota=None):
+        self._latency = latency if callable(latency) else (lambda method, route: latency)
+        self._quota = TokenBucket(quota, quota) if quota else None
+        self._progressions = {'encoding': ENCODING_PROGRESSION, 'manifest': MANIFEST_PROGRESSION}
+        self._progressions.update(progressions or {})
+        self._lock = threading.Lock()
+        self._resources = {}
+        self._paths_by_id = {}
+        self._tasks = {}
+        self._start_requests = {}
+        self._live = {}
+        self._calls = []
+        self.connections = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._scheme = 'http'
+        if ssl_context is not None:
+            self._server.socket = ssl_context.wrap_socket(self._server.socket, server_side=True)
+            self._scheme = 'https'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+        # The RTMP scripts use the account's predefined RTMP input.
+        self._create('/encoding/inputs/rtmp', {'name': 'Mock RTMP Input', 'type': 'RTMP'})
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        return f'{self._scheme}://{self._server.server_address[0]}:{self.port}{BASE_PATH}'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def client(self):
+        return sdk.BitmovinApi(api_key='mock', base_url=self.url)
+
+    @property
+    def calls(self):
+        with self._lock:
+            return list(self._calls)
+
+    def reset_calls(self):
+        with self._lock:
+            self._calls.clear()
+
+    def call_counts(self):
+        """
+        Number of calls per 'METHOD route'.
+        """
+        return Counter(f'{call.method} {call.route}' for call in self.calls)
+
+    def _handle(self, method, raw_path, body):
+        """
+        Return (HTTP status, response object) for one request.
+        """
+        split = urlsplit(raw_path)
+        path = split.path[len(BASE_PATH):] if split.path.startswith(BASE_PATH) else split.path
+        path = '/' + path.strip('/')
+        query = {name: values[-1] for name, values in parse_qs(split.query).items()}
+        segments = path.strip('/').split('/')
+
+        with self._lock:
+            if method == 'POST' and path == '/encoding/templates/start':
+                return 200, {'encodingId': self._start_template(body)}
+
+            if len(segments) >= 2 and segments[-1] in ('start', 'stop'):
+                owner_path = '/' + '/'.join(segments[:-2] if segments[-2] == 'live' else segments[:-1])
+                owner = self._resources.get(owner_path)
+                if owner is not None:
+                    return self._action(method, owner, segments[-2] == 'live', segments[-1], body)
+
+            if method == 'GET' and segments[-1] in ('status', 'live', 'type'):
+                return self._status_or_details(segments)
+
+            if method == 'POST':
+                return 201, self._create(path, body or {})
+            if method == 'GET':
+                if path in self._resources:
+                    return 200, self._resources[path]
+                if segments[:-1] == ['encoding', 'outputs'] and segments[-1] in self._paths_by_id:
+                    # outputs can also be read without their type, e.g. to resume a run
+                    output_path = self._paths_by_id[segments[-1]]
+                    return 200, dict(self._resources[output_path], type=output_path.rsplit('/', 2)[1].upper())
+                if _ID_PATTERN.match(segments[-1]):
+                    return 404, None
+                return 200, self._list(path, query)
+            if method == 'DELETE' and path in self._resources:
+                resource = self._resources.pop(path)
+                self._paths_by_id.pop(resource['id'], None)
+                return 200, {'id': resource['id']}
+            return 404, None
+
+    def _create(self, collection, body):
+        resource = dict(body, id=str(uuid.uuid4()), createdAt=_now())
+        path = f"{collection}/{resource['id']}"
+        self._resources[path] = resource
+        self._paths_by_id[resource['id']] = path
+        return resource
+
+    def _list(self, collection, query):
+        items = [
+            resource for path, resource in self._resources.items()
+            if path.rsplit('/', 1)[0] == collection and ('name' not in query or resource.get('name') == query['name'])
+        ]
+        offset = int(query.get('offset', 0))
+        limit = int(query.get('limit', 25))
+        return {'totalCount': len(items), 'offset': offset, 'limit': limit, 'items': items[offset:offset + limit]}
+
+    def _action(self, method, owner, live, action, body):
+        owner_id = owner['id']
+        is_manifest = '/manifests/' in self._paths_by_id[owner_id]
+        if method == 'GET' and action == 'start' and not live:
+            if owner_id not in self._start_requests:
+                return 404, None
+            return 200, self._start_requests[owner_id]
+        if method != 'POST':
+            return 404, None
+
+        if live:
+            self._tasks[owner_id] = [(('RUNNING', 0),) if action == 'start' else (('FINISHED', 100),), 0]
+            if action == 'start':
+                self._start_requests[owner_id] = body or {}
+                self._live[owner_id] = {
+                    'encoderIp': '127.0.0.1',
+                    'streamKey': (body or {}).get('streamKey'),
+                    'application': 'live'
+                }
+            return 200, {'id': owner_id}
+
+        if action == 'start':
+            self._start_requests[owner_id] = body or {}
+            self._tasks[owner_id] = [self._progressions['manifest' if is_manifest else 'encoding'], 0]
+        else:
+            self._tasks[owner_id] = [(('CANCELED', 0),), 0]
+        return 200, {'id': owner_id}
+
+    def _status_or_details(self, segments):
+        resource_id = segments[-2]
+        if resource_id not in self._paths_by_id:
+            return 404, None
+
+        if segments[-1] == 'type':
+            return 200, {'type': self._paths_by_id[resource_id].rsplit('/', 2)[1].upper()}
+
+        if segments[-1] == 'live':
+            if resource_id not in self._live:
+                return 404, None
+            return 200, self._live[resource_id]
+
+        if resource_id not in self._tasks:
+            return 200, {'status': 'CREATED', 'progress': 0, 'messages': []}
+        task = self._tasks[resource_id]
+        progression, index = task
+        status, progress = progression[index]
+        task[1] = min(index + 1, len(progression) - 1)
+        messages = [{'type': 'ERROR', 'text': 'Mock job failed'}] if status == 'ERROR' else []
+        return 200, {'status': status, 'progress': progress, 'messages': messages}
+
+    def _start_template(self, document):
+        """
+        Create the encoding, streams and muxings an Encoding Template describes and start it.
+        """
+        encoding_key, encoding = next(iter(document['encodings'].items()))
+        created = self._create('/encoding/encodings', encoding.get('properties', {}))
+        encoding_path = f"/encoding/encodings/{created['id']}"
+
+        stream_ids = {}
+        for key, stream in encoding.get('streams', {}).items():
+            stream_ids[f'$/encodings/{encoding_key}/streams/{key}'] = \
+                self._create(f'{encoding_path}/streams', stream['properties'])['id']
+        for muxing_type, muxings in encoding.get('muxings', {}).items():
+            for muxing in muxings.values():
+                properties = dict(muxing['properties'])
+                properties['streams'] = [
+                    dict(muxing_stream, streamId=stream_ids.get(muxing_stream['streamId'], muxing_stream['streamId']))
+                    for muxing_stream in properties.get('streams', [])
+                ]
+                self._create(f'{encoding_path}/muxings/{muxing_type}', properties)
+
+        self._start_requests[created['id']] = encoding.get('start', {}).get('properties', {})
+        self._tasks[created['id']] = [self._progressions['encoding'], 0]
+        return created['id']
+
+    @staticmethod
+    def _route(raw_path):
+        path = urlsplit(raw_path).path
+        path = path[len(BASE_PATH):] if path.startswith(BASE_PATH) else path
+        return '/'.join('{id}' if _ID_PATTERN.match(segment) else segment for segment in path.split('/'))
+
+    def _throttle(self):
+        """
+        None if the call is within the quota, else the seconds the client should wait.
+        """
+        if self._quota is None:
+            return None
+        with self._lock:
+            delay = self._quota.delay()
+            if delay > 0:
+                return delay
+            self._quota.take()
+            return None
+
+    def _record(self, call):
+        with self._lock:
+            self._calls.append(call)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one segment; separate writes on a kept-alive connection
+            # stall on delayed ACKs.
+            wbufsize = -1
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PUT(self):
+                self._dispatch('PUT')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+            def _dispatch(self, method):
+                started_at = time.monotonic()
+                length = int(self.headers.get('Content-Length') or 0)
+                raw_body = self.rfile.read(length) if length else b''
+                route = server._route(self.path)
+                time.sleep(server._latency(method, route))
+
+                retry_after = server._throttle()
+                try:
+                    body = json.loads(raw_body) if raw_body else None
+                except ValueError:
+                    status, result = 400, None
+                else:
+                    if retry_after is not None:
+                        status, result = 429, None
+                    else:
+                        status, result = server._handle(method, self.path, body)
+
+                if result is None:
+                    envelope = {'requestId': str(uuid.uuid4()), 'status': 'ERROR',
+                                'data': {'code': status, 'message': f'{method} {route} failed'}}
+                else:
+                    envelope = {'requestId': str(uuid.uuid4()), 'status': 'SUCCESS', 'data': {'result': result}}
+                payload = json.dumps(envelope).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                if retry_after is not None:
+                    self.send_header('Retry-After', f'{retry_after:.3f}')
+                self.end_headers()
+                self.wfile.write(payload)
+                server._record(Call(
+                    method, route, status, len(raw_body), len(payload), started_at, time.monotonic() - started_at))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def use_mock_api(script, server, cache_dir):
+    """
+    Point a script loaded with bmenc.batch.load_script at the server, with the same pooled
+    session and request scheduler the scripts use. The codec configuration and storage caches are moved to cache_dir,
+    so the user's caches neither answer nor record anything.
+    """
+    bitmovin_api = use_scheduler(use_session(server.client()))
+    script.bitmovin_api = bitmovin_api
+    if hasattr(script, 'codec_configs'):
+        script.codec_configs = CodecConfigCache(bitmovin_api, path=os.path.join(cache_dir, 'codec_configs.json'))
+    if hasattr(script, 'storage'):
+        script.storage = StorageRegistry(bitmovin_api, path=os.path.join(cache_dir, 'storage.json'))
+    return bitmovin_api
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the Bitmovin API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every call')
+    parser.add_argument('--quota', type=float, help='requests per second before answering 429')
+    args = parser.parse_args()
+
+    server = MockApiServer(host=args.host, port=args.port, latency=args.latency, quota=args.quota)
+    with server:
+        print(f"Mock Bitmovin API listening on {server.url} (Ctrl-C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+    for route, count in sorted(server.call_counts().items()):
+        print(f"{count:6d}  {route}")
+
+
+if __name__ == '__main__':
+    main()
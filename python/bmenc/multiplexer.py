@@ -0,0 +1,153 @@
+"""
+Watch many encodings and manifest generation jobs from a single asyncio event loop.
+
+Each watched job gets a future that resolves with its final task once the API reports FINISHED
+or ERROR. Due polls are coalesced into rounds and sent with bounded concurrency, and every job is
+rescheduled with the same progress-based estimator the blocking waiters use.
+
+Example:
+
+    async def supervise(encoding_ids):
+        multiplexer = StatusMultiplexer(bitmovin_api, max_concurrency=16)
+        futures = [multiplexer.watch_encoding(encoding_id) for encoding_id in encoding_ids]
+        await multiplexer.run()
+        return [future.result() for future in futures]
+"""
+import asyncio
+import functools
+
+from bmenc import sdk
+
+from bmenc.polling import ProgressEstimator, ENCODING_SCHEDULE, MANIFEST_SCHEDULE
+
+# kind -> (status endpoint, id keyword, schedule)
+_STATUS_CALLS = {
+    'encoding': (lambda api: api.encoding.encodings.status, 'encoding_id', ENCODING_SCHEDULE),
+    'hls': (lambda api: api.encoding.manifests.hls.status, 'manifest_id', MANIFEST_SCHEDULE),
+    'dash': (lambda api: api.encoding.manifests.dash.status, 'manifest_id', MANIFEST_SCHEDULE),
+    'smooth': (lambda api: api.encoding.manifests.smooth.status, 'manifest_id', MANIFEST_SCHEDULE),
+}
+
+
+class _Job:
+    __slots__ = ('kind', 'resource_id', 'future', 'estimator', 'due', 'failures')
+
+    def __init__(self, kind, resource_id, future, estimator, due):
+        self.kind = kind
+        self.resource_id = resource_id
+        self.future = future
+        self.estimator = estimator
+        self.due = due
+        self.failures = 0
+
+
+class StatusMultiplexer:
+    """
+    Polls the status of any number of jobs with at most max_concurrency requests in flight.
+    on_status(kind, resource_id, task) is called with every status the API returns.
+    """
+
+    def __init__(self, bitmovin_api, max_concurrency=16, max_failures=5, executor=None, on_status=None):
+        self._bitmovin_api = bitmovin_api
+        self._on_status = on_status
+        self._max_concurrency = max_concurrency
+        self._max_failures = max_failures
+        self._executor = executor
+        self._jobs = {}
+        self._wakeup = None
+        self._stopped = False
+
+    @property
+    def pending(self):
+        return len(self._jobs)
+
+    def watch_encoding(self, encoding_id):
+        return self.watch('encoding', encoding_id)
+
+    def watch_hls_manifest(self, manifest_id):
+        return self.watch('hls', manifest_id)
+
+    def watch_dash_manifest(self, manifest_id):
+        return self.watch('dash', manifest_id)
+
+    def watch(self, kind, resource_id, schedule=None):
+        """
+        Return a future for the final task of the given job. Watching the same job twice
+        returns the same future. schedule overrides the default PollSchedule of the kind.
+        Must be called from within the running event loop.
+        """
+        if kind not in _STATUS_CALLS:
+            raise Exception(f"Unknown job kind '{kind}'. Valid kinds: {', '.join(_STATUS_CALLS)}")
+
+        key = (kind, resource_id)
+        job = self._jobs.get(key)
+        if job is None:
+            loop = asyncio.get_running_loop()
+            estimator = ProgressEstimator(schedule or _STATUS_CALLS[kind][2], clock=loop.time)
+            job = _Job(kind, resource_id, loop.create_future(), estimator, loop.time() + estimator.first_delay())
+            self._jobs[key] = job
+            self._wake()
+        return job.future
+
+    def stop(self):
+        self._stopped = True
+        self._wake()
+
+    async def run(self, stop_when_idle=True):
+        """
+        Poll until every watched job is resolved, or, with stop_when_idle=False, until stop() is called.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+
+        while not self._stopped and (self._jobs or not stop_when_idle):
+            now = loop.time()
+            due = [job for job in self._jobs.values() if job.due <= now]
+            if due:
+                await asyncio.gather(*(self._poll(loop, semaphore, job) for job in due))
+                continue
+
+            timeout = min(job.due for job in self._jobs.values()) - now if self._jobs else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _poll(self, loop, semaphore, job):
+        status_call, id_keyword, _ = _STATUS_CALLS[job.kind]
+        fetch = functools.partial(status_call(self._bitmovin_api), **{id_keyword: job.resource_id})
+
+        async with semaphore:
+            try:
+                task = await loop.run_in_executor(self._executor, fetch)
+            except Exception as e:
+                job.failures += 1
+                if job.failures >= self._max_failures:
+                    self._resolve(job, exception=e)
+                else:
+                    job.due = loop.time() + job.estimator.next_delay(None)
+                return
+
+        job.failures = 0
+        if self._on_status is not None:
+            self._on_status(job.kind, job.resource_id, task)
+        if task.status in (sdk.Status.FINISHED, sdk.Status.ERROR):
+            self._resolve(job, task=task)
+        else:
+            job.due = loop.time() + job.estimator.next_delay(task.progress)
+
+    def _resolve(self, job, task=None, exception=None):
+        del self._jobs[(job.kind, job.resource_id)]
+        if job.future.done():
+            return
+        if exception is not None:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(task)
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
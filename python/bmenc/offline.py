@@ -0,0 +1,242 @@
+"""
+What the offline manifest writers (bmenc.hls, bmenc.dash) share: the segment layout of a muxing,
+what a rendition is announced with (bitrate, codec string), the upload of the files they write
+and their command line.
+
+A muxing with a fixed segment_length, a segment_naming with %number% and, for fMP4, an
+init_segment_name writes a predictable list of files. Once the encoding has finished its
+segments_muxed says how many there are; every segment is segment_length seconds long except
+the last, which ends with the input. That is all a playlist or MPD needs, so manifests can be
+written locally from an EncodingSnapshot instead of by a manifest job on the API.
+
+The written files ({path: text}, paths including the output base path) are uploaded together:
+
+    upload_files(files, S3Bucket(S3_OUTPUT_BUCKET_NAME, S3_OUTPUT_ACCESS_KEY, S3_OUTPUT_SECRET_KEY))
+    upload_files(files, LocalDirectory('manifests/'))
+"""
+import argparse
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from bmenc import sdk
+from bmenc.ratelimit import use_scheduler
+from bmenc.snapshot import load_encoding_snapshot
+from bmenc.transport import use_session
+
+MAX_WORKERS = 8
+
+# H.264 profile -> profile_idc of the RFC 6381 codec string
+_H264_PROFILES = {'BASELINE': 66, 'MAIN': 77, 'HIGH': 100, 'HIGH422': 122}
+
+_CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.mpd': 'application/dash+xml',
+}
+
+
+@dataclass(frozen=True)
+class SegmentLayout:
+    """
+    Files of one muxing, relative to the manifest. init_segment_name is None for muxings
+    without an init segment (TS, chunked text).
+    """
+    path: str
+    segment_naming: str
+    init_segment_name: str
+    segment_length: float
+    durations: tuple
+
+    @property
+    def init_segment(self):
+        return join_path(self.path, self.init_segment_name) if self.init_segment_name else None
+
+    @property
+    def duration(self):
+        return sum(self.durations)
+
+    def segment(self, number):
+        return join_path(self.path, self.segment_naming.replace('%number%', str(number)))
+
+    def segments(self):
+        """
+        Yield (path, duration) of every segment, numbered from 0 like the encoder does.
+        """
+        for number, duration in enumerate(self.durations):
+            yield self.segment(number), duration
+
+
+def segment_layout(rendition, output_path, duration=None):
+    """
+    Segment layout of a rendition's muxing. duration is the length of the input in seconds; it is
+    needed for the length of the last segment, and for the segment count of a muxing the API
+    reports no segments_muxed for.
+    """
+    muxing = rendition.muxing
+    if not muxing.segment_length or not muxing.segment_naming or '%number%' not in muxing.segment_naming:
+        raise Exception(f"Muxing {muxing.id} has no fixed segment length and %number% segment naming")
+
+    segment_length = muxing.segment_length
+    if muxing.segments_muxed:
+        count = muxing.segments_muxed
+    elif duration:
+        # a float error must not add an empty segment, e.g. 60.000000001 / 6
+        count = math.ceil(round(duration / segment_length, 6))
+    else:
+        raise Exception(f"Muxing {muxing.id} reports no segments; the input duration is needed")
+
+    last = duration - (count - 1) * segment_length if duration else segment_length
+    if last <= 0:
+        last = segment_length
+    return SegmentLayout(
+        path=relative_path(rendition.output_path, output_path),
+        segment_naming=muxing.segment_naming,
+        init_segment_name=getattr(muxing, 'init_segment_name', None),
+        segment_length=segment_length,
+        durations=(float(segment_length),) * (count - 1) + (float(last),)
+    )
+
+
+def input_duration(bitmovin_api, snapshot):
+    """
+    Duration of the input in seconds as the encoder analysed it, or None if it is not known.
+    """
+    for stream_id in snapshot.streams:
+        details = bitmovin_api.encoding.encodings.streams.input.get(
+            encoding_id=snapshot.encoding_id, stream_id=stream_id)
+        if details is not None and details.duration:
+            return details.duration
+    return None
+
+
+def bitrate(rendition):
+    """
+    Peak bitrate the encoder measured for the muxing, else the configured bitrate.
+    """
+    muxing = rendition.muxing
+    return muxing.max_bitrate or muxing.avg_bitrate or getattr(rendition.codec_config, 'bitrate', 0) or 0
+
+
+def codec_string(rendition):
+    """
+    RFC 6381 codec string, or None where the snapshot does not tell it exactly.
+    """
+    if rendition.codec_type == sdk.CodecConfigType.AAC:
+        return 'mp4a.40.2'
+    if rendition.codec_type == sdk.CodecConfigType.H264:
+        codec = rendition.codec_config
+        profile = _H264_PROFILES.get(codec.profile.value if codec.profile else None)
+        level = codec.level.value if codec.level else None
+        if profile and level and level.replace('.', '').isdigit():
+            return f'avc1.{profile:02X}00{round(float(level) * 10):02X}'
+    return None
+
+
+def audio_tracks(renditions, output_path):
+    """
+    Group audio renditions into tracks by the directory above their own: audio/main/128000 and
+    audio/commentary/128000 are two tracks, audio/64000 and audio/128000 two bitrates of one.
+    Returns {track directory: [renditions]} in the order of renditions.
+    """
+    tracks = {}
+    for rendition in renditions:
+        track = relative_path(rendition.output_path, output_path).rpartition('/')[0]
+        tracks.setdefault(track, []).append(rendition)
+    return tracks
+
+
+def relative_path(path, output_path):
+    path = path[len(output_path):] if path.startswith(output_path) else path
+    return path.strip('/')
+
+
+def join_path(*parts):
+    return '/'.join(part.strip('/') for part in parts if part)
+
+
+class LocalDirectory:
+    """
+    Upload destination writing the files below root.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def __call__(self, path, content, content_type):
+        target = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+class S3Bucket:
+    """
+    Upload destination putting the files into an S3 bucket (needs boto3).
+    """
+
+    def __init__(self, bucket_name, access_key=None, secret_key=None, acl='public-read'):
+        try:
+            import boto3
+        except ImportError:
+            raise Exception("boto3 is required to upload to S3; install it or write to a LocalDirectory")
+        self.bucket_name = bucket_name
+        self.acl = acl
+        self._client = boto3.client('s3', aws_access_key_id=access_key, aws_secret_access_key=secret_key)
+
+    def __call__(self, path, content, content_type):
+        arguments = {'ACL': self.acl} if self.acl else {}
+        self._client.put_object(Bucket=self.bucket_name, Key=path, Body=content.encode('utf-8'),
+                                ContentType=content_type, **arguments)
+
+
+def upload_files(files, destination, max_workers=MAX_WORKERS):
+    """
+    Upload every {path: text} file to destination at once.
+    """
+    def upload(item):
+        path, content = item
+        destination(path, content, _CONTENT_TYPES.get(os.path.splitext(path)[1], 'text/plain'))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(upload, files.items()))
+
+
+def run_main(description, write):
+    """
+    Command line of an offline writer: load the snapshot of a finished encoding, write its files
+    with write(snapshot, output_path, duration, muxing_types) and upload them.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('encoding_id')
+    parser.add_argument('--output-base-path', required=True, help='output base path the encoding was created with')
+    parser.add_argument('--muxing-types', default='fmp4', help='comma separated, e.g. fmp4,chunked_text')
+    parser.add_argument('--duration', type=float, help='input duration in seconds (default: as the encoder analysed it)')
+    parser.add_argument('--directory', help='write the files below this local directory')
+    parser.add_argument('--s3-bucket', help='upload the files to this S3 bucket (needs boto3)')
+    parser.add_argument('--s3-access-key')
+    parser.add_argument('--s3-secret-key')
+    parser.add_argument('--api-key', default=os.environ.get('BITMOVIN_API_KEY'),
+                        help='API key (default: $BITMOVIN_API_KEY)')
+    parser.add_argument('--org-id', default=os.environ.get('BITMOVIN_ORG_ID'),
+                        help='tenant organization id (default: $BITMOVIN_ORG_ID)')
+    parser.add_argument('--base-url', help='API base URL, e.g. of a bmenc.mockapi server')
+    args = parser.parse_args()
+    if bool(args.directory) == bool(args.s3_bucket):
+        parser.error('give either --directory or --s3-bucket')
+    if not args.api_key:
+        parser.error('an API key is required (--api-key or BITMOVIN_API_KEY)')
+
+    arguments = {'base_url': args.base_url} if args.base_url else {}
+    bitmovin_api = use_scheduler(use_session(
+        sdk.BitmovinApi(api_key=args.api_key, tenant_org_id=args.org_id, **arguments)))
+    muxing_types = args.muxing_types.split(',')
+    snapshot = load_encoding_snapshot(bitmovin_api, encoding_id=args.encoding_id, muxing_types=muxing_types)
+    duration = args.duration or input_duration(bitmovin_api, snapshot)
+
+    files = write(snapshot, args.output_base_path, duration, muxing_types)
+    destination = LocalDirectory(args.directory) if args.directory else \
+        S3Bucket(args.s3_bucket, access_key=args.s3_access_key, secret_key=args.s3_secret_key)
+    upload_files(files, destination)
+    for path in sorted(files):
+        print(path)
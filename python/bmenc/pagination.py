@@ -0,0 +1,48 @@
+"""
+Lazy iteration over every item of a paginated list endpoint.
+
+A list call of the SDK returns one page only (25 items unless a limit is given), so looping over
+list(...).items silently stops at the first page. iter_items() walks all pages by offset and
+limit and, while the caller works through one page, already fetches the next in the background.
+At most two pages are held at a time, and a caller that stops early (e.g. after finding what it
+searched for) leaves the remaining pages unrequested:
+
+    for muxing in iter_items(bitmovin_api.encoding.encodings.muxings.fmp4.list,
+                             sdk.Fmp4MuxingListQueryParams, encoding_id=encoding_id):
+        ...
+
+Filters of the endpoint (e.g. name) go into filters and are sent with every page.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 100
+
+
+def iter_pages(list_fn, query_params_type, filters=None, page_size=PAGE_SIZE, prefetch=True, **arguments):
+    """
+    Yield every page of list_fn; arguments (e.g. encoding_id) are passed to each call.
+    """
+    def fetch(offset):
+        query_params = query_params_type(offset=offset, limit=page_size, **(filters or {}))
+        return list_fn(query_params=query_params, **arguments)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        offset = 0
+        page = fetch(offset)
+        while True:
+            offset += len(page.items)
+            more = bool(page.items) and offset < (page.total_count or 0)
+            upcoming = executor.submit(fetch, offset) if more and prefetch else None
+            yield page
+            if not more:
+                return
+            page = upcoming.result() if upcoming is not None else fetch(offset)
+
+
+def iter_items(list_fn, query_params_type, filters=None, page_size=PAGE_SIZE, prefetch=True, **arguments):
+    """
+    Yield every item of list_fn, page after page.
+    """
+    for page in iter_pages(list_fn, query_params_type, filters=filters, page_size=page_size, prefetch=prefetch,
+                           **arguments):
+        yield from page.items
@@ -0,0 +1,105 @@
+"""
+Adaptive status polling for encodings and manifest generation jobs.
+
+Instead of sleeping a fixed 5 seconds before every status call, the next poll is scheduled from
+the progress the API reports: short jobs (manifests) are checked quickly at first, long
+encodings are checked sparsely while they are far from done and more often as they approach
+100 %. Every delay is jittered and capped.
+"""
+import random
+import time
+from dataclasses import dataclass
+
+from bmenc import sdk
+
+
+@dataclass(frozen=True)
+class PollSchedule:
+    """
+    Tuning knobs for poll_task.
+
+    initial_delay   delay before the first status call
+    min_interval    lower bound for any delay
+    max_interval    hard cap for any delay, jitter included
+    backoff         growth factor while no progress can be measured yet
+    remaining_share fraction of the estimated remaining time to wait once progress is known
+    jitter          relative random spread applied to every delay
+    timeout         give up after this many seconds (None waits forever)
+    """
+    initial_delay: float
+    min_interval: float
+    max_interval: float
+    backoff: float = 1.5
+    remaining_share: float = 0.25
+    jitter: float = 0.1
+    timeout: float = None
+
+
+# Encodings take minutes to hours, so there is no point in asking before a few seconds passed.
+ENCODING_SCHEDULE = PollSchedule(initial_delay=3, min_interval=2, max_interval=60)
+
+# Manifest generation usually finishes within a few seconds.
+MANIFEST_SCHEDULE = PollSchedule(initial_delay=0.5, min_interval=0.5, max_interval=10)
+
+
+class ProgressEstimator:
+    """
+    Turns a series of (time, progress) observations into the delay until the next poll.
+    """
+
+    def __init__(self, schedule, clock=time.monotonic, rng=random.random):
+        self.schedule = schedule
+        self._clock = clock
+        self._rng = rng
+        self._started_at = clock()
+        self._first_progress = None
+        self._delay = schedule.initial_delay
+
+    @property
+    def elapsed(self):
+        return self._clock() - self._started_at
+
+    def first_delay(self):
+        return self._finish(self.schedule.initial_delay)
+
+    def next_delay(self, progress):
+        """
+        Estimate the time left from the progress rate observed so far and wait a share of it.
+        Until the job reports progress, back off geometrically from the initial delay.
+        """
+        now = self._clock()
+        if progress and progress > 0:
+            if self._first_progress is None or progress < self._first_progress[1]:
+                self._first_progress = (now, progress)
+            started_at, started_progress = self._first_progress
+            if progress > started_progress and now > started_at:
+                rate = (progress - started_progress) / (now - started_at)
+                remaining = (100 - progress) / rate
+                return self._finish(remaining * self.schedule.remaining_share)
+
+        self._delay = self._delay * self.schedule.backoff
+        return self._finish(self._delay)
+
+    def _finish(self, delay):
+        spread = self.schedule.jitter * (2 * self._rng() - 1)
+        delay = delay * (1 + spread)
+        return min(max(delay, self.schedule.min_interval), self.schedule.max_interval)
+
+
+def poll_task(fetch_status, schedule, sleep=time.sleep, clock=time.monotonic):
+    """
+    Call fetch_status until it returns a task in status FINISHED or ERROR and return that task.
+    Raises an Exception once the schedule's timeout has passed.
+    """
+    estimator = ProgressEstimator(schedule, clock=clock)
+    sleep(estimator.first_delay())
+
+    while True:
+        task = fetch_status()
+        if task.status in (sdk.Status.FINISHED, sdk.Status.ERROR):
+            return task
+
+        if schedule.timeout is not None and estimator.elapsed > schedule.timeout:
+            raise Exception(f"Task did not finish within {schedule.timeout} seconds (last status {task.status})")
+
+        sleep(estimator.next_delay(task.progress))
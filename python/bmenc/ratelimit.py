@@ -0,0 +1,234 @@
+"""
+Meter all requests of a BitmovinApi through one token bucket and retry rate-limited ones.
+
+Without this, parallel chains, batch titles and pollers send as fast as they can, run into
+429 Too Many Requests / 503 Service Unavailable and fail. use_scheduler() routes every request
+of a BitmovinApi instance through a RequestScheduler:
+
+  * a request leaves only when the token bucket (rate per second, burst) has a token;
+  * waiting requests are served by priority: starting/stopping encodings and manifests first,
+    status polls last, everything else in between; FIFO within a priority;
+  * a 429/503 answer pauses the whole bucket for the Retry-After the API sent (or an
+    exponential backoff without one) and retries the request, so concurrent callers back off
+    together instead of turning into a retry storm.
+
+metrics() reports the current and highest queue depth per priority, throttled answers and
+retries. Install tracing (bmenc.tracing.instrument) after the scheduler so traces cover the
+retries of each call.
+
+    bitmovin_api = use_scheduler(use_session(BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)))
+"""
+import functools
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from bmenc.tracing import record_retry
+from bmenc.transport import rest_clients, send
+
+# Sustained requests per second and the burst allowed on top of it.
+RATE = 25
+BURST = 50
+
+MAX_RETRIES = 8
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+START_STOP, DEFAULT, POLL = 0, 1, 2
+
+PRIORITY_NAMES = {START_STOP: 'start_stop', DEFAULT: 'default', POLL: 'poll'}
+
+_THROTTLED = (429, 503)
+
+
+@dataclass(frozen=True)
+class SchedulerMetrics:
+    queue_depth: dict
+    max_queue_depth: dict
+    requests: int
+    throttled: int
+    retries: int
+    waited_seconds: float
+
+
+class TokenBucket:
+    """
+    rate tokens per second up to burst; not thread-safe on its own.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._paused_until = 0.0
+
+    def delay(self):
+        """
+        Seconds until a token can be taken (0 if one is available now).
+        """
+        now = self._refill()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self._tokens -= 1
+
+    def pause(self, seconds):
+        """
+        Hand out no tokens for the next seconds and start again from an empty bucket.
+        """
+        now = self._refill()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        start = max(self._updated_at, self._paused_until)
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated_at = max(self._updated_at, now)
+        return now
+
+
+class RequestScheduler:
+    def __init__(self, rate=RATE, burst=BURST, max_retries=MAX_RETRIES, rng=random.random):
+        self._bucket = TokenBucket(rate, burst)
+        self._max_retries = max_retries
+        self._rng = rng
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._waiting = []
+        self._queue_depth = {priority: 0 for priority in PRIORITY_NAMES}
+        self._max_queue_depth = dict(self._queue_depth)
+        self._requests = 0
+        self._throttled = 0
+        self._retries = 0
+        self._waited_seconds = 0.0
+
+    def acquire(self, priority=DEFAULT):
+        """
+        Block until this caller may send a request.
+        """
+        ticket = (priority, next(self._sequence))
+        started_at = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._queue_depth[priority] += 1
+            self._max_queue_depth[priority] = max(self._max_queue_depth[priority], self._queue_depth[priority])
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        delay = self._bucket.delay()
+                        if delay <= 0:
+                            self._bucket.take()
+                            heapq.heappop(self._waiting)
+                            self._requests += 1
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                raise
+            finally:
+                self._queue_depth[priority] -= 1
+                self._waited_seconds += time.monotonic() - started_at
+                self._condition.notify_all()
+
+    def call(self, request, priority, *args, **kwargs):
+        """
+        Send request(*args, **kwargs) when a token is available, retrying 429/503 answers.
+        """
+        import requests
+
+        attempt = 0
+        while True:
+            self.acquire(priority)
+            try:
+                return request(*args, **kwargs)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in _THROTTLED or attempt >= self._max_retries:
+                    raise
+                delay = self._retry_delay(e.response, attempt)
+                with self._condition:
+                    self._throttled += 1
+                    self._retries += 1
+                    self._bucket.pause(delay)
+                    self._condition.notify_all()
+                record_retry()
+                attempt += 1
+
+    def metrics(self):
+        with self._condition:
+            return SchedulerMetrics(
+                queue_depth={PRIORITY_NAMES[p]: depth for p, depth in self._queue_depth.items()},
+                max_queue_depth={PRIORITY_NAMES[p]: depth for p, depth in self._max_queue_depth.items()},
+                requests=self._requests,
+                throttled=self._throttled,
+                retries=self._retries,
+                waited_seconds=self._waited_seconds
+            )
+
+    def _retry_delay(self, response, attempt):
+        retry_after = _retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return retry_after
+        backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        return backoff * (0.5 + self._rng() / 2)
+
+
+def use_scheduler(bitmovin_api, scheduler=None):
+    """
+    Route every request of bitmovin_api through scheduler (a new default one if None) and
+    return bitmovin_api.
+    """
+    scheduler = scheduler or RequestScheduler()
+    for _, rest_client in rest_clients(bitmovin_api):
+        request = vars(rest_client).get('request') or functools.partial(send, rest_client)
+        rest_client.request = _scheduled_request(scheduler, request)
+        rest_client.bmenc_scheduler = scheduler
+    return bitmovin_api
+
+
+def priority_of(method, relative_url):
+    path = relative_url.split('?', 1)[0].rstrip('/')
+    if method == 'POST' and path.endswith(('/start', '/stop')):
+        return START_STOP
+    if method == 'GET' and path.endswith('/status'):
+        return POLL
+    return DEFAULT
+
+
+def _scheduled_request(scheduler, request):
+    def scheduled(method, relative_url, payload=None, *args, **kwargs):
+        return scheduler.call(request, priority_of(method, relative_url), method, relative_url, payload, *args, **kwargs)
+
+    return scheduled
+
+
+def _retry_after(value):
+    """
+    Seconds from a Retry-After header (delta seconds or HTTP date), None if absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
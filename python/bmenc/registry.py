@@ -0,0 +1,92 @@
+"""
+Client-side record of the resources a script creates for an encoding.
+
+Every create call already returns the full codec configuration, stream or muxing, so keeping
+those responses lets the manifest helpers build an EncodingSnapshot without a single lookup.
+Encodings that were (partly) built elsewhere, e.g. per-title encodings whose streams are
+generated by the encoder, are still resolved through the API.
+"""
+from types import MappingProxyType
+
+from bmenc.snapshot import EncodingSnapshot, load_encoding_snapshot
+
+
+class EncodingRegistry:
+    """
+    Collects codec configurations, streams and muxings as they are created for one encoding.
+    """
+
+    def __init__(self, encoding_id):
+        self.encoding_id = encoding_id
+        self._streams = {}
+        self._muxings = {}
+        self._codec_types = {}
+        self._codec_configs = {}
+
+    def add_codec_config(self, codec_type, codec_config):
+        self._codec_types[codec_config.id] = codec_type
+        self._codec_configs[codec_config.id] = codec_config
+        return codec_config
+
+    def add_stream(self, stream):
+        self._streams[stream.id] = stream
+        return stream
+
+    def add_muxing(self, muxing_type, muxing):
+        self._muxings.setdefault(muxing_type, []).append(muxing)
+        return muxing
+
+    def fork(self):
+        """
+        Return an empty registry for the same encoding, e.g. for one rendition created on another
+        thread. Record it back with merge() once it is complete.
+        """
+        return EncodingRegistry(encoding_id=self.encoding_id)
+
+    def merge(self, other):
+        """
+        Add everything recorded by other; its muxings are appended after the ones recorded so far.
+        """
+        self._streams.update(other._streams)
+        self._codec_types.update(other._codec_types)
+        self._codec_configs.update(other._codec_configs)
+        for muxing_type, muxings in other._muxings.items():
+            self._muxings.setdefault(muxing_type, []).extend(muxings)
+
+    def covers(self, muxing_types):
+        """
+        Check that every recorded muxing of the given types points to a recorded stream
+        whose codec configuration was recorded as well. An empty record covers nothing.
+        """
+        if not any(self._muxings.get(muxing_type) for muxing_type in muxing_types):
+            return False
+        for muxing_type in muxing_types:
+            for muxing in self._muxings.get(muxing_type, ()):
+                stream = self._streams.get(muxing.streams[0].stream_id)
+                if stream is None or stream.codec_config_id not in self._codec_types:
+                    return False
+        return True
+
+    def snapshot(self, muxing_types):
+        """
+        Build an EncodingSnapshot from the recorded resources only.
+        """
+        return EncodingSnapshot(
+            encoding_id=self.encoding_id,
+            streams=MappingProxyType(dict(self._streams)),
+            muxings=MappingProxyType({
+                muxing_type: tuple(self._muxings.get(muxing_type, ())) for muxing_type in muxing_types
+            }),
+            codec_types=MappingProxyType(dict(self._codec_types)),
+            codec_configs=MappingProxyType(dict(self._codec_configs))
+        )
+
+
+def resolve_encoding_snapshot(bitmovin_api, encoding_id, muxing_types=('fmp4',), registry=None):
+    """
+    Return the snapshot recorded by the registry if it describes this encoding completely,
+    otherwise load it from the API.
+    """
+    if registry is not None and registry.encoding_id == encoding_id and registry.covers(muxing_types):
+        return registry.snapshot(muxing_types)
+    return load_encoding_snapshot(bitmovin_api, encoding_id=encoding_id, muxing_types=muxing_types)
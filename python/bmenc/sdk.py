@@ -0,0 +1,27 @@
+"""
+bitmovin_api_sdk, imported on first use.
+
+Importing the SDK loads every API class and all of its models, which takes seconds and
+dominates short-lived commands (--help, argument and job spec errors, offline work) that never
+talk to the API. The bmenc modules therefore refer to SDK names through this module instead of
+importing them at module level:
+
+    from bmenc import sdk
+
+    def is_done(task):
+        return task.status in (sdk.Status.FINISHED, sdk.Status.ERROR)   # the SDK is imported here
+
+Names resolve against the top-level bitmovin_api_sdk package and are cached on first access.
+`python -m bmenc.importtime` checks that importing the bmenc modules stays free of the SDK.
+"""
+import importlib
+
+SDK_MODULE = 'bitmovin_api_sdk'
+
+
+def __getattr__(name):
+    if name.startswith('__'):
+        raise AttributeError(name)
+    value = getattr(importlib.import_module(SDK_MODULE), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,147 @@
+"""
+Prefetched, read-only view of an encoding's streams, muxings and codec configurations.
+
+Manifest helpers used to walk the muxing list and fetch the stream, codec type and codec
+configuration of every rendition one request at a time. An EncodingSnapshot loads the same
+information with a few paginated list calls plus one concurrent round of codec lookups, so the
+manifest builders can work purely in memory.
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from bmenc import sdk
+
+PAGE_SIZE = 100
+MAX_WORKERS = 8
+
+# muxing type -> name of its list query params in the SDK
+_MUXING_QUERY_PARAMS = {
+    'fmp4': 'Fmp4MuxingListQueryParams',
+    'ts': 'TsMuxingListQueryParams',
+    'webm': 'WebmMuxingListQueryParams',
+    'chunked_text': 'ChunkedTextMuxingListQueryParams',
+}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    """
+    One muxing together with the stream and codec configuration it was built from.
+    """
+    muxing_type: str
+    muxing: object
+    stream: object
+    codec_type: object
+    codec_config: object
+
+    @property
+    def output_path(self):
+        return self.muxing.outputs[0].output_path
+
+
+@dataclass(frozen=True)
+class EncodingSnapshot:
+    """
+    Immutable topology of an encoding: streams by id, muxings by type and codecs by config id.
+    """
+    encoding_id: str
+    streams: MappingProxyType
+    muxings: MappingProxyType
+    codec_types: MappingProxyType
+    codec_configs: MappingProxyType
+
+    def renditions(self, muxing_type):
+        """
+        Yield a Rendition for every muxing of the given type, in the order the API listed them.
+        """
+        for muxing in self.muxings.get(muxing_type, ()):
+            stream = self.streams[muxing.streams[0].stream_id]
+            yield Rendition(
+                muxing_type=muxing_type,
+                muxing=muxing,
+                stream=stream,
+                codec_type=self.codec_types.get(stream.codec_config_id),
+                codec_config=self.codec_configs.get(stream.codec_config_id)
+            )
+
+
+def load_encoding_snapshot(bitmovin_api, encoding_id, muxing_types=('fmp4',)):
+    """
+    Fetch streams, the requested muxing types and all referenced codec configurations of an
+    encoding, running independent requests concurrently.
+    """
+    unknown = set(muxing_types) - set(_MUXING_QUERY_PARAMS)
+    if unknown:
+        raise Exception(f"Unsupported muxing types: {sorted(unknown)}")
+
+    muxing_apis = bitmovin_api.encoding.encodings.muxings
+    listings = {'streams': (bitmovin_api.encoding.encodings.streams.list, sdk.StreamListQueryParams)}
+    for muxing_type in muxing_types:
+        listings[muxing_type] = (
+            getattr(muxing_apis, muxing_type).list, getattr(sdk, _MUXING_QUERY_PARAMS[muxing_type])
+        )
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        items = _list_all(executor, encoding_id, listings)
+        streams = {stream.id: stream for stream in items.pop('streams')}
+
+        codec_config_ids = sorted({stream.codec_config_id for stream in streams.values() if stream.codec_config_id})
+        codecs = dict(zip(codec_config_ids, executor.map(
+            lambda config_id: _fetch_codec(bitmovin_api, config_id), codec_config_ids)))
+
+    return EncodingSnapshot(
+        encoding_id=encoding_id,
+        streams=MappingProxyType(streams),
+        muxings=MappingProxyType({muxing_type: tuple(muxings) for muxing_type, muxings in items.items()}),
+        codec_types=MappingProxyType({config_id: codec[0] for config_id, codec in codecs.items()}),
+        codec_configs=MappingProxyType({config_id: codec[1] for config_id, codec in codecs.items()})
+    )
+
+
+def _list_all(executor, encoding_id, listings):
+    """
+    Read every page of several list endpoints. The first pages are requested together and tell
+    us the total counts, then all remaining pages are requested together.
+    """
+    def fetch(name, offset):
+        list_fn, query_params_type = listings[name]
+        return list_fn(encoding_id=encoding_id, query_params=query_params_type(offset=offset, limit=PAGE_SIZE))
+
+    first_pages = dict(zip(listings, executor.map(lambda name: fetch(name, 0), listings)))
+    items = {name: list(page.items) for name, page in first_pages.items()}
+
+    remaining = [
+        (name, offset)
+        for name, page in first_pages.items() if items[name]
+        for offset in range(len(items[name]), page.total_count or 0, PAGE_SIZE)
+    ]
+    for (name, _), page in zip(remaining, executor.map(lambda request: fetch(*request), remaining)):
+        items[name].extend(page.items)
+    return items
+
+
+def _fetch_codec(bitmovin_api, configuration_id):
+    """
+    Resolve the codec type of a configuration and, where the manifests need it, its full settings.
+    """
+    codec_type = bitmovin_api.encoding.configurations.type.get(configuration_id=configuration_id).type
+    getter = _codec_getters().get(codec_type)
+    codec_config = getter(bitmovin_api)(configuration_id=configuration_id) if getter else None
+    return codec_type, codec_config
+
+
+@functools.cache
+def _codec_getters():
+    """
+    Codec types the manifest helpers read settings from (bitrate, height, ...). Other types
+    (e.g. WEBVTT) are only resolved to their CodecConfigType.
+    """
+    return {
+        sdk.CodecConfigType.H264: lambda api: api.encoding.configurations.video.h264.get,
+        sdk.CodecConfigType.H265: lambda api: api.encoding.configurations.video.h265.get,
+        sdk.CodecConfigType.AV1: lambda api: api.encoding.configurations.video.av1.get,
+        sdk.CodecConfigType.VP9: lambda api: api.encoding.configurations.video.vp9.get,
+        sdk.CodecConfigType.AAC: lambda api: api.encoding.configurations.audio.aac.get,
+    }
@@ -0,0 +1,138 @@
+"""
+Reuse S3, GCS and role-based S3 inputs and outputs instead of creating new ones on every run.
+
+A resource is identified by a fingerprint of its type, bucket, role ARN / external id, name and
+a hash of its access key and secret. The id found for a fingerprint is kept in a local cache file
+per account (see bmenc.cache), so resolving it usually costs no request at all and rotated
+credentials or another org never reuse a stale resource. Cached ids are re-checked with a single
+GET once they are older than VERIFY_AFTER seconds.
+
+On a cache miss, resources without credentials of their own (role-based outputs) are searched by
+name before anything is created, which also adopts those created by earlier runs or other
+machines. The API never returns access keys or secrets, so a remote input or output with
+credentials cannot be told apart from one someone else created with different ones; those are
+always created.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from bmenc import sdk
+from bmenc.cache import JsonStore, account_cache_path
+from bmenc.pagination import iter_items
+
+CACHE_NAME = 'storage.json'
+
+VERIFY_AFTER = 24 * 60 * 60
+
+PAGE_SIZE = 100
+
+# The fields that make two inputs/outputs interchangeable.
+_FINGERPRINT_FIELDS = ('bucket_name', 'role_arn', 'external_id', 'name')
+
+# Never returned by the API; only a hash of them goes into the fingerprint.
+_CREDENTIAL_FIELDS = ('access_key', 'secret_key')
+
+
+class StorageRegistry:
+    """
+    Resolves inputs and outputs by fingerprint and creates them only when nothing matches.
+    """
+
+    def __init__(self, bitmovin_api, path=None, verify_after=VERIFY_AFTER, clock=time.time):
+        self._bitmovin_api = bitmovin_api
+        self._store = JsonStore(path or account_cache_path(bitmovin_api, CACHE_NAME))
+        self._verify_after = verify_after
+        self._clock = clock
+
+    def get_or_create(self, resource):
+        """
+        Return an existing input/output matching resource, or create it. On a cache hit the
+        given resource itself is returned with the cached id filled in.
+        """
+        endpoints = _endpoints()
+        if type(resource) not in endpoints:
+            raise Exception(f"Unsupported resource type '{type(resource).__name__}'. "
+                            f"Valid types: {', '.join(t.__name__ for t in endpoints)}")
+
+        endpoint, keyword, id_keyword, query_params_type = endpoints[type(resource)]
+        api = endpoint(self._bitmovin_api)
+        key = storage_fingerprint(resource)
+        with self._store.key_lock(key):
+            entry = self._store.get(key)
+            if entry is not None and self._verify(key, entry, api, id_keyword):
+                resource.id = entry['id']
+                return resource
+
+            found = _find(api, query_params_type, resource)
+            if found is None:
+                found = api.create(**{keyword: resource})
+            self._store.set(key, {'id': found.id, 'verified_at': self._clock()})
+            return found
+
+    def _verify(self, key, entry, api, id_keyword):
+        """
+        Check a cached entry against the API once it is older than verify_after.
+        """
+        now = self._clock()
+        if now - entry.get('verified_at', 0) < self._verify_after:
+            return True
+
+        try:
+            api.get(**{id_keyword: entry['id']})
+        except sdk.BitmovinError:
+            self._store.delete(key)
+            return False
+
+        self._store.set(key, dict(entry, verified_at=now))
+        return True
+
+
+def storage_fingerprint(resource):
+    """
+    SHA-256 of the resource type, its identifying fields and a hash of its credentials.
+    """
+    fields = {name: getattr(resource, name, None) for name in _FINGERPRINT_FIELDS}
+    fields['credentials'] = _credentials_hash(resource)
+    canonical = json.dumps([type(resource).__name__, fields], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+@functools.cache
+def _endpoints():
+    """
+    resource type -> (endpoint, payload keyword, id keyword, list query params)
+    """
+    return {
+        sdk.S3Input: (lambda api: api.encoding.inputs.s3, 's3_input', 'input_id', sdk.S3InputListQueryParams),
+        sdk.GcsInput: (lambda api: api.encoding.inputs.gcs, 'gcs_input', 'input_id', sdk.GcsInputListQueryParams),
+        sdk.S3Output: (lambda api: api.encoding.outputs.s3, 's3_output', 'output_id', sdk.S3OutputListQueryParams),
+        sdk.GcsOutput: (lambda api: api.encoding.outputs.gcs, 'gcs_output', 'output_id', sdk.GcsOutputListQueryParams),
+        sdk.S3RoleBasedOutput: (
+            lambda api: api.encoding.outputs.s3_role_based, 's3_role_based_output', 'output_id',
+            sdk.S3RoleBasedOutputListQueryParams
+        ),
+    }
+
+
+def _find(api, query_params_type, resource):
+    """
+    Search existing resources with the same name for one with the same fingerprint. Resources
+    with credentials are never adopted, since the API does not return them for comparison.
+    """
+    if not resource.name or _credentials_hash(resource) is not None:
+        return None
+
+    fingerprint = storage_fingerprint(resource)
+    for item in iter_items(api.list, query_params_type, filters={'name': resource.name}, page_size=PAGE_SIZE):
+        if storage_fingerprint(item) == fingerprint:
+            return item
+    return None
+
+
+def _credentials_hash(resource):
+    credentials = [getattr(resource, name, None) for name in _CREDENTIAL_FIELDS]
+    if not any(credentials):
+        return None
+    return hashlib.sha256(json.dumps(credentials).encode('utf-8')).hexdigest()
@@ -0,0 +1,255 @@
+"""
+Capture an encoding's resource graph once and start identical encodings from it per title.
+
+Apart from the input path and the output location, every title a script encodes gets the same
+encoding, streams, muxings and start settings. capture_template() reads that graph from an
+existing encoding (e.g. the one a normal script run created) and turns it into a Bitmovin
+Encoding Template document in which the codec configurations, inputs and outputs are referenced
+by id. start_from_template() fills in a new input path and output base path and submits the
+document with a single POST /encoding/templates/start, which creates and starts the encoding.
+Only the encoding, its streams, the given muxing types and the start request are captured;
+sprites, thumbnails and manifests are not part of the template.
+
+Captured templates are plain JSON, so they can be stored next to a batch:
+
+    python -m bmenc.templates <encoding id> template.json --input-path inputs/a.mov \\
+        --output-base-path output/vod-h264-aac-fmp4-hls-dash/a/ --muxing-types fmp4
+"""
+import argparse
+import json
+import os
+from dataclasses import dataclass
+
+from bmenc import sdk
+from bmenc.pagination import iter_items
+from bmenc.snapshot import PAGE_SIZE, load_encoding_snapshot
+from bmenc.transport import use_session
+from bmenc.ratelimit import use_scheduler
+
+INPUT_PATH = '${input_path}'
+OUTPUT_BASE_PATH = '${output_base_path}'
+
+_ENCODING_KEY = 'main'
+
+_ENCODING_FIELDS = (
+    'name', 'description', 'customData', 'cloudRegion', 'fallbackCloudRegions', 'encoderVersion',
+    'infrastructure', 'staticIpId', 'labels',
+)
+
+# Reported by the API for an existing resource, never part of a create request.
+_SERVER_FIELDS = {
+    'id', 'createdAt', 'modifiedAt', 'segmentsEncoded', 'segmentsMuxed', 'ignoredBy', 'selectedEncodingMode',
+    'appliedSettings', 'avgBitrate', 'minBitrate', 'maxBitrate',
+}
+
+# Manifests attached to the captured start request belong to that one encoding; titles started
+# from the template get theirs built after the encode (see bmenc.batch).
+_START_MANIFEST_FIELDS = {
+    'vodHlsManifests', 'vodDashManifests', 'vodSmoothManifests', 'previewHlsManifests', 'previewDashManifests',
+    'manifestGenerator',
+}
+
+
+@dataclass(frozen=True)
+class EncodingTemplate:
+    """
+    Encoding Template document with ${input_path} / ${output_base_path} placeholders, plus what
+    is needed to build the manifests of an encoding started from it.
+    """
+    name: str
+    muxing_types: tuple
+    output_id: str
+    document: dict
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'name': self.name,
+                'muxing_types': list(self.muxing_types),
+                'output_id': self.output_id,
+                'document': self.document,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            name=data['name'],
+            muxing_types=tuple(data['muxing_types']),
+            output_id=data['output_id'],
+            document=data['document']
+        )
+
+
+def capture_template(bitmovin_api, encoding_id, input_path, output_base_path, muxing_types=('fmp4',)):
+    """
+    Describe an existing encoding as a template. input_path and output_base_path are the values
+    the encoding was created with; they become placeholders. Streams generated by the encoder
+    (per-title results) and the muxings built on them are left out, the encoder creates them again.
+    """
+    encoding = bitmovin_api.encoding.encodings.get(encoding_id=encoding_id)
+    ingest_input_streams = {
+        input_stream.id: input_stream for input_stream in _list_ingest_input_streams(bitmovin_api, encoding_id)
+    }
+    snapshot = load_encoding_snapshot(bitmovin_api, encoding_id=encoding_id, muxing_types=muxing_types)
+    start_request = bitmovin_api.encoding.encodings.get_start_request(encoding_id=encoding_id)
+
+    def placeholder_input_path(path):
+        return INPUT_PATH if path == input_path else path
+
+    def placeholder_output_path(path):
+        return OUTPUT_BASE_PATH + path[len(output_base_path):] if path.startswith(output_base_path) else path
+
+    streams = {}
+    stream_keys = {}
+    for stream in snapshot.streams.values():
+        if stream.mode is not None and 'PER_TITLE_RESULT' in stream.mode.value:
+            continue
+        properties = _properties(stream)
+        properties['inputStreams'] = [
+            _stream_input(input_stream, ingest_input_streams, placeholder_input_path)
+            for input_stream in stream.input_streams or ()
+        ]
+        key = f'stream_{len(streams)}'
+        stream_keys[stream.id] = key
+        streams[key] = {'properties': properties}
+
+    muxings = {}
+    output_ids = set()
+    for muxing_type in muxing_types:
+        for rendition in snapshot.renditions(muxing_type):
+            muxing = rendition.muxing
+            if any(muxing_stream.stream_id not in stream_keys for muxing_stream in muxing.streams):
+                continue
+            properties = _properties(muxing)
+            properties['streams'] = [
+                dict(muxing_stream.to_dict(), streamId=_reference('streams', stream_keys[muxing_stream.stream_id]))
+                for muxing_stream in muxing.streams
+            ]
+            properties['outputs'] = [
+                dict(output.to_dict(), outputPath=placeholder_output_path(output.output_path))
+                for output in muxing.outputs
+            ]
+            output_ids.update(output.output_id for output in muxing.outputs)
+            typed_muxings = muxings.setdefault(muxing_type, {})
+            typed_muxings[f'{muxing_type}_{len(typed_muxings)}'] = {'properties': properties}
+
+    if len(output_ids) != 1:
+        raise Exception(f"Expected the muxings of encoding {encoding_id} to share one output, found {len(output_ids)}")
+
+    encoding_properties = {
+        name: value for name, value in encoding.to_dict().items() if name in _ENCODING_FIELDS
+    }
+    if encoding.name:
+        encoding_properties['name'] = encoding.name.replace(input_path, INPUT_PATH)
+
+    document = {
+        'metadata': {'type': 'VOD', 'name': encoding_properties.get('name', encoding_id)},
+        'encodings': {
+            _ENCODING_KEY: {
+                'properties': encoding_properties,
+                'streams': streams,
+                'muxings': muxings,
+                'start': {'properties': {
+                    name: value for name, value in (start_request.to_dict() if start_request else {}).items()
+                    if name not in _START_MANIFEST_FIELDS
+                }},
+            }
+        }
+    }
+    return EncodingTemplate(
+        name=encoding.name,
+        muxing_types=tuple(muxing_types),
+        output_id=output_ids.pop(),
+        document=document
+    )
+
+
+def instantiate(template, input_path, output_base_path):
+    """
+    Return the template document with the placeholders replaced for one title.
+    """
+    def fill(value):
+        if isinstance(value, dict):
+            return {key: fill(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [fill(item) for item in value]
+        if isinstance(value, str):
+            return value.replace(INPUT_PATH, input_path).replace(OUTPUT_BASE_PATH, output_base_path)
+        return value
+
+    return fill(template.document)
+
+
+def start_from_template(bitmovin_api, template, input_path, output_base_path):
+    """
+    Create and start the encoding of one title with a single request and return its id.
+    """
+    response = bitmovin_api.encoding.templates.start(
+        encoding_template_request=instantiate(template, input_path=input_path, output_base_path=output_base_path)
+    )
+    return response.encoding_id
+
+
+def _reference(collection, key):
+    return f'$/encodings/{_ENCODING_KEY}/{collection}/{key}'
+
+
+def _properties(resource):
+    return {name: value for name, value in resource.to_dict().items() if name not in _SERVER_FIELDS}
+
+
+def _stream_input(input_stream, ingest_input_streams, placeholder_input_path):
+    """
+    Express a stream input through input id and path, so it does not depend on an ingest input
+    stream of the captured encoding.
+    """
+    ingest = ingest_input_streams.get(input_stream.input_stream_id) if input_stream.input_stream_id else None
+    source = ingest if ingest is not None else input_stream
+    stream_input = {
+        'inputId': source.input_id,
+        'inputPath': placeholder_input_path(source.input_path),
+        'selectionMode': source.selection_mode.value if source.selection_mode else None,
+        'position': source.position,
+    }
+    return {name: value for name, value in stream_input.items() if value is not None}
+
+
+def _list_ingest_input_streams(bitmovin_api, encoding_id):
+    return iter_items(
+        bitmovin_api.encoding.encodings.input_streams.ingest.list, sdk.IngestInputStreamListQueryParams,
+        page_size=PAGE_SIZE, encoding_id=encoding_id
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Capture an existing encoding as a reusable template.')
+    parser.add_argument('encoding_id')
+    parser.add_argument('template', help='JSON file to write')
+    parser.add_argument('--input-path', required=True, help='input path the encoding was created with')
+    parser.add_argument('--output-base-path', required=True, help='output base path the encoding was created with')
+    parser.add_argument('--muxing-types', default='fmp4', help='comma separated, e.g. ts,fmp4')
+    parser.add_argument('--api-key', default=os.environ.get('BITMOVIN_API_KEY'),
+                        help='API key (default: $BITMOVIN_API_KEY)')
+    parser.add_argument('--org-id', default=os.environ.get('BITMOVIN_ORG_ID'),
+                        help='tenant organization id (default: $BITMOVIN_ORG_ID)')
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error('an API key is required (--api-key or BITMOVIN_API_KEY)')
+
+    bitmovin_api = use_scheduler(use_session(sdk.BitmovinApi(api_key=args.api_key, tenant_org_id=args.org_id)))
+    template = capture_template(
+        bitmovin_api,
+        encoding_id=args.encoding_id,
+        input_path=args.input_path,
+        output_base_path=args.output_base_path,
+        muxing_types=args.muxing_types.split(',')
+    )
+    template.save(args.template)
+    print(f"Captured {sum(len(m) for m in template.document['encodings'][_ENCODING_KEY]['muxings'].values())} "
+          f"muxings of encoding {args.encoding_id} into {args.template}")
+
+
+if __name__ == '__main__':
+    main()
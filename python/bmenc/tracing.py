@@ -0,0 +1,213 @@
+"""
+Opt-in tracing of every HTTP request a BitmovinApi instance sends.
+
+instrument(bitmovin_api, sink) replaces the request method of each REST client inside that
+instance (the SDK keeps one per sub-API) with one that times the call and hands a CallTrace to
+the sink: the sub-API it came from, HTTP method, endpoint with ids replaced by {id}, status
+code, latency and the number of retries reported for it. Nothing is wrapped unless instrument()
+is called, so untraced runs pay nothing; uninstrument() restores the original methods.
+
+Sinks are objects with a record(trace) method:
+
+    HistogramSink     in-memory latency histograms per (method, endpoint)
+    PrometheusSink    the same, rendered in the Prometheus text exposition format
+    JsonlSink         one JSON object per call appended to a file
+
+    sink = HistogramSink()
+    instrument(bitmovin_api, sink)
+    ...
+    for (method, endpoint), histogram in sink.histograms().items():
+        print(method, endpoint, histogram.count, histogram.quantile(0.95))
+"""
+import bisect
+import functools
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from urllib.parse import urlsplit
+
+from bmenc.transport import rest_clients, send
+
+# Upper bounds in seconds, the Prometheus client default buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+_ID_PATTERN = re.compile(r'^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$')
+
+_retries = threading.local()
+
+
+@dataclass(frozen=True)
+class CallTrace:
+    """
+    One traced request. status is None when no response arrived (connection error).
+    """
+    api: str
+    method: str
+    endpoint: str
+    status: int
+    seconds: float
+    retries: int
+    started_at: float
+
+
+def instrument(bitmovin_api, sink):
+    """
+    Trace every request of bitmovin_api (including the caches and helpers sharing it) into sink.
+    """
+    for api_name, rest_client in rest_clients(bitmovin_api):
+        rest_client.bmenc_untraced = vars(rest_client).get('request') or functools.partial(send, rest_client)
+        rest_client.request = _traced_request(rest_client.bmenc_untraced, api_name, sink)
+    return bitmovin_api
+
+
+def uninstrument(bitmovin_api):
+    """
+    Stop tracing; clients keep the session and scheduler they had before instrument().
+    """
+    for _, rest_client in rest_clients(bitmovin_api):
+        untraced = vars(rest_client).pop('bmenc_untraced', None)
+        if untraced is not None:
+            rest_client.request = untraced
+    return bitmovin_api
+
+
+def record_retry():
+    """
+    Called by retrying layers for every repeated attempt; counted into the current call's trace.
+    """
+    _retries.count = getattr(_retries, 'count', 0) + 1
+
+
+def endpoint_of(url):
+    path = urlsplit(url).path
+    return '/'.join('{id}' if _ID_PATTERN.match(segment) else segment for segment in path.split('/'))
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.statuses = {}
+
+    def observe(self, seconds, status):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket the q-quantile falls into (inf beyond the last bucket).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class HistogramSink:
+    def __init__(self, buckets=BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, trace):
+        with self._lock:
+            histogram = self._histograms.get((trace.method, trace.endpoint))
+            if histogram is None:
+                histogram = self._histograms[(trace.method, trace.endpoint)] = Histogram(self._buckets)
+            histogram.observe(trace.seconds, trace.status)
+
+    def histograms(self):
+        with self._lock:
+            return dict(self._histograms)
+
+
+class PrometheusSink(HistogramSink):
+    """
+    HistogramSink that renders bmenc_api_request_duration_seconds and bmenc_api_requests_total.
+    """
+
+    def exposition(self):
+        lines = [
+            '# HELP bmenc_api_request_duration_seconds Bitmovin API request latency.',
+            '# TYPE bmenc_api_request_duration_seconds histogram',
+        ]
+        histograms = sorted(self.histograms().items())
+        for (method, endpoint), histogram in histograms:
+            labels = f'method="{method}",endpoint="{_escape(endpoint)}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'bmenc_api_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'bmenc_api_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'bmenc_api_request_duration_seconds_count{{{labels}}} {histogram.count}')
+
+        lines += [
+            '# HELP bmenc_api_requests_total Bitmovin API requests by status code.',
+            '# TYPE bmenc_api_requests_total counter',
+        ]
+        for (method, endpoint), histogram in histograms:
+            for status, count in sorted(histogram.statuses.items(), key=lambda item: str(item[0])):
+                lines.append(f'bmenc_api_requests_total{{method="{method}",endpoint="{_escape(endpoint)}",'
+                             f'status="{status if status is not None else "error"}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            f.write(self.exposition())
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+
+    def record(self, trace):
+        line = json.dumps(asdict(trace))
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _traced_request(untraced, api_name, sink):
+    def request(method, relative_url, payload=None):
+        _retries.count = 0
+        response_status = []
+        started_at = time.monotonic()
+        try:
+            return untraced(method, relative_url, payload, response_status)
+        finally:
+            sink.record(CallTrace(
+                api=api_name,
+                method=method,
+                endpoint=endpoint_of(relative_url),
+                status=response_status[-1] if response_status else None,
+                seconds=time.monotonic() - started_at,
+                retries=_retries.count,
+                started_at=started_at
+            ))
+
+    return request
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
@@ -0,0 +1,153 @@
+"""
+One pooled, keep-alive HTTP session for all requests of a BitmovinApi instance.
+
+The SDK sends every request with requests.request(), which builds a new session per call: no
+connection is ever reused, so every call pays a TCP connect and a TLS handshake. use_session()
+gives every REST client inside a BitmovinApi (the SDK keeps one per sub-API) the same
+requests.Session, whose urllib3 pool keeps up to pool_size connections per host open. The pool
+is thread-safe, so the rendition chains, batch titles and status multiplexer can share it.
+
+    bitmovin_api = use_session(BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID))
+
+`python -m bmenc.transport` compares the handshakes and wall time of the SDK's default
+transport and the pooled session against a local TLS instance of bmenc.mockapi (needs the
+openssl command line tool for a throwaway certificate).
+"""
+import argparse
+import functools
+import os
+import ssl
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bmenc import sdk
+
+# Connections kept open per host; matches the widest fan-out of the helpers (chains, snapshot).
+POOL_SIZE = 16
+
+# Distinct hosts a session keeps pools for (the API, plus webhook or mock servers).
+POOL_HOSTS = 4
+
+
+def pooled_session(pool_size=POOL_SIZE):
+    # requests is imported on first use, like the SDK (see bmenc.sdk).
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def use_session(bitmovin_api, session=None, pool_size=POOL_SIZE):
+    """
+    Send every request of bitmovin_api through one shared session and return bitmovin_api.
+    """
+    session = session or pooled_session(pool_size)
+    for _, rest_client in rest_clients(bitmovin_api):
+        rest_client.bmenc_session = session
+        if 'request' not in vars(rest_client):
+            rest_client.request = functools.partial(send, rest_client)
+    return bitmovin_api
+
+
+def rest_clients(bitmovin_api):
+    """
+    Yield (dotted sub-API name, RestClient) for every sub-API reachable from bitmovin_api.
+    """
+    seen = set()
+    pending = [('', bitmovin_api)]
+    while pending:
+        name, api = pending.pop()
+        if id(api) in seen:
+            continue
+        seen.add(id(api))
+        yield name or 'api', api.api_client.rest_client
+        for attribute, value in vars(api).items():
+            if isinstance(value, sdk.BaseApi):
+                pending.append((f'{name}.{attribute}' if name else attribute, value))
+
+
+def send(rest_client, method, relative_url, payload=None, response_status=None):
+    """
+    RestClient.request of the SDK, sent through the client's shared session if it has one.
+    The HTTP status is appended to response_status when a list is given.
+    """
+    http = getattr(rest_client, 'bmenc_session', None)
+    if http is None:
+        import requests as http
+    url = rest_client.urljoin(rest_client.base_url, relative_url)
+    if payload is not None and not isinstance(payload, list):
+        payload = {k: v for k, v in payload.items() if v is not None}
+    rest_client._log_request(method, url, payload)
+
+    if payload is None:
+        response = http.request(method, url, headers=rest_client.http_headers)
+    else:
+        response = http.request(method, url, headers=rest_client.http_headers, data=rest_client._serialize(payload))
+    if response_status is not None:
+        response_status.append(response.status_code)
+    response.raise_for_status()
+
+    rest_client.logger.log('RESPONSE: {}'.format(response.text))
+    if not response.text:
+        return dict()
+    return response.json()
+
+
+def _self_signed_certificate(directory):
+    cert_path = os.path.join(directory, 'cert.pem')
+    key_path = os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+        '-keyout', key_path, '-out', cert_path,
+    ], check=True, capture_output=True)
+    return cert_path, key_path
+
+
+def _run_workload(bitmovin_api, encoding_id, calls, threads):
+    def call(_):
+        bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(calls)))
+    return time.monotonic() - started_at
+
+
+def main():
+    # Imported here because bmenc.mockapi uses this module.
+    from bmenc.mockapi import MockApiServer
+
+    parser = argparse.ArgumentParser(description='Count TLS handshakes with and without the pooled session.')
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the mock API adds to every request')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = _self_signed_certificate(directory)
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(cert_path, key_path)
+        os.environ['REQUESTS_CA_BUNDLE'] = cert_path
+
+        for label, pooled in (('sdk default', False), ('pooled session', True)):
+            with MockApiServer(latency=args.latency, ssl_context=ssl_context) as server:
+                bitmovin_api = server.client()
+                if pooled:
+                    use_session(bitmovin_api, pool_size=args.threads)
+                encoding_id = bitmovin_api.encoding.encodings.create(encoding=sdk.Encoding(name='handshakes')).id
+                server.reset_calls()
+                connections_before = server.connections
+                seconds = _run_workload(bitmovin_api, encoding_id, args.calls, args.threads)
+                print(f"{label:<15} {args.calls} calls on {args.threads} threads: "
+                      f"{server.connections - connections_before} handshakes, {seconds:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
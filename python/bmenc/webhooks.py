@@ -0,0 +1,181 @@
+"""
+Wait for encoding completion through webhooks instead of status polling.
+
+A small stdlib HTTP server receives the ENCODING_FINISHED / ENCODING_ERROR notifications that are
+registered for an encoding. The Bitmovin API has to be able to reach that server, so the URL
+passed to register_encoding_webhooks is usually a public endpoint or tunnel that forwards to the
+local port. If no notification arrives before the deadline we fall back to slow polling, so a
+lost webhook costs latency but never a result.
+
+send_notification() posts the same payload shape the API sends, which makes the receiver easy
+to exercise locally without an encoding.
+"""
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bmenc import sdk
+
+from bmenc.polling import PollSchedule, poll_task
+
+# One hour without any notification is far beyond normal delivery delays.
+NOTIFICATION_DEADLINE = 60 * 60
+
+# Used only after the deadline has passed, i.e. when webhooks are evidently not arriving.
+FALLBACK_SCHEDULE = PollSchedule(initial_delay=30, min_interval=30, max_interval=120)
+
+FINISHED = 'FINISHED'
+ERROR = 'ERROR'
+
+_EVENTS_BY_PATH = {'finished': FINISHED, 'error': ERROR}
+
+
+class WebhookReceiver:
+    """
+    Background HTTP server that records the last event received per resource id.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080):
+        self._events = {}
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def wait(self, resource_id, timeout):
+        """
+        Block until an event for resource_id arrived and return it (FINISHED or ERROR),
+        or return None once the timeout expired.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: resource_id in self._events, timeout=timeout)
+            return self._events.get(resource_id)
+
+    def _record(self, resource_id, event):
+        with self._condition:
+            self._events[resource_id] = event
+            self._condition.notify_all()
+
+    def _handler_class(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    payload = None
+                if not isinstance(payload, dict):
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                resource_id, event = _parse_notification(self.path, payload)
+                if resource_id is None or event is None:
+                    self.send_response(422)
+                else:
+                    receiver._record(resource_id, event)
+                    self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def register_encoding_webhooks(bitmovin_api, encoding_id, url):
+    """
+    Ask the API to notify url + '/finished' and url + '/error' for this encoding.
+    Register before starting the encoding so no event can be missed.
+    """
+    base_url = url.rstrip('/')
+    encodings = bitmovin_api.notifications.webhooks.encoding.encodings
+    encodings.finished.create_by_encoding_id(
+        encoding_id=encoding_id,
+        webhook=sdk.Webhook(url=f'{base_url}/finished', method=sdk.WebhookHttpMethod.POST)
+    )
+    encodings.error.create_by_encoding_id(
+        encoding_id=encoding_id,
+        webhook=sdk.Webhook(url=f'{base_url}/error', method=sdk.WebhookHttpMethod.POST)
+    )
+
+
+def wait_for_encoding_notification(bitmovin_api, encoding_id, receiver, deadline=NOTIFICATION_DEADLINE):
+    """
+    Wait for the finished/error webhook of an encoding and return its final status task.
+    Falls back to slow status polling if nothing arrived before the deadline.
+    """
+    def fetch_status():
+        task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
+        print(f"Encoding status is {task.status} (progress: {task.progress} %)")
+        return task
+
+    event = receiver.wait(encoding_id, timeout=deadline)
+    if event is None:
+        print(f"No webhook received within {deadline} seconds, falling back to status polling")
+    else:
+        # One status call fetches the task messages needed for error reporting.
+        print(f"Received encoding {event.lower()} webhook")
+        task = fetch_status()
+        if task.status in (sdk.Status.FINISHED, sdk.Status.ERROR):
+            return task
+
+    return poll_task(fetch_status, schedule=FALLBACK_SCHEDULE)
+
+
+def send_notification(url, encoding_id, event=FINISHED):
+    """
+    POST a notification shaped like the API's encoding webhooks to a receiver, e.g. for local testing.
+    """
+    path = 'finished' if event == FINISHED else 'error'
+    payload = {
+        'resourceId': encoding_id,
+        'resourceType': 'ENCODING',
+        'eventType': f'ENCODING_{event}',
+        'encoding': {'id': encoding_id, 'status': event},
+    }
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/{path}",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.status
+
+
+def _parse_notification(path, payload):
+    """
+    Extract (resource id, FINISHED/ERROR) from a webhook request. The event is taken from the
+    path the webhook was registered with and, failing that, from the payload itself.
+    """
+    encoding = payload.get('encoding') or payload.get('data') or {}
+    if not isinstance(encoding, dict):
+        encoding = {}
+    resource_id = payload.get('resourceId') or encoding.get('id')
+
+    event = _EVENTS_BY_PATH.get(path.rstrip('/').rsplit('/', 1)[-1])
+    if event is None:
+        status = payload.get('eventType') or encoding.get('status') or ''
+        event = ERROR if status.endswith(ERROR) else FINISHED if status.endswith(FINISHED) else None
+    return resource_id, event
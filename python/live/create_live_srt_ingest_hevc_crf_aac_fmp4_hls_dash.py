@@ -1,6 +1,9 @@
-import time
+import os
+import sys
 from time import sleep
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
 from bitmovin_api_sdk import BitmovinApi, BitmovinError
 from bitmovin_api_sdk import S3Output, SrtInput, SrtMode
 from bitmovin_api_sdk import Encoding, CloudRegion
@@ -17,6 +20,14 @@ from bitmovin_api_sdk import MessageType, StartLiveEncodingRequest, ManifestGene
 from bitmovin_api_sdk import LiveHlsManifest, LiveDashManifest, AvailabilityStartTimeMode
 from bitmovin_api_sdk import Status
 
+from bmenc.chains import create_renditions
+from bmenc.codec_configs import CodecConfigCache
+from bmenc.storage import StorageRegistry
+from bmenc.transport import use_session
+from bmenc.ratelimit import use_scheduler
+from bmenc.registry import EncodingRegistry, resolve_encoding_snapshot
+from bmenc.polling import poll_task, ENCODING_SCHEDULE, MANIFEST_SCHEDULE
+
 TEST_ITEM = "live-srt-ingest-hevc-crf-aac-fmp4-hls-dash"
 
 API_KEY = '<INSERT YOUR API KEY>'
@@ -28,7 +39,9 @@ S3_OUTPUT_BUCKET_NAME = '<INSERT_YOUR_BUCKET_NAME>'
 
 OUTPUT_BASE_PATH = f'output/{TEST_ITEM}/'
 
-bitmovin_api = BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)
+bitmovin_api = use_scheduler(use_session(BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)))
+codec_configs = CodecConfigCache(bitmovin_api)
+storage = StorageRegistry(bitmovin_api)
 
 # Example H.265 encoding profiles, including different resolutions, bitrate, and profiles.
 video_encoding_profiles = [
@@ -56,8 +69,8 @@ def main():
             port=2088
         )
     )
-    s3_output = bitmovin_api.encoding.outputs.s3.create(
-        s3_output=S3Output(
+    s3_output = storage.get_or_create(
+        S3Output(
             access_key=S3_OUTPUT_ACCESS_KEY,
             secret_key=S3_OUTPUT_SECRET_KEY,
             bucket_name=S3_OUTPUT_BUCKET_NAME,
@@ -73,11 +86,12 @@ def main():
             encoder_version='STABLE'
         )
     )
+    registry = EncodingRegistry(encoding_id=encoding.id)
 
     # === Video Profile definition ===
-    for video_profile in video_encoding_profiles:
+    def create_video_rendition(video_profile, registry):
         """
-        Loop through each defined H.265 profile.
+        Create the chain for one H.265 profile.
         Create a color configuration that automatically copies color flags from the source.
         If the profile is HIGH, we enable certain advanced features like CABAC.
         If MAIN or BASELINE were used, you could set different values here.
@@ -88,8 +102,9 @@ def main():
             copy_color_space_flag=True
         )
         # Create Video Codec Configuration with advanced H.265 parameters
-        h265_codec = bitmovin_api.encoding.configurations.video.h265.create(
-            h265_video_configuration=H265VideoConfiguration(
+        h265_codec = codec_configs.get_or_create(
+            CodecConfigType.H265,
+            H265VideoConfiguration(
                 name='Sample H.265 Video Configuration',
                 height=video_profile.get("height"),
                 crf=video_profile.get("crf"),
@@ -106,6 +121,7 @@ def main():
                 encoding_mode=EncodingMode.SINGLE_PASS
             )
         )
+        registry.add_codec_config(CodecConfigType.H265, h265_codec)
 
         # Create a Stream that uses the above H.265 codec configuration
         h265_stream = bitmovin_api.encoding.encodings.streams.create(
@@ -120,6 +136,7 @@ def main():
                 mode=video_profile.get('mode')
             )
         )
+        registry.add_stream(h265_stream)
 
         # Define the S3 output path for the final video segments
         video_muxing_output = EncodingOutput(
@@ -129,7 +146,7 @@ def main():
         )
 
         # Create an FMP4 Muxing for this particular resolution
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -140,23 +157,26 @@ def main():
                 name=f"Video FMP4 Muxing {video_profile.get('height')}p"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
 
     # === Audio Profile definition ===
-    for audio_profile in audio_encoding_profiles:
+    def create_audio_rendition(audio_profile, registry):
         """
-        Loop through each defined AAC audio profile.
+        Create the chain for one AAC audio profile.
         Create a codec configuration object and then a Stream object for that profile.
         Finally, create an FMP4 muxing for each variant.
         """
 
         # Create Audio Codec Configuration
-        aac_codec = bitmovin_api.encoding.configurations.audio.aac.create(
-            aac_audio_configuration=AacAudioConfiguration(
+        aac_codec = codec_configs.get_or_create(
+            CodecConfigType.AAC,
+            AacAudioConfiguration(
                 bitrate=audio_profile.get("bitrate"),
                 rate=audio_profile.get("rate"),
                 channel_layout=AacChannelLayout.CL_STEREO
             )
         )
+        registry.add_codec_config(CodecConfigType.AAC, aac_codec)
 
         # Create Audio Stream
         aac_stream = bitmovin_api.encoding.encodings.streams.create(
@@ -171,6 +191,7 @@ def main():
                 mode=StreamMode.STANDARD
             )
         )
+        registry.add_stream(aac_stream)
 
         # Define the GCS output path for audio segments
         audio_muxing_output = EncodingOutput(
@@ -180,7 +201,7 @@ def main():
         )
 
         # Create Fmp4 muxing
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -191,10 +212,20 @@ def main():
                 name=f"Audio FMP4 Muxing {audio_profile.get('bitrate') / 1000:.0f}kbps"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
+
+    # Renditions are independent, so their chains are created concurrently.
+    create_renditions(
+        registry,
+        (create_video_rendition, video_encoding_profiles),
+        (create_audio_rendition, audio_encoding_profiles)
+    )
 
     # Define HLS and DASH manifests
-    hls_manifest = _create_hls_manifest(encoding_id=encoding.id, output=s3_output, output_path=OUTPUT_BASE_PATH)
-    dash_manifest = _create_dash_manifest(encoding_id=encoding.id, output=s3_output, output_path=OUTPUT_BASE_PATH)
+    snapshot = resolve_encoding_snapshot(
+        bitmovin_api, encoding_id=encoding.id, muxing_types=['fmp4'], registry=registry)
+    hls_manifest = _create_hls_manifest(snapshot=snapshot, output=s3_output, output_path=OUTPUT_BASE_PATH)
+    dash_manifest = _create_dash_manifest(snapshot=snapshot, output=s3_output, output_path=OUTPUT_BASE_PATH)
 
     live_hls_manifest = LiveHlsManifest(
         manifest_id=hls_manifest.id,
@@ -270,7 +301,11 @@ def _wait_for_live_encoding_details(encoding):
     while retries < max_retries:
         try:
             return bitmovin_api.encoding.encodings.live.get(encoding_id=encoding.id)
-        except BitmovinError:
+        except BitmovinError as e:
+            # Rate limiting is retried by the scheduler; what reaches here is either "not up
+            # yet" or an error that waiting will not fix.
+            if e.http_status_code in (401, 403, 429):
+                raise
             print("Failed to fetch live encoding details. Retrying... {0} / {1}"
                   .format(retries, max_retries))
             retries += 1
@@ -280,12 +315,12 @@ def _wait_for_live_encoding_details(encoding):
                     .format(5))
 
 
-def _create_hls_manifest(encoding_id, output, output_path):
+def _create_hls_manifest(snapshot, output, output_path):
     """
     Create an HLS manifest using the generated FMP4 muxings.
     Loop through all FMP4 muxings and add audio or video entries to the HLS manifest.
 
-    :param encoding_id: The ID of the encoding whose muxings are being processed.
+    :param snapshot: EncodingSnapshot of the encoding whose muxings are being processed.
     :param output: A GcsOutput (or other Output) object to specify the target output location.
     :param output_path: Base output path in the bucket for the manifest and segments.
     :return: HlsManifest object that was created.
@@ -306,27 +341,21 @@ def _create_hls_manifest(encoding_id, output, output_path):
         )
     )
 
-    # Retrieve all FMP4 muxings from the encoding,
+    # Walk all FMP4 muxings of the encoding snapshot,
     # then match them to their streams, and add them to the HLS manifest.
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(
-            encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
 
         # Skip advanced per-title templates if found
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        # Identify if the muxing belongs to an AAC (audio) or H.265 (video) stream
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-
         # Build the relative segment path for the manifest
         segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
 
-        if codec.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             # Build an HLS audio group
-            audio_codec = bitmovin_api.encoding.configurations.audio.aac.get(
-                configuration_id=stream.codec_config_id)
+            audio_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.media.audio.create(
                 manifest_id=hls_manifest.id,
                 audio_media_info=AudioMediaInfo(
@@ -334,14 +363,14 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     group_id='audio',
                     language='en',
                     segment_path=segment_path,
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id,
                     uri=f'audio_{audio_codec.bitrate}.m3u8'))
 
-        elif codec.type == CodecConfigType.H265:
+        elif rendition.codec_type == CodecConfigType.H265:
             # Build an HLS video stream
-            video_codec = bitmovin_api.encoding.configurations.video.h265.get(configuration_id=stream.codec_config_id)
+            video_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.streams.create(
                 manifest_id=hls_manifest.id,
                 stream_info=StreamInfo(
@@ -349,19 +378,19 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     closed_captions='NONE',
                     segment_path=segment_path,
                     uri=f'video_{video_codec.bitrate}.m3u8',
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id))
 
     return hls_manifest
 
 
-def _create_dash_manifest(encoding_id, output, output_path):
+def _create_dash_manifest(snapshot, output, output_path):
     """
     Create a DASH manifest by building a Period, adding Video and Audio Adaptation Sets,
     and appending FMP4 representations for each muxing/stream combination.
 
-    :param encoding_id: The ID of the encoding to associate with this manifest.
+    :param snapshot: EncodingSnapshot of the encoding to associate with this manifest.
     :param output: A GcsOutput (or other Output) for the manifest's final location.
     :param output_path: Base output path in the bucket where the manifest files will be written.
     :return: DashManifest object that was created.
@@ -395,40 +424,36 @@ def _create_dash_manifest(encoding_id, output, output_path):
         manifest_id=dash_manifest.id,
         period_id=period.id)
 
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(
-            encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
 
         # Skip advanced per-title templates if found
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        # Identify if the muxing is for an AAC or H.265 stream
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
         segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
 
-        if codec.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             # Attach this muxing to the audio adaptation set
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=audio_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
                     segment_path=segment_path))
 
-        elif codec.type == CodecConfigType.H265:
+        elif rendition.codec_type == CodecConfigType.H265:
             # Attach this muxing to the video adaptation set
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=video_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
@@ -446,9 +471,6 @@ def _execute_hls_manifest_generation(hls_manifest):
     bitmovin_api.encoding.manifests.hls.start(manifest_id=hls_manifest.id)
 
     task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-
-    while task.status is not Status.FINISHED and task.status is not Status.ERROR:
-        task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
     if task.status is Status.ERROR:
         _log_task_errors(task=task)
         raise Exception("HLS Manifest Creation failed")
@@ -465,9 +487,6 @@ def _execute_dash_manifest_generation(dash_manifest):
     bitmovin_api.encoding.manifests.dash.start(manifest_id=dash_manifest.id)
 
     task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-
-    while task.status is not Status.FINISHED and task.status is not Status.ERROR:
-        task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
     if task.status is Status.ERROR:
         _log_task_errors(task=task)
         raise Exception("DASH Manifest Creation failed")
@@ -477,44 +496,50 @@ def _execute_dash_manifest_generation(dash_manifest):
 
 def _wait_for_encoding_to_finish(encoding_id):
     """
-    Poll the encoding status every 5 seconds until
+    Poll the encoding status with adaptive intervals until
     it either finishes or encounters an error.
 
     :param encoding_id: The ID of the encoding to poll.
     :return: The final task status of the encoding.
     """
-    time.sleep(5)
-    task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
-    print(f"Encoding status is {task.status} (progress: {task.progress} %)")
-    return task
+    def fetch_status():
+        task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
+        print(f"Encoding status is {task.status} (progress: {task.progress} %)")
+        return task
+
+    return poll_task(fetch_status, schedule=ENCODING_SCHEDULE)
 
 
 def _wait_for_hls_manifest_to_finish(manifest_id):
     """
-    Poll the HLS manifest creation status every 5 seconds
+    Poll the HLS manifest creation status with adaptive intervals
     until it either finishes or encounters an error.
 
     :param manifest_id: The ID of the HLS manifest to poll.
     :return: The final task status of the HLS manifest creation process.
     """
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.hls.status(manifest_id=manifest_id)
-    print(f"HLS manifest status is {task.status} (progress: {task.progress} %)")
-    return task
+    def fetch_status():
+        task = bitmovin_api.encoding.manifests.hls.status(manifest_id=manifest_id)
+        print(f"HLS manifest status is {task.status} (progress: {task.progress} %)")
+        return task
+
+    return poll_task(fetch_status, schedule=MANIFEST_SCHEDULE)
 
 
 def _wait_for_dash_manifest_to_finish(manifest_id):
     """
-    Poll the DASH manifest creation status every 5 seconds
+    Poll the DASH manifest creation status with adaptive intervals
     until it either finishes or encounters an error.
 
     :param manifest_id: The ID of the DASH manifest to poll.
     :return: The final task status of the DASH manifest creation process.
     """
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.dash.status(manifest_id=manifest_id)
-    print("DASH manifest status is {} (progress: {} %)".format(task.status, task.progress))
-    return task
+    def fetch_status():
+        task = bitmovin_api.encoding.manifests.dash.status(manifest_id=manifest_id)
+        print("DASH manifest status is {} (progress: {} %)".format(task.status, task.progress))
+        return task
+
+    return poll_task(fetch_status, schedule=MANIFEST_SCHEDULE)
 
 
 def _remove_output_base_path(text):
@@ -1,4 +1,7 @@
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
 
 from bitmovin_api_sdk import BitmovinApi, Label
 from bitmovin_api_sdk import S3Input, S3Output
@@ -15,6 +18,17 @@ from bitmovin_api_sdk import DashFmp4Representation, DashRepresentationType, Das
 from bitmovin_api_sdk import MessageType, StartEncodingRequest
 from bitmovin_api_sdk import Status
 
+from bmenc.chains import create_renditions
+from bmenc.checkpoint import Checkpoint
+from bmenc.codec_configs import CodecConfigCache
+from bmenc.manifests import attach_manifests, generate_manifests
+from bmenc.storage import StorageRegistry
+from bmenc.transport import use_session
+from bmenc.ratelimit import use_scheduler
+from bmenc.registry import EncodingRegistry, resolve_encoding_snapshot
+from bmenc.polling import poll_task, ENCODING_SCHEDULE, MANIFEST_SCHEDULE
+from bmenc.webhooks import WebhookReceiver, register_encoding_webhooks, wait_for_encoding_notification
+
 TEST_ITEM = "multi-audio-h264-aac-fmp4-hls-dash"
 
 API_KEY = '<INSERT YOUR API KEY>'
@@ -33,7 +47,18 @@ S3_OUTPUT_BUCKET_NAME = '<INSERT_YOUR_BUCKET_NAME>'
 
 OUTPUT_BASE_PATH = f'output/{TEST_ITEM}/'
 
-bitmovin_api = BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)
+# Optional: a publicly reachable URL forwarding to WEBHOOK_PORT on this machine.
+# When set, the encoding reports finished/error via webhooks instead of being polled.
+WEBHOOK_URL = None
+WEBHOOK_PORT = 8080
+
+# Set to True to build the manifests before the encoding starts and have the encoder write them
+# at the end of the job (manifest generator V2) instead of generating them after the encoding.
+ENCODER_MANIFESTS = False
+
+bitmovin_api = use_scheduler(use_session(BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)))
+codec_configs = CodecConfigCache(bitmovin_api)
+storage = StorageRegistry(bitmovin_api)
 
 # Example H.264 encoding profiles, including different resolutions, bitrates, and profiles.
 video_encoding_profiles = [
@@ -51,7 +76,7 @@ audio_encoding_profiles = [
 ]
 
 
-def main():
+def main(input_path=INPUT_PATH_1, output_base_path=OUTPUT_BASE_PATH, checkpoint=None):
     """
     Main entry point for the encoding script.
     This demonstrates a basic Bitmovin encoding workflow using H.264 video and AAC audio. Steps:
@@ -63,18 +88,19 @@ def main():
       6) Start the encoding (FMP4 muxing outputs)
       7) Generate HLS and DASH manifests
     """
+    checkpoint = checkpoint or Checkpoint()
 
     # 1) S3 Input/Output
-    s3_input = bitmovin_api.encoding.inputs.s3.create(
-        s3_input=S3Input(
+    s3_input = storage.get_or_create(
+        S3Input(
             access_key=S3_INPUT_ACCESS_KEY,
             secret_key=S3_INPUT_SECRET_KEY,
             bucket_name=S3_INPUT_BUCKET_NAME,
             name='Test S3 Input'
         )
     )
-    s3_output = bitmovin_api.encoding.outputs.s3.create(
-        s3_output=S3Output(
+    s3_output = storage.get_or_create(
+        S3Output(
             access_key=S3_OUTPUT_ACCESS_KEY,
             secret_key=S3_OUTPUT_SECRET_KEY,
             bucket_name=S3_OUTPUT_BUCKET_NAME,
@@ -90,13 +116,14 @@ def main():
             encoder_version='STABLE'
         )
     )
+    registry = EncodingRegistry(encoding_id=encoding.id)
 
     # 3) Input Streams
     video_ingest_input_stream = bitmovin_api.encoding.encodings.input_streams.ingest.create(
         encoding_id=encoding.id,
         ingest_input_stream=IngestInputStream(
             input_id=s3_input.id,
-            input_path=INPUT_PATH_1,
+            input_path=input_path,
             selection_mode=StreamSelectionMode.VIDEO_RELATIVE,
             position=0
         )
@@ -105,7 +132,7 @@ def main():
         encoding_id=encoding.id,
         ingest_input_stream=IngestInputStream(
             input_id=s3_input.id,
-            input_path=INPUT_PATH_1,
+            input_path=input_path,
             selection_mode=StreamSelectionMode.AUDIO_RELATIVE,
             position=0
         )
@@ -125,7 +152,7 @@ def main():
     audio_input_stream_commentary = StreamInput(input_stream_id=audio_ingest_input_stream_2.id)
 
     # 4) Create Video Streams + Muxings
-    for video_profile in video_encoding_profiles:
+    def create_video_rendition(video_profile, registry):
         color_config = ColorConfig(
             copy_color_primaries_flag=True,
             copy_color_transfer_flag=True,
@@ -154,8 +181,9 @@ def main():
         else:
             raise Exception("Unknown profile. Valid profiles: HIGH, MAIN, BASELINE.")
 
-        h264_codec = bitmovin_api.encoding.configurations.video.h264.create(
-            h264_video_configuration=H264VideoConfiguration(
+        h264_codec = codec_configs.get_or_create(
+            CodecConfigType.H264,
+            H264VideoConfiguration(
                 name='Sample video codec configuration',
                 height=video_profile.get("height"),
                 bitrate=video_profile.get("bitrate"),
@@ -174,6 +202,7 @@ def main():
                 preset_configuration=PresetConfiguration.VOD_HIGH_QUALITY
             )
         )
+        registry.add_codec_config(CodecConfigType.H264, h264_codec)
 
         h264_stream = bitmovin_api.encoding.encodings.streams.create(
             encoding_id=encoding.id,
@@ -184,14 +213,15 @@ def main():
                 mode=video_profile.get('mode')
             )
         )
+        registry.add_stream(h264_stream)
 
         video_muxing_output = EncodingOutput(
             output_id=s3_output.id,
-            output_path=f"{OUTPUT_BASE_PATH}video/{video_profile.get('height')}p",
+            output_path=f"{output_base_path}video/{video_profile.get('height')}p",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)]
         )
 
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -202,16 +232,19 @@ def main():
                 name=f"Video FMP4 Muxing {video_profile.get('height')}p"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
 
     # 5) Create Audio Streams + Muxings
-    for audio_profile in audio_encoding_profiles:
-        audio_codec = bitmovin_api.encoding.configurations.audio.aac.create(
-            aac_audio_configuration=AacAudioConfiguration(
+    def create_audio_rendition(audio_profile, registry):
+        audio_codec = codec_configs.get_or_create(
+            CodecConfigType.AAC,
+            AacAudioConfiguration(
                 bitrate=audio_profile.get("bitrate"),
                 rate=audio_profile.get("rate"),
                 channel_layout=audio_profile.get("channel_layout"),
             )
         )
+        registry.add_codec_config(CodecConfigType.AAC, audio_codec)
 
         aac_stream_main = bitmovin_api.encoding.encodings.streams.create(
             encoding_id=encoding.id,
@@ -222,6 +255,7 @@ def main():
                 mode=StreamMode.STANDARD
             )
         )
+        registry.add_stream(aac_stream_main)
 
         aac_stream_commentary = bitmovin_api.encoding.encodings.streams.create(
             encoding_id=encoding.id,
@@ -232,13 +266,14 @@ def main():
                 mode=StreamMode.STANDARD
             )
         )
+        registry.add_stream(aac_stream_commentary)
 
         audio_muxing_output_main = EncodingOutput(
             output_id=s3_output.id,
-            output_path=f"{OUTPUT_BASE_PATH}audio/main/{audio_profile.get('bitrate')}",
+            output_path=f"{output_base_path}audio/main/{audio_profile.get('bitrate')}",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)]
         )
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -249,13 +284,14 @@ def main():
                 name=f"Audio FMP4 Muxing {audio_profile.get('bitrate') / 1000:.0f}kbps"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
 
         audio_muxing_output_commentary = EncodingOutput(
             output_id=s3_output.id,
-            output_path=f"{OUTPUT_BASE_PATH}audio/commentary/{audio_profile.get('bitrate')}",
+            output_path=f"{output_base_path}audio/commentary/{audio_profile.get('bitrate')}",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)]
         )
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -266,38 +302,61 @@ def main():
                 name=f"Audio FMP4 Muxing {audio_profile.get('bitrate') / 1000:.0f}kbps"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
 
-    # 6) Start Encoding (no manifest in request)
-    start_encoding_request = StartEncodingRequest()
-    _execute_encoding(encoding=encoding, start_encoding_request=start_encoding_request)
+    # Renditions are independent, so their chains are created concurrently.
+    create_renditions(
+        registry,
+        (create_video_rendition, video_encoding_profiles),
+        (create_audio_rendition, audio_encoding_profiles)
+    )
+
+    # 6) Create HLS/DASH manifests
+    snapshot = resolve_encoding_snapshot(
+        bitmovin_api, encoding_id=encoding.id, muxing_types=['fmp4'], registry=registry)
+    hls_manifest = _create_hls_manifest(snapshot=snapshot, output=s3_output, output_path=output_base_path)
+    dash_manifest = _create_dash_manifest(snapshot=snapshot, output=s3_output, output_path=output_base_path)
+    manifests = [('hls', hls_manifest), ('dash', dash_manifest)]
 
-    # 7) Create HLS/DASH manifests
-    hls_manifest = _create_hls_manifest(encoding_id=encoding.id, output=s3_output, output_path=OUTPUT_BASE_PATH)
-    dash_manifest = _create_dash_manifest(encoding_id=encoding.id, output=s3_output, output_path=OUTPUT_BASE_PATH)
+    # 7) Start Encoding
+    start_encoding_request = StartEncodingRequest()
+    if ENCODER_MANIFESTS:
+        attach_manifests(start_encoding_request, manifests)
+    checkpoint.prepared(encoding_id=encoding.id, output_id=s3_output.id, output_path=output_base_path,
+                        muxing_types=['fmp4'],
+                        encoder_manifests=manifests if ENCODER_MANIFESTS else ())
+    _execute_encoding(encoding=encoding, start_encoding_request=start_encoding_request, checkpoint=checkpoint)
 
-    # 8) Generate HLS/DASH
-    _execute_hls_manifest_generation(hls_manifest=hls_manifest)
-    _execute_dash_manifest_generation(dash_manifest=dash_manifest)
+    # 8) Generate HLS/DASH, unless the encoder writes them
+    if not ENCODER_MANIFESTS:
+        generate_manifests(bitmovin_api, manifests,
+                           on_generated=checkpoint.manifest_generated, schedule=MANIFEST_SCHEDULE)
 
 
-def _execute_encoding(encoding, start_encoding_request):
+def _execute_encoding(encoding, start_encoding_request, checkpoint):
     """
     Start the encoding process on Bitmovin and poll until it finishes or fails.
     """
-    bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
-    task = _wait_for_encoding_to_finish(encoding_id=encoding.id)
-
-    while task.status not in [Status.FINISHED, Status.ERROR]:
+    if WEBHOOK_URL:
+        with WebhookReceiver(port=WEBHOOK_PORT) as receiver:
+            register_encoding_webhooks(bitmovin_api, encoding_id=encoding.id, url=WEBHOOK_URL)
+            bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
+            checkpoint.started()
+            task = wait_for_encoding_notification(bitmovin_api, encoding_id=encoding.id, receiver=receiver)
+    else:
+        bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
+        checkpoint.started()
         task = _wait_for_encoding_to_finish(encoding_id=encoding.id)
 
     if task.status == Status.ERROR:
         _log_task_errors(task)
         raise Exception("Encoding failed")
 
+    checkpoint.encoded()
     print("Encoding finished successfully")
 
 
-def _create_hls_manifest(encoding_id, output, output_path):
+def _create_hls_manifest(snapshot, output, output_path):
     """
     Create an HLS manifest from the generated FMP4 muxings.
     Loop through all FMP4 muxings and add audio or video entries to the HLS manifest.
@@ -318,19 +377,17 @@ def _create_hls_manifest(encoding_id, output, output_path):
         )
     )
 
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-        segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
+        segment_path = _remove_output_base_path(muxing.outputs[0].output_path, output_path)
 
-        if codec.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             # HLS audio
             if 'main' in segment_path:
-                audio_codec = bitmovin_api.encoding.configurations.audio.aac.get(configuration_id=stream.codec_config_id)
+                audio_codec = rendition.codec_config
                 bitmovin_api.encoding.manifests.hls.media.audio.create(
                     manifest_id=hls_manifest.id,
                     audio_media_info=AudioMediaInfo(
@@ -338,7 +395,7 @@ def _create_hls_manifest(encoding_id, output, output_path):
                         group_id='AUDIO_AAC',
                         language='en',
                         segment_path=segment_path,
-                        encoding_id=encoding_id,
+                        encoding_id=snapshot.encoding_id,
                         stream_id=stream.id,
                         muxing_id=muxing.id,
                         is_default=True,
@@ -347,7 +404,7 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     )
                 )
             elif 'commentary' in segment_path:
-                audio_codec = bitmovin_api.encoding.configurations.audio.aac.get(configuration_id=stream.codec_config_id)
+                audio_codec = rendition.codec_config
                 bitmovin_api.encoding.manifests.hls.media.audio.create(
                     manifest_id=hls_manifest.id,
                     audio_media_info=AudioMediaInfo(
@@ -355,7 +412,7 @@ def _create_hls_manifest(encoding_id, output, output_path):
                         group_id='AUDIO_AAC',
                         language='en',
                         segment_path=segment_path,
-                        encoding_id=encoding_id,
+                        encoding_id=snapshot.encoding_id,
                         stream_id=stream.id,
                         muxing_id=muxing.id,
                         is_default=False,
@@ -363,9 +420,9 @@ def _create_hls_manifest(encoding_id, output, output_path):
                         uri=f'audio_commentary_{audio_codec.bitrate}.m3u8'
                     )
                 )
-        elif codec.type == CodecConfigType.H264:
+        elif rendition.codec_type == CodecConfigType.H264:
             # HLS video
-            video_codec = bitmovin_api.encoding.configurations.video.h264.get(configuration_id=stream.codec_config_id)
+            video_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.streams.create(
                 manifest_id=hls_manifest.id,
                 stream_info=StreamInfo(
@@ -373,7 +430,7 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     closed_captions='NONE',
                     segment_path=segment_path,
                     uri=f'video_{video_codec.bitrate}.m3u8',
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id
                 )
@@ -382,7 +439,7 @@ def _create_hls_manifest(encoding_id, output, output_path):
     return hls_manifest
 
 
-def _create_dash_manifest(encoding_id, output, output_path):
+def _create_dash_manifest(snapshot, output, output_path):
     """
     Create a DASH manifest by creating a Period, adding Video/Audio Adaptation Sets,
     and attaching each FMP4 representation.
@@ -422,23 +479,21 @@ def _create_dash_manifest(encoding_id, output, output_path):
         period_id=period.id
     )
 
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-        segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
+        segment_path = _remove_output_base_path(muxing.outputs[0].output_path, output_path)
 
-        if codec.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             if 'main' in segment_path:
                 bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                     manifest_id=dash_manifest.id,
                     period_id=period.id,
                     adaptationset_id=audio_adaptation_set_main.id,
                     dash_fmp4_representation=DashFmp4Representation(
-                        encoding_id=encoding_id,
+                        encoding_id=snapshot.encoding_id,
                         muxing_id=muxing.id,
                         type_=DashRepresentationType.TEMPLATE,
                         mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
@@ -451,20 +506,20 @@ def _create_dash_manifest(encoding_id, output, output_path):
                     period_id=period.id,
                     adaptationset_id=audio_adaptation_set_commentary.id,
                     dash_fmp4_representation=DashFmp4Representation(
-                        encoding_id=encoding_id,
+                        encoding_id=snapshot.encoding_id,
                         muxing_id=muxing.id,
                         type_=DashRepresentationType.TEMPLATE,
                         mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
                         segment_path=segment_path
                     )
                 )
-        elif codec.type == CodecConfigType.H264:
+        elif rendition.codec_type == CodecConfigType.H264:
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=video_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
@@ -475,76 +530,24 @@ def _create_dash_manifest(encoding_id, output, output_path):
     return dash_manifest
 
 
-def _execute_hls_manifest_generation(hls_manifest):
-    """
-    Start HLS manifest generation and poll until completed or fails.
-    """
-    bitmovin_api.encoding.manifests.hls.start(manifest_id=hls_manifest.id)
-    task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-
-    while task.status not in [Status.FINISHED, Status.ERROR]:
-        task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-
-    if task.status == Status.ERROR:
-        _log_task_errors(task)
-        raise Exception("HLS Manifest creation failed")
-
-    print("HLS Manifest creation finished successfully")
-
-
-def _execute_dash_manifest_generation(dash_manifest):
-    """
-    Start DASH manifest generation and poll until completed or fails.
-    """
-    bitmovin_api.encoding.manifests.dash.start(manifest_id=dash_manifest.id)
-    task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-
-    while task.status not in [Status.FINISHED, Status.ERROR]:
-        task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-
-    if task.status == Status.ERROR:
-        _log_task_errors(task)
-        raise Exception("DASH Manifest creation failed")
-
-    print("DASH Manifest creation finished successfully")
-
-
 def _wait_for_encoding_to_finish(encoding_id):
     """
-    Poll encoding status every 5 seconds until finished or an error occurs.
-    """
-    time.sleep(5)
-    task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
-    print(f"Encoding status is {task.status} (progress: {task.progress} %)")
-    return task
-
-
-def _wait_for_hls_manifest_to_finish(manifest_id):
-    """
-    Poll HLS manifest creation status every 5 seconds until finished or an error occurs.
+    Poll encoding status with adaptive intervals until finished or an error occurs.
     """
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.hls.status(manifest_id=manifest_id)
-    print(f"HLS manifest status is {task.status} (progress: {task.progress} %)")
-    return task
-
+    def fetch_status():
+        task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
+        print(f"Encoding status is {task.status} (progress: {task.progress} %)")
+        return task
 
-def _wait_for_dash_manifest_to_finish(manifest_id):
-    """
-    Poll DASH manifest creation status every 5 seconds until finished or an error occurs.
-    """
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.dash.status(manifest_id=manifest_id)
-    print(f"DASH manifest status is {task.status} (progress: {task.progress} %)")
-    return task
+    return poll_task(fetch_status, schedule=ENCODING_SCHEDULE)
 
 
-def _remove_output_base_path(text):
+def _remove_output_base_path(text, output_base_path=OUTPUT_BASE_PATH):
     """
-    Remove the OUTPUT_BASE_PATH prefix from the given path to create a relative segment path.
+    Remove the output_base_path prefix from the given path to create a relative segment path.
     """
-    if text.startswith(OUTPUT_BASE_PATH):
-        return text[len(OUTPUT_BASE_PATH):]
+    if text.startswith(output_base_path):
+        return text[len(output_base_path):]
     return text
 
 
@@ -1,4 +1,7 @@
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
 
 from bitmovin_api_sdk import BitmovinApi
 from bitmovin_api_sdk import S3Input, S3Output
@@ -19,6 +22,17 @@ from bitmovin_api_sdk import DashFmp4Representation, DashRepresentationType, Das
 from bitmovin_api_sdk import MessageType, StartEncodingRequest, StartManifestRequest, ManifestGenerator
 from bitmovin_api_sdk import Status
 
+from bmenc.chains import create_renditions
+from bmenc.checkpoint import Checkpoint
+from bmenc.codec_configs import CodecConfigCache
+from bmenc.manifests import attach_manifests, generate_manifests
+from bmenc.storage import StorageRegistry
+from bmenc.transport import use_session
+from bmenc.ratelimit import use_scheduler
+from bmenc.registry import EncodingRegistry, resolve_encoding_snapshot
+from bmenc.polling import poll_task, ENCODING_SCHEDULE, MANIFEST_SCHEDULE
+from bmenc.webhooks import WebhookReceiver, register_encoding_webhooks, wait_for_encoding_notification
+
 TEST_ITEM = "srt-to-segmented-vtt-h264-aac-fmp4-hls-dash"
 
 API_KEY = '<INSERT YOUR API KEY>'
@@ -39,7 +53,21 @@ S3_OUTPUT_BUCKET_NAME = '<INSERT_YOUR_BUCKET_NAME>'
 
 OUTPUT_BASE_PATH = f'output/{TEST_ITEM}/'
 
-bitmovin_api = BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)
+# Optional: a publicly reachable URL forwarding to WEBHOOK_PORT on this machine.
+# When set, the encoding reports finished/error via webhooks instead of being polled.
+WEBHOOK_URL = None
+WEBHOOK_PORT = 8080
+
+# Set to True to build the manifests before the encoding starts and have the encoder write them
+# at the end of the job (manifest generator V2) instead of generating them after the encoding.
+ENCODER_MANIFESTS = False
+
+# How the manifests are started when they are generated after the encoding.
+START_MANIFEST_REQUEST = StartManifestRequest(manifest_generator=ManifestGenerator.V2)
+
+bitmovin_api = use_scheduler(use_session(BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)))
+codec_configs = CodecConfigCache(bitmovin_api)
+storage = StorageRegistry(bitmovin_api)
 
 # Example H.264 encoding profiles, covering resolutions & bitrates
 video_encoding_profiles = [
@@ -58,7 +86,7 @@ audio_encoding_profiles = [
 ]
 
 
-def main():
+def main(input_path=INPUT_PATH, output_base_path=OUTPUT_BASE_PATH, checkpoint=None):
     """
     Main entry point for the encoding script.
     Demonstrates:
@@ -69,18 +97,19 @@ def main():
       5) Running the encoding
       6) Generating HLS and DASH manifests with chunked VTT subtitles
     """
+    checkpoint = checkpoint or Checkpoint()
 
     # === 1) Create S3 Input & Output resources ===
-    s3_input = bitmovin_api.encoding.inputs.s3.create(
-        s3_input=S3Input(
+    s3_input = storage.get_or_create(
+        S3Input(
             access_key=S3_INPUT_ACCESS_KEY,
             secret_key=S3_INPUT_SECRET_KEY,
             bucket_name=S3_INPUT_BUCKET_NAME,
             name='Test S3 Input'
         )
     )
-    s3_output = bitmovin_api.encoding.outputs.s3.create(
-        s3_output=S3Output(
+    s3_output = storage.get_or_create(
+        S3Output(
             access_key=S3_OUTPUT_ACCESS_KEY,
             secret_key=S3_OUTPUT_SECRET_KEY,
             bucket_name=S3_OUTPUT_BUCKET_NAME,
@@ -91,11 +120,12 @@ def main():
     # === 2) Create an Encoding object ===
     encoding = bitmovin_api.encoding.encodings.create(
         encoding=Encoding(
-            name=f"[{TEST_ITEM}] {INPUT_PATH}",
+            name=f"[{TEST_ITEM}] {input_path}",
             cloud_region=CloudRegion.AWS_AP_NORTHEAST_1,
             encoder_version='STABLE'
         )
     )
+    registry = EncodingRegistry(encoding_id=encoding.id)
 
     # === 3) Define Input Streams (Video, Audio, and SRT-based subtitles) ===
     # Video
@@ -103,7 +133,7 @@ def main():
         encoding_id=encoding.id,
         ingest_input_stream=IngestInputStream(
             input_id=s3_input.id,
-            input_path=INPUT_PATH,
+            input_path=input_path,
             selection_mode=StreamSelectionMode.VIDEO_RELATIVE,
             position=0
         )
@@ -114,7 +144,7 @@ def main():
         encoding_id=encoding.id,
         ingest_input_stream=IngestInputStream(
             input_id=s3_input.id,
-            input_path=INPUT_PATH,
+            input_path=input_path,
             selection_mode=StreamSelectionMode.AUDIO_RELATIVE,
             position=0
         )
@@ -135,7 +165,7 @@ def main():
     subtitle_input_stream = StreamInput(input_stream_id=srt_subtitle_file.id)
 
     # === 4) Create H.264 Streams + FMP4 Muxings ===
-    for video_profile in video_encoding_profiles:
+    def create_video_rendition(video_profile, registry):
         # Optional advanced color parameters: copy from source
         color_config = ColorConfig(
             copy_color_primaries_flag=True,
@@ -166,8 +196,9 @@ def main():
             raise Exception("Unknown profile. Valid H.264 profiles: HIGH, MAIN, BASELINE.")
 
         # Create H.264 codec configuration
-        h264_codec = bitmovin_api.encoding.configurations.video.h264.create(
-            h264_video_configuration=H264VideoConfiguration(
+        h264_codec = codec_configs.get_or_create(
+            CodecConfigType.H264,
+            H264VideoConfiguration(
                 name='Sample video codec configuration',
                 height=video_profile.get("height"),
                 bitrate=video_profile.get("bitrate"),
@@ -186,6 +217,7 @@ def main():
                 preset_configuration=PresetConfiguration.VOD_HIGH_QUALITY
             )
         )
+        registry.add_codec_config(CodecConfigType.H264, h264_codec)
 
         # Create a video stream for the above H.264 config
         h264_stream = bitmovin_api.encoding.encodings.streams.create(
@@ -197,14 +229,15 @@ def main():
                 mode=video_profile.get('mode')
             )
         )
+        registry.add_stream(h264_stream)
 
         # Mux the stream into FMP4 segments
         video_muxing_output = EncodingOutput(
             output_id=s3_output.id,
-            output_path=f"{OUTPUT_BASE_PATH}video/{video_profile.get('height')}p",
+            output_path=f"{output_base_path}video/{video_profile.get('height')}p",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)]
         )
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -215,17 +248,20 @@ def main():
                 name=f"Video FMP4 Muxing {video_profile.get('height')}p"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
 
     # === 5) Create AAC Audio Streams + FMP4 Muxings ===
-    for audio_profile in audio_encoding_profiles:
+    def create_audio_rendition(audio_profile, registry):
         # Create AAC codec configuration
-        aac_codec = bitmovin_api.encoding.configurations.audio.aac.create(
-            aac_audio_configuration=AacAudioConfiguration(
+        aac_codec = codec_configs.get_or_create(
+            CodecConfigType.AAC,
+            AacAudioConfiguration(
                 bitrate=audio_profile.get("bitrate"),
                 rate=audio_profile.get("rate"),
                 channel_layout=AacChannelLayout.CL_STEREO
             )
         )
+        registry.add_codec_config(CodecConfigType.AAC, aac_codec)
 
         # Create an audio stream for AAC
         aac_stream = bitmovin_api.encoding.encodings.streams.create(
@@ -237,14 +273,15 @@ def main():
                 mode=StreamMode.STANDARD
             )
         )
+        registry.add_stream(aac_stream)
 
         # Mux the audio stream into FMP4 segments
         audio_muxing_output = EncodingOutput(
             output_id=s3_output.id,
-            output_path=f"{OUTPUT_BASE_PATH}audio/{audio_profile.get('bitrate')}",
+            output_path=f"{output_base_path}audio/{audio_profile.get('bitrate')}",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)]
         )
-        bitmovin_api.encoding.encodings.muxings.fmp4.create(
+        fmp4_muxing = bitmovin_api.encoding.encodings.muxings.fmp4.create(
             encoding_id=encoding.id,
             fmp4_muxing=Fmp4Muxing(
                 segment_length=6,
@@ -255,15 +292,25 @@ def main():
                 name=f"Audio FMP4 Muxing {audio_profile.get('bitrate') / 1000:.0f}kbps"
             )
         )
+        registry.add_muxing('fmp4', fmp4_muxing)
+
+    # Renditions are independent, so their chains are created concurrently.
+    create_renditions(
+        registry,
+        (create_video_rendition, video_encoding_profiles),
+        (create_audio_rendition, audio_encoding_profiles)
+    )
 
     # === Convert SRT to Segmented WebVTT (Chunked Text Muxing) ===
     # Create a WebVTT configuration
-    vtt_configuration = bitmovin_api.encoding.configurations.subtitles.webvtt.create(
-        web_vtt_configuration=WebVttConfiguration(
+    vtt_configuration = codec_configs.get_or_create(
+        CodecConfigType.WEBVTT,
+        WebVttConfiguration(
             # Adjust if you want to keep or remove cue identifiers
             cue_identifier_policy=WebVttCueIdentifierPolicy.OMIT_IDENTIFIERS
         )
     )
+    registry.add_codec_config(CodecConfigType.WEBVTT, vtt_configuration)
 
     # Create a stream that references the SRT input as a VTT configuration
     vtt_subtitle_stream = bitmovin_api.encoding.encodings.streams.create(
@@ -275,14 +322,15 @@ def main():
             mode=StreamMode.STANDARD
         )
     )
+    registry.add_stream(vtt_subtitle_stream)
 
     # Mux the VTT stream into segmented WebVTT
     vtt_muxing_output = EncodingOutput(
         output_id=s3_output.id,
-        output_path=f"{OUTPUT_BASE_PATH}vtt",
+        output_path=f"{output_base_path}vtt",
         acl=[AclEntry(permission=AclPermission.PUBLIC_READ)]
     )
-    bitmovin_api.encoding.encodings.muxings.chunked_text.create(
+    chunked_text_muxing = bitmovin_api.encoding.encodings.muxings.chunked_text.create(
         encoding_id=encoding.id,
         chunked_text_muxing=ChunkedTextMuxing(
             segment_length=6,
@@ -291,38 +339,54 @@ def main():
             outputs=[vtt_muxing_output]
         )
     )
+    registry.add_muxing('chunked_text', chunked_text_muxing)
 
-    # === 6) Start the encoding (without including manifest creation) ===
-    start_encoding_request = StartEncodingRequest()
-    _execute_encoding(encoding=encoding, start_encoding_request=start_encoding_request)
+    # === 6) Build HLS and DASH manifests referencing the generated streams ===
+    snapshot = resolve_encoding_snapshot(
+        bitmovin_api, encoding_id=encoding.id, muxing_types=['fmp4', 'chunked_text'], registry=registry)
+    hls_manifest = _create_hls_manifest(snapshot=snapshot, output=s3_output, output_path=output_base_path)
+    dash_manifest = _create_dash_manifest(snapshot=snapshot, output=s3_output, output_path=output_base_path)
+    manifests = [('hls', hls_manifest), ('dash', dash_manifest)]
 
-    # === 7) Build HLS and DASH manifests referencing the generated streams ===
-    hls_manifest = _create_hls_manifest(encoding_id=encoding.id, output=s3_output, output_path=OUTPUT_BASE_PATH)
-    dash_manifest = _create_dash_manifest(encoding_id=encoding.id, output=s3_output, output_path=OUTPUT_BASE_PATH)
+    # === 7) Start the encoding ===
+    start_encoding_request = StartEncodingRequest()
+    if ENCODER_MANIFESTS:
+        attach_manifests(start_encoding_request, manifests)
+    checkpoint.prepared(encoding_id=encoding.id, output_id=s3_output.id, output_path=output_base_path,
+                        muxing_types=['fmp4', 'chunked_text'],
+                        encoder_manifests=manifests if ENCODER_MANIFESTS else ())
+    _execute_encoding(encoding=encoding, start_encoding_request=start_encoding_request, checkpoint=checkpoint)
 
-    # === 8) Generate the HLS and DASH manifests ===
-    _execute_hls_manifest_generation(hls_manifest=hls_manifest)
-    _execute_dash_manifest_generation(dash_manifest=dash_manifest)
+    # === 8) Generate the HLS and DASH manifests, unless the encoder writes them ===
+    if not ENCODER_MANIFESTS:
+        generate_manifests(bitmovin_api, manifests, on_generated=checkpoint.manifest_generated,
+                           schedule=MANIFEST_SCHEDULE, start_manifest_request=START_MANIFEST_REQUEST)
 
 
-def _execute_encoding(encoding, start_encoding_request):
+def _execute_encoding(encoding, start_encoding_request, checkpoint):
     """
     Start the encoding process on Bitmovin and poll until it finishes or fails.
     """
-    bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
-    task = _wait_for_encoding_to_finish(encoding_id=encoding.id)
-
-    while task.status not in [Status.FINISHED, Status.ERROR]:
+    if WEBHOOK_URL:
+        with WebhookReceiver(port=WEBHOOK_PORT) as receiver:
+            register_encoding_webhooks(bitmovin_api, encoding_id=encoding.id, url=WEBHOOK_URL)
+            bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
+            checkpoint.started()
+            task = wait_for_encoding_notification(bitmovin_api, encoding_id=encoding.id, receiver=receiver)
+    else:
+        bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
+        checkpoint.started()
         task = _wait_for_encoding_to_finish(encoding_id=encoding.id)
 
     if task.status == Status.ERROR:
         _log_task_errors(task)
         raise Exception("Encoding failed")
 
+    checkpoint.encoded()
     print("Encoding finished successfully")
 
 
-def _create_hls_manifest(encoding_id, output, output_path):
+def _create_hls_manifest(snapshot, output, output_path):
     """
     Create an HLS manifest from all generated FMP4 muxings and
     add chunked text subtitles as a separate HLS track.
@@ -344,21 +408,16 @@ def _create_hls_manifest(encoding_id, output, output_path):
     )
 
     # Scan all FMP4 muxings
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(
-            encoding_id=encoding_id,
-            stream_id=muxing.streams[0].stream_id
-        )
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        codec_type = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-        segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
+        segment_path = _remove_output_base_path(muxing.outputs[0].output_path, output_path)
 
-        if codec_type.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             # HLS Audio
-            audio_codec = bitmovin_api.encoding.configurations.audio.aac.get(configuration_id=stream.codec_config_id)
+            audio_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.media.audio.create(
                 manifest_id=hls_manifest.id,
                 audio_media_info=AudioMediaInfo(
@@ -366,15 +425,15 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     group_id='audio',
                     language='en',
                     segment_path=segment_path,
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id,
                     uri=f'audio_{audio_codec.bitrate}.m3u8'
                 )
             )
-        elif codec_type.type == CodecConfigType.H264:
+        elif rendition.codec_type == CodecConfigType.H264:
             # HLS Video
-            video_codec = bitmovin_api.encoding.configurations.video.h264.get(configuration_id=stream.codec_config_id)
+            video_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.streams.create(
                 manifest_id=hls_manifest.id,
                 stream_info=StreamInfo(
@@ -382,28 +441,26 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     closed_captions='NONE',
                     segment_path=segment_path,
                     uri=f'video_{video_codec.bitrate}.m3u8',
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id
                 )
             )
 
     # Locate chunked WebVTT muxing and attach as HLS subtitles
-    chunked_text_muxings = bitmovin_api.encoding.encodings.muxings.chunked_text.list(encoding_id=encoding_id).items
+    chunked_text_muxings = snapshot.muxings['chunked_text']
     if chunked_text_muxings:
         # For simplicity, only referencing the first chunked text muxing
         chunked_muxing = chunked_text_muxings[0]
-        subtitle_stream = bitmovin_api.encoding.encodings.streams.get(
-            encoding_id=encoding_id, stream_id=chunked_muxing.streams[0].stream_id
-        )
+        subtitle_stream = snapshot.streams[chunked_muxing.streams[0].stream_id]
 
-        vtt_segment_path = _remove_output_base_path(chunked_muxing.outputs[0].output_path)
+        vtt_segment_path = _remove_output_base_path(chunked_muxing.outputs[0].output_path, output_path)
         if 'vtt' in vtt_segment_path:
             bitmovin_api.encoding.manifests.hls.media.subtitles.create(
                 manifest_id=hls_manifest.id,
                 subtitles_media_info=SubtitlesMediaInfo(
                     name="vtt - sample",
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=chunked_muxing.id,
                     stream_id=subtitle_stream.id,
                     segment_path=vtt_segment_path,
@@ -416,7 +473,7 @@ def _create_hls_manifest(encoding_id, output, output_path):
     return hls_manifest
 
 
-def _create_dash_manifest(encoding_id, output, output_path):
+def _create_dash_manifest(snapshot, output, output_path):
     """
     Create a DASH manifest that includes video, audio, and chunked WebVTT subtitles.
     """
@@ -456,35 +513,33 @@ def _create_dash_manifest(encoding_id, output, output_path):
     )
 
     # Attach FMP4 (video/audio) muxings
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-        segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
+        segment_path = _remove_output_base_path(muxing.outputs[0].output_path, output_path)
 
-        if codec.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=audio_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
                     segment_path=segment_path
                 )
             )
-        elif codec.type == CodecConfigType.H264:
+        elif rendition.codec_type == CodecConfigType.H264:
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=video_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
@@ -493,17 +548,17 @@ def _create_dash_manifest(encoding_id, output, output_path):
             )
 
     # Attach chunked WebVTT subtitles
-    chunked_text_muxings = bitmovin_api.encoding.encodings.muxings.chunked_text.list(encoding_id=encoding_id).items
+    chunked_text_muxings = snapshot.muxings['chunked_text']
     if chunked_text_muxings:
         chunked_muxing = chunked_text_muxings[0]
-        vtt_segment_path = _remove_output_base_path(chunked_muxing.outputs[0].output_path)
+        vtt_segment_path = _remove_output_base_path(chunked_muxing.outputs[0].output_path, output_path)
 
         bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.chunked_text.create(
             manifest_id=dash_manifest.id,
             period_id=period.id,
             adaptationset_id=subtitle_adaptation_set.id,
             dash_chunked_text_representation=DashChunkedTextRepresentation(
-                encoding_id=encoding_id,
+                encoding_id=snapshot.encoding_id,
                 muxing_id=chunked_muxing.id,
                 segment_path=vtt_segment_path,
                 type_=DashRepresentationType.TIMELINE
@@ -513,82 +568,24 @@ def _create_dash_manifest(encoding_id, output, output_path):
     return dash_manifest
 
 
-def _execute_hls_manifest_generation(hls_manifest):
-    """
-    Start HLS manifest generation and poll until completed or fails.
-    """
-    bitmovin_api.encoding.manifests.hls.start(
-        manifest_id=hls_manifest.id,
-        start_manifest_request=StartManifestRequest(manifest_generator=ManifestGenerator.V2)
-    )
-    task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-
-    while task.status not in [Status.FINISHED, Status.ERROR]:
-        task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-
-    if task.status == Status.ERROR:
-        _log_task_errors(task)
-        raise Exception("HLS Manifest creation failed")
-
-    print("HLS Manifest creation finished successfully")
-
-
-def _execute_dash_manifest_generation(dash_manifest):
-    """
-    Start DASH manifest generation and poll until completed or fails.
-    """
-    bitmovin_api.encoding.manifests.dash.start(
-        manifest_id=dash_manifest.id,
-        start_manifest_request=StartManifestRequest(manifest_generator=ManifestGenerator.V2)
-    )
-    task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-
-    while task.status not in [Status.FINISHED, Status.ERROR]:
-        task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-
-    if task.status == Status.ERROR:
-        _log_task_errors(task)
-        raise Exception("DASH Manifest creation failed")
-
-    print("DASH Manifest creation finished successfully")
-
-
 def _wait_for_encoding_to_finish(encoding_id):
     """
-    Poll encoding status every 5 seconds until finished or an error occurs.
-    """
-    time.sleep(5)
-    task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
-    print(f"Encoding status is {task.status} (progress: {task.progress} %)")
-    return task
-
-
-def _wait_for_hls_manifest_to_finish(manifest_id):
-    """
-    Poll HLS manifest creation status every 5 seconds until finished or an error occurs.
+    Poll encoding status with adaptive intervals until finished or an error occurs.
     """
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.hls.status(manifest_id=manifest_id)
-    print(f"HLS manifest status is {task.status} (progress: {task.progress} %)")
-    return task
-
+    def fetch_status():
+        task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
+        print(f"Encoding status is {task.status} (progress: {task.progress} %)")
+        return task
 
-def _wait_for_dash_manifest_to_finish(manifest_id):
-    """
-    Poll DASH manifest creation status every 5 seconds until finished or an error occurs.
-    """
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.dash.status(manifest_id=manifest_id)
-    print(f"DASH manifest status is {task.status} (progress: {task.progress} %)")
-    return task
+    return poll_task(fetch_status, schedule=ENCODING_SCHEDULE)
 
 
-def _remove_output_base_path(text):
+def _remove_output_base_path(text, output_base_path=OUTPUT_BASE_PATH):
     """
     Strip the OUTPUT_BASE_PATH prefix from the given path, producing a relative segment path for HLS/DASH manifests.
     """
-    if text.startswith(OUTPUT_BASE_PATH):
-        return text[len(OUTPUT_BASE_PATH):]
+    if text.startswith(output_base_path):
+        return text[len(output_base_path):]
     return text
 
 
@@ -1,4 +1,7 @@
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
 from bitmovin_api_sdk import BitmovinApi
 from bitmovin_api_sdk import GcsInput, GcsOutput
@@ -16,6 +19,17 @@ from bitmovin_api_sdk import MessageType, StartEncodingRequest
 from bitmovin_api_sdk import PerTitle, H264PerTitleConfiguration, AutoRepresentation
 from bitmovin_api_sdk import Status
 
+from bmenc.chains import create_renditions
+from bmenc.checkpoint import Checkpoint
+from bmenc.codec_configs import CodecConfigCache
+from bmenc.manifests import generate_manifests
+from bmenc.storage import StorageRegistry
+from bmenc.transport import use_session
+from bmenc.ratelimit import use_scheduler
+from bmenc.snapshot import load_encoding_snapshot
+from bmenc.polling import poll_task, ENCODING_SCHEDULE, MANIFEST_SCHEDULE
+from bmenc.webhooks import WebhookReceiver, register_encoding_webhooks, wait_for_encoding_notification
+
 TEST_ITEM = "vod-pertitle-h264-aac-fmp4-default-hls-dash"
 
 API_KEY = '<INSERT YOUR API KEY>'
@@ -32,7 +46,14 @@ GCS_OUTPUT_BUCKET_NAME = '<INSERT_YOUR_BUCKET_NAME>'
 INPUT_PATH = '/path/to/your/input/file.mp4'  # 'inputs/big_buck_bunny_1080p_h264.mov'
 OUTPUT_BASE_PATH = f'output/{TEST_ITEM}/'
 
-bitmovin_api = BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)
+# Optional: a publicly reachable URL forwarding to WEBHOOK_PORT on this machine.
+# When set, the encoding reports finished/error via webhooks instead of being polled.
+WEBHOOK_URL = None
+WEBHOOK_PORT = 8080
+
+bitmovin_api = use_scheduler(use_session(BitmovinApi(api_key=API_KEY, tenant_org_id=ORG_ID)))
+codec_configs = CodecConfigCache(bitmovin_api)
+storage = StorageRegistry(bitmovin_api)
 
 video_encoding_profiles = [
     dict(height=None, bitrate=None, profile=ProfileH264.HIGH, level=None, mode=StreamMode.PER_TITLE_TEMPLATE)
@@ -44,16 +65,18 @@ audio_encoding_profiles = [
 ]
 
 
-def main():
+def main(input_path=INPUT_PATH, output_base_path=OUTPUT_BASE_PATH, checkpoint=None):
+    checkpoint = checkpoint or Checkpoint()
+
     # === Input and Output definition ===
-    gcs_input = bitmovin_api.encoding.inputs.gcs.create(
-        gcs_input=GcsInput(
+    gcs_input = storage.get_or_create(
+        GcsInput(
             access_key=GCS_INPUT_ACCESS_KEY,
             secret_key=GCS_INPUT_SECRET_KEY,
             bucket_name=GCS_INPUT_BUCKET_NAME,
             name='Test GCS Input'))
-    gcs_output = bitmovin_api.encoding.outputs.gcs.create(
-        gcs_output=GcsOutput(
+    gcs_output = storage.get_or_create(
+        GcsOutput(
             access_key=GCS_OUTPUT_ACCESS_KEY,
             secret_key=GCS_OUTPUT_SECRET_KEY,
             bucket_name=GCS_OUTPUT_BUCKET_NAME,
@@ -61,7 +84,7 @@ def main():
 
     # === Encoding instance definition ===
     encoding = bitmovin_api.encoding.encodings.create(encoding=Encoding(
-        name="[{}] {}".format(TEST_ITEM, INPUT_PATH),
+        name="[{}] {}".format(TEST_ITEM, input_path),
         cloud_region=CloudRegion.GOOGLE_ASIA_SOUTHEAST_1,
         encoder_version='STABLE'))
 
@@ -70,21 +93,21 @@ def main():
         encoding_id=encoding.id,
         ingest_input_stream=IngestInputStream(
             input_id=gcs_input.id,
-            input_path=INPUT_PATH,
+            input_path=input_path,
             selection_mode=StreamSelectionMode.VIDEO_RELATIVE,
             position=0))
     audio_ingest_input_stream = bitmovin_api.encoding.encodings.input_streams.ingest.create(
         encoding_id=encoding.id,
         ingest_input_stream=IngestInputStream(
             input_id=gcs_input.id,
-            input_path=INPUT_PATH,
+            input_path=input_path,
             selection_mode=StreamSelectionMode.AUDIO_RELATIVE,
             position=0))
     video_input_stream = StreamInput(input_stream_id=video_ingest_input_stream.id)
     audio_input_stream = StreamInput(input_stream_id=audio_ingest_input_stream.id)
 
     # === Video Profile definition ===
-    for video_profile in video_encoding_profiles:
+    def create_video_rendition(video_profile, registry):
         color_config = ColorConfig(copy_color_primaries_flag=True,
                                    copy_color_transfer_flag=True,
                                    copy_color_space_flag=True)
@@ -111,8 +134,9 @@ def main():
             raise Exception("Unknown profile")
 
         # Create Video Codec Configuration
-        h264_codec = bitmovin_api.encoding.configurations.video.h264.create(
-            h264_video_configuration=H264VideoConfiguration(
+        h264_codec = codec_configs.get_or_create(
+            CodecConfigType.H264,
+            H264VideoConfiguration(
                 name='Sample video codec configuration',
                 height=video_profile.get("height"),
                 profile=video_profile.get("profile"),
@@ -140,7 +164,7 @@ def main():
         # Create Fmp4 muxing output path
         video_muxing_output = EncodingOutput(
             output_id=gcs_output.id,
-            output_path=OUTPUT_BASE_PATH + "{height}p_{bitrate}_{uuid}",
+            output_path=output_base_path + "{height}p_{bitrate}_{uuid}",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)])
 
         # Create Fmp4 muxing
@@ -155,11 +179,12 @@ def main():
                 name="Video FMP4 Muxing PerTitle"))
 
     # === Audio Profile definition ===
-    for audio_profile in audio_encoding_profiles:
+    def create_audio_rendition(audio_profile, registry):
 
         # Create Audio Codec Configuration
-        aac_codec = bitmovin_api.encoding.configurations.audio.aac.create(
-            aac_audio_configuration=AacAudioConfiguration(
+        aac_codec = codec_configs.get_or_create(
+            CodecConfigType.AAC,
+            AacAudioConfiguration(
                 bitrate=audio_profile.get("bitrate"),
                 rate=audio_profile.get("rate"),
                 channel_layout=AacChannelLayout.CL_STEREO))
@@ -176,7 +201,7 @@ def main():
         # Create Fmp4 muxing output path
         audio_muxing_output = EncodingOutput(
             output_id=gcs_output.id,
-            output_path=f"{OUTPUT_BASE_PATH}audio/{audio_profile.get('bitrate')}",
+            output_path=f"{output_base_path}audio/{audio_profile.get('bitrate')}",
             acl=[AclEntry(permission=AclPermission.PUBLIC_READ)])
 
         # Create Fmp4 muxing
@@ -190,6 +215,13 @@ def main():
                 outputs=[audio_muxing_output],
                 name=f"Audio FMP4 Muxing {audio_profile.get('bitrate')/1000:.0f}kbps"))
 
+    # Renditions are independent, so their chains are created concurrently.
+    create_renditions(
+        None,
+        (create_video_rendition, video_encoding_profiles),
+        (create_audio_rendition, audio_encoding_profiles)
+    )
+
     # === Start Encoding settings together with HLS Manifest definition ===
     start_encoding_request = StartEncodingRequest(
         per_title=PerTitle(
@@ -206,30 +238,39 @@ def main():
             )
         )
     )
-    _execute_encoding(encoding=encoding, start_encoding_request=start_encoding_request)
-
-    hls_manifest = _create_hls_manifest(encoding_id=encoding.id, output=gcs_output, output_path=OUTPUT_BASE_PATH)
-    dash_manifest = _create_dash_manifest(encoding_id=encoding.id, output=gcs_output, output_path=OUTPUT_BASE_PATH)
-    _execute_hls_manifest_generation(hls_manifest=hls_manifest)
-    _execute_dash_manifest_generation(dash_manifest=dash_manifest)
-
-
-def _execute_encoding(encoding, start_encoding_request):
-    bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
-
-    task = _wait_for_encoding_to_finish(encoding_id=encoding.id)
-
-    while task.status is not Status.FINISHED and task.status is not Status.ERROR:
+    checkpoint.prepared(encoding_id=encoding.id, output_id=gcs_output.id, output_path=output_base_path,
+                        muxing_types=['fmp4'])
+    _execute_encoding(encoding=encoding, start_encoding_request=start_encoding_request, checkpoint=checkpoint)
+
+    # Per-title renditions are generated by the encoder, so the snapshot has to come from the API.
+    snapshot = load_encoding_snapshot(bitmovin_api, encoding_id=encoding.id, muxing_types=['fmp4'])
+    hls_manifest = _create_hls_manifest(snapshot=snapshot, output=gcs_output, output_path=output_base_path)
+    dash_manifest = _create_dash_manifest(snapshot=snapshot, output=gcs_output, output_path=output_base_path)
+    generate_manifests(bitmovin_api, [('hls', hls_manifest), ('dash', dash_manifest)],
+                       on_generated=checkpoint.manifest_generated, schedule=MANIFEST_SCHEDULE)
+
+
+def _execute_encoding(encoding, start_encoding_request, checkpoint):
+    if WEBHOOK_URL:
+        with WebhookReceiver(port=WEBHOOK_PORT) as receiver:
+            register_encoding_webhooks(bitmovin_api, encoding_id=encoding.id, url=WEBHOOK_URL)
+            bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
+            checkpoint.started()
+            task = wait_for_encoding_notification(bitmovin_api, encoding_id=encoding.id, receiver=receiver)
+    else:
+        bitmovin_api.encoding.encodings.start(encoding_id=encoding.id, start_encoding_request=start_encoding_request)
+        checkpoint.started()
         task = _wait_for_encoding_to_finish(encoding_id=encoding.id)
 
     if task.status is Status.ERROR:
         _log_task_errors(task=task)
         raise Exception("Encoding failed")
 
+    checkpoint.encoded()
     print("Encoding finished successfully")
 
 
-def _create_hls_manifest(encoding_id, output, output_path):
+def _create_hls_manifest(snapshot, output, output_path):
     manifest_output = EncodingOutput(output_id=output.id,
                                      output_path=output_path,
                                      acl=[AclEntry(permission=AclPermission.PUBLIC_READ)])
@@ -242,20 +283,15 @@ def _create_hls_manifest(encoding_id, output, output_path):
             hls_master_playlist_version=HlsVersion.HLS_V4,
             hls_media_playlist_version=HlsVersion.HLS_V4))
 
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(
-            encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
-
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-        segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
+        segment_path = _remove_output_base_path(muxing.outputs[0].output_path, output_path)
 
-        if codec.type == CodecConfigType.AAC:
-            audio_codec = bitmovin_api.encoding.configurations.audio.aac.get(
-                configuration_id=stream.codec_config_id)
+        if rendition.codec_type == CodecConfigType.AAC:
+            audio_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.media.audio.create(
                 manifest_id=hls_manifest.id,
                 audio_media_info=AudioMediaInfo(
@@ -263,13 +299,13 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     group_id='audio',
                     language='en',
                     segment_path=segment_path,
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id,
                     uri=f'audio_{audio_codec.bitrate}.m3u8'))
 
-        elif codec.type == CodecConfigType.H264:
-            video_codec = bitmovin_api.encoding.configurations.video.h264.get(configuration_id=stream.codec_config_id)
+        elif rendition.codec_type == CodecConfigType.H264:
+            video_codec = rendition.codec_config
             bitmovin_api.encoding.manifests.hls.streams.create(
                 manifest_id=hls_manifest.id,
                 stream_info=StreamInfo(
@@ -277,14 +313,14 @@ def _create_hls_manifest(encoding_id, output, output_path):
                     closed_captions='NONE',
                     segment_path=segment_path,
                     uri=f'video_{video_codec.bitrate}.m3u8',
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     stream_id=stream.id,
                     muxing_id=muxing.id))
 
     return hls_manifest
 
 
-def _create_dash_manifest(encoding_id, output, output_path):
+def _create_dash_manifest(snapshot, output, output_path):
     manifest_output = EncodingOutput(
         output_id=output.id,
         output_path=output_path,
@@ -309,36 +345,32 @@ def _create_dash_manifest(encoding_id, output, output_path):
         manifest_id=dash_manifest.id,
         period_id=period.id)
 
-    fmp4_muxings = bitmovin_api.encoding.encodings.muxings.fmp4.list(encoding_id=encoding_id)
-    for muxing in fmp4_muxings.items:
-        stream = bitmovin_api.encoding.encodings.streams.get(
-            encoding_id=encoding_id, stream_id=muxing.streams[0].stream_id)
-
+    for rendition in snapshot.renditions('fmp4'):
+        muxing, stream = rendition.muxing, rendition.stream
         if 'PER_TITLE_TEMPLATE' in stream.mode.value:
             continue
 
-        codec = bitmovin_api.encoding.configurations.type.get(configuration_id=stream.codec_config_id)
-        segment_path = _remove_output_base_path(muxing.outputs[0].output_path)
+        segment_path = _remove_output_base_path(muxing.outputs[0].output_path, output_path)
 
-        if codec.type == CodecConfigType.AAC:
+        if rendition.codec_type == CodecConfigType.AAC:
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=audio_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
                     segment_path=segment_path))
 
-        elif codec.type == CodecConfigType.H264:
+        elif rendition.codec_type == CodecConfigType.H264:
             bitmovin_api.encoding.manifests.dash.periods.adaptationsets.representations.fmp4.create(
                 manifest_id=dash_manifest.id,
                 period_id=period.id,
                 adaptationset_id=video_adaptation_set.id,
                 dash_fmp4_representation=DashFmp4Representation(
-                    encoding_id=encoding_id,
+                    encoding_id=snapshot.encoding_id,
                     muxing_id=muxing.id,
                     type_=DashRepresentationType.TEMPLATE,
                     mode=DashRepresentationTypeMode.TEMPLATE_REPRESENTATION,
@@ -347,58 +379,18 @@ def _create_dash_manifest(encoding_id, output, output_path):
     return dash_manifest
 
 
-def _execute_hls_manifest_generation(hls_manifest):
-    bitmovin_api.encoding.manifests.hls.start(manifest_id=hls_manifest.id)
-
-    task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-
-    while task.status is not Status.FINISHED and task.status is not Status.ERROR:
-        task = _wait_for_hls_manifest_to_finish(manifest_id=hls_manifest.id)
-    if task.status is Status.ERROR:
-        _log_task_errors(task=task)
-        raise Exception("HLS Manifest Creation failed")
-
-    print("DASH Manifest Creation finished successfully")
-
-
-def _execute_dash_manifest_generation(dash_manifest):
-    bitmovin_api.encoding.manifests.dash.start(manifest_id=dash_manifest.id)
-
-    task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-
-    while task.status is not Status.FINISHED and task.status is not Status.ERROR:
-        task = _wait_for_dash_manifest_to_finish(manifest_id=dash_manifest.id)
-    if task.status is Status.ERROR:
-        _log_task_errors(task=task)
-        raise Exception("DASH Manifest Creation failed")
-
-    print("DASH Manifest Creation finished successfully")
-
-
 def _wait_for_encoding_to_finish(encoding_id):
-    time.sleep(5)
-    task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
-    print(f"Encoding status is {task.status} (progress: {task.progress} %)")
-    return task
-
-
-def _wait_for_hls_manifest_to_finish(manifest_id):
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.hls.status(manifest_id=manifest_id)
-    print(f"HLS manifest status is {task.status} (progress: {task.progress} %)")
-    return task
-
+    def fetch_status():
+        task = bitmovin_api.encoding.encodings.status(encoding_id=encoding_id)
+        print(f"Encoding status is {task.status} (progress: {task.progress} %)")
+        return task
 
-def _wait_for_dash_manifest_to_finish(manifest_id):
-    time.sleep(5)
-    task = bitmovin_api.encoding.manifests.dash.status(manifest_id=manifest_id)
-    print("DASH manifest status is {} (progress: {} %)".format(task.status, task.progress))
-    return task
+    return poll_task(fetch_status, schedule=ENCODING_SCHEDULE)
 
 
-def _remove_output_base_path(text):
-    if text.startswith(OUTPUT_BASE_PATH):
-        return text[len(OUTPUT_BASE_PATH):]
+def _remove_output_base_path(text, output_base_path=OUTPUT_BASE_PATH):
+    if text.startswith(output_base_path):
+        return text[len(output_base_path):]
     return text
 
 